@@ -0,0 +1,832 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the race and tip data pipeline.
+Runs entirely offline against the local stub API and synthetic data.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, Any, List, Optional
+from consolidate_tips import consolidate_tip_data, analyze_tips, fetch_tip_pages
+from gamba_api_client import GambaAPIClient, RetryPolicy
+from gamba_stub_server import StubGambaServer, StubCoinGeckoServer, synthetic_race
+from json_stream import iter_json_objects
+from race_accumulators import RaceAnalysisEngine
+from race_columns import CompetitorColumns, columnar_results, NUMPY_AVAILABLE
+from race_database import RaceDatabase
+from race_pipeline import new_pipeline_stats, fetch_races, validate_races, normalize_races, insert_races, analyze_races
+from races_analyzer import RaceAnalyzer
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+from sqlite_profile import connect
+from tip_store import TipStore
+
+def unlimited() -> TokenBucket:
+    """A rate limiter that never waits, for isolating other effects."""
+    return TokenBucket(rate=1e9, capacity=1e9)
+
+def benchmark_race_fetching(race_count: int = 100, latency: float = 0.05, concurrency: int = 16) -> Dict[str, Any]:
+    """Compare sequential vs. concurrent race fetching wall-clock time."""
+    with StubGambaServer(latency=latency) as server:
+        client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited())
+        race_ids = list(range(1, race_count + 1))
+
+        start = time.perf_counter()
+        sequential = client.get_multiple_races(race_ids)
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+        concurrent_time = time.perf_counter() - start
+
+    same_order = [r['data']['getRaceById']['id'] for r in sequential] == \
+                 [r['data']['getRaceById']['id'] for r in concurrent]
+
+    return {
+        'races': race_count,
+        'server_latency_s': latency,
+        'concurrency': concurrency,
+        'sequential_s': sequential_time,
+        'concurrent_s': concurrent_time,
+        'speedup': sequential_time / max(concurrent_time, 1e-9),
+        'results_match': same_order
+    }
+
+def benchmark_rate_limiting(race_count: int = 200, server_limit: int = 50, concurrency: int = 16) -> Dict[str, Any]:
+    """Throughput and 429s against a throttled server: fixed 1 req/s sleep vs. token bucket."""
+    with StubGambaServer(max_requests_per_second=server_limit) as server:
+        race_ids = list(range(1, race_count + 1))
+
+        # Old behaviour slept a fixed second between requests
+        fixed_time = (race_count - 1) * 1.0
+
+        limiter = TokenBucket(rate=server_limit, capacity=10)
+        client = GambaAPIClient(base_url=server.base_url, rate_limiter=limiter)
+        start = time.perf_counter()
+        races = client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+        bucket_time = time.perf_counter() - start
+
+        return {
+            'races': race_count,
+            'server_limit_rps': server_limit,
+            'fixed_1s_delay_s_minimum': fixed_time,
+            'token_bucket_s': bucket_time,
+            'token_bucket_rps': len(races) / max(bucket_time, 1e-9),
+            'races_fetched': len(races),
+            'server_429s': server.throttled_count,
+            'final_rate_rps': limiter.rate
+        }
+
+def benchmark_retries(race_count: int = 200, failure_rate: float = 0.3, concurrency: int = 16) -> Dict[str, Any]:
+    """Races lost to transient 503s with and without the retry policy."""
+    with StubGambaServer(failure_rate=failure_rate) as server:
+        race_ids = list(range(1, race_count + 1))
+
+        client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited(),
+                                retry_policy=RetryPolicy(max_attempts=1))
+        client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+        failed_without_retry = len(client.last_failed_ids)
+
+        client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited(),
+                                retry_policy=RetryPolicy(max_attempts=6, base_delay=0.05))
+        start = time.perf_counter()
+        client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+        retry_time = time.perf_counter() - start
+
+        return {
+            'races': race_count,
+            'server_failure_rate': failure_rate,
+            'failed_without_retry': failed_without_retry,
+            'failed_with_retry': len(client.last_failed_ids),
+            'with_retry_s': retry_time
+        }
+
+def benchmark_response_cache(race_count: int = 500, live_races: int = 5, concurrency: int = 16) -> Dict[str, Any]:
+    """Network requests and wall-clock time for re-running a backfill with the response cache."""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            StubGambaServer(latency=0.01, live_from_id=race_count - live_races + 1) as server:
+        cache = ResponseCache(os.path.join(tmp_dir, 'response_cache.db'))
+        client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited(), cache=cache)
+        race_ids = list(range(1, race_count + 1))
+
+        start = time.perf_counter()
+        client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+        cold_time = time.perf_counter() - start
+        cold_requests = server.request_count
+
+        start = time.perf_counter()
+        client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+        warm_time = time.perf_counter() - start
+        warm_requests = server.request_count - cold_requests
+        cache.close()
+
+    return {
+        'races': race_count,
+        'live_races': live_races,
+        'cold_requests': cold_requests,
+        'cold_s': cold_time,
+        'warm_requests': warm_requests,
+        'warm_s': warm_time
+    }
+
+def count_rows(races: List[Dict[str, Any]]) -> int:
+    """Rows written per race: race, sponsor, codes, and player/participant/history per competitor."""
+    total = 0
+    for race_data in races:
+        race_info = race_data['data']['getRaceById']
+        total += 2 + len(race_info.get('eligibility', [])) + 3 * len(race_info.get('competitors', []))
+    return total
+
+def benchmark_ingestion(race_count: int = 10000, baseline_count: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Rows/sec for per-race insert_race_data vs. insert_races_bulk on synthetic races.
+    The per-race baseline can be limited to the first `baseline_count` races.
+    """
+    races = [synthetic_race(race_id) for race_id in range(1, race_count + 1)]
+    rows = count_rows(races)
+    baseline = races[:baseline_count or race_count]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = RaceDatabase(os.path.join(tmp_dir, 'per_race.db'))
+            start = time.perf_counter()
+            for race_data in baseline:
+                db.insert_race_data(race_data)
+            per_race_time = time.perf_counter() - start
+            db.close()
+
+            db = RaceDatabase(os.path.join(tmp_dir, 'bulk.db'))
+            start = time.perf_counter()
+            db.insert_races_bulk(races)
+            bulk_time = time.perf_counter() - start
+            db.close()
+
+    per_race_rows_per_s = count_rows(baseline) / max(per_race_time, 1e-9)
+    bulk_rows_per_s = rows / max(bulk_time, 1e-9)
+    return {
+        'races': race_count,
+        'rows': rows,
+        'per_race_baseline_races': len(baseline),
+        'per_race_s': per_race_time,
+        'per_race_rows_per_s': per_race_rows_per_s,
+        'bulk_s': bulk_time,
+        'bulk_rows_per_s': bulk_rows_per_s,
+        'rows_per_s_speedup': bulk_rows_per_s / max(per_race_rows_per_s, 1e-9)
+    }
+
+def _read_while_ingesting(db_path: str, profile: str, races: List[Dict[str, Any]],
+                         readers: int, batch_size: int) -> Dict[str, Any]:
+    """Run reader threads against db_path while one writer bulk-inserts races."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        writer = RaceDatabase(db_path, profile=profile)
+    done = threading.Event()
+    counts = {'queries': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def read_loop():
+        conn = connect(db_path, profile)
+        conn.execute('PRAGMA busy_timeout = 50')  # Surface lock contention instead of waiting it out
+        while not done.is_set():
+            try:
+                conn.execute('''
+                    SELECT * FROM players WHERE total_races_participated > 0
+                    ORDER BY total_prizes_won DESC, roi_percentage DESC LIMIT 20
+                ''').fetchall()
+                key = 'queries'
+            except sqlite3.OperationalError:
+                key = 'locked'
+            with lock:
+                counts[key] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset in range(0, len(races), batch_size):
+            writer.insert_races_bulk(races[offset:offset + batch_size])
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    return {
+        'ingest_s': elapsed,
+        'reads_per_s': counts['queries'] / max(elapsed, 1e-9),
+        'locked_errors': counts['locked']
+    }
+
+def benchmark_concurrent_reads(race_count: int = 3000, readers: int = 4, batch_size: int = 10) -> Dict[str, Any]:
+    """Read throughput during ingestion with the default vs. performance SQLite profile."""
+    races = [synthetic_race(race_id) for race_id in range(1, race_count + 1)]
+    results = {'races': race_count, 'readers': readers}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in ('default', 'performance'):
+            run = _read_while_ingesting(os.path.join(tmp_dir, f'{profile}.db'), profile,
+                                        races, readers, batch_size)
+            results.update({f'{profile}_{key}': value for key, value in run.items()})
+
+    return results
+
+def benchmark_pooled_reads(race_count: int = 3000, readers: int = 4, batch_size: int = 10) -> Dict[str, Any]:
+    """Queries through one shared RaceDatabase's reader pool while its writer ingests."""
+    races = [synthetic_race(race_id) for race_id in range(1, race_count + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = RaceDatabase(os.path.join(tmp_dir, 'pooled.db'), readers=readers)
+        done = threading.Event()
+        counts = {'queries': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def read_loop():
+            while not done.is_set():
+                try:
+                    db.get_top_players(20)
+                    key = 'queries'
+                except sqlite3.Error:
+                    key = 'errors'
+                with lock:
+                    counts[key] += 1
+
+        threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for offset in range(0, len(races), batch_size):
+                db.insert_races_bulk(races[offset:offset + batch_size])
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        for thread in threads:
+            thread.join()
+        stored = db.get_top_players(1)
+        db.close()
+
+    return {
+        'races': race_count,
+        'readers': readers,
+        'ingest_s': elapsed,
+        'reads_per_s': counts['queries'] / max(elapsed, 1e-9),
+        'read_errors': counts['errors'],
+        'players_visible': bool(stored)
+    }
+
+def _timed_analysis(races_file: str, cache_db: str, incremental: bool) -> float:
+    """Seconds RaceAnalyzer.analyze_all_races takes on a races file."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = RaceAnalyzer(races_file, cache_db)
+        start = time.perf_counter()
+        analyzer.analyze_all_races(incremental)
+        elapsed = time.perf_counter() - start
+        analyzer.conn.close()
+    return elapsed
+
+def benchmark_incremental_analysis(race_count: int = 10000, new_races: int = 1) -> Dict[str, Any]:
+    """Full race analysis vs. resuming saved accumulator state after new races arrive."""
+    races = [synthetic_race(race_id) for race_id in range(1, race_count + new_races + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        races_file = os.path.join(tmp_dir, 'races.json')
+        cache_db = os.path.join(tmp_dir, 'races_cache.db')
+
+        with open(races_file, 'w', encoding='utf-8') as f:
+            json.dump(races[:race_count], f)
+        initial_time = _timed_analysis(races_file, cache_db, incremental=True)
+
+        with open(races_file, 'w', encoding='utf-8') as f:
+            json.dump(races, f)
+        full_time = _timed_analysis(races_file, os.path.join(tmp_dir, 'full_cache.db'), incremental=False)
+        incremental_time = _timed_analysis(races_file, cache_db, incremental=True)
+
+    return {
+        'history_races': race_count,
+        'new_races': new_races,
+        'initial_s': initial_time,
+        'full_reanalysis_s': full_time,
+        'incremental_s': incremental_time,
+        'speedup': full_time / max(incremental_time, 1e-9)
+    }
+
+# Loads a dump in a child process and reports its peak RSS, so modes do not share a heap
+_DUMP_LOAD_SCRIPT = '''
+import json, resource, sys, time
+from json_stream import iter_json_objects
+
+mode, path = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == 'read':
+    # What the loaders did before: the whole file copied into one str, then parsed
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    def parse_all(decoder=json.JSONDecoder(), pos=0):
+        while True:
+            pos = content.find('{', pos)
+            if pos < 0:
+                return
+            obj, pos = decoder.raw_decode(content, pos)
+            yield obj
+    objects = parse_all()
+else:
+    objects = iter_json_objects(path, mmap_input=(mode == 'mmap'))
+pages = tips = 0
+for obj in objects:
+    pages += 1
+    tips += len(obj['data']['myTips']['results'])
+def peak_rss_mb():
+    # ru_maxrss survives fork and exec on Linux, so it would report the parent's
+    # peak; VmHWM belongs to this process alone
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({'pages': pages, 'tips': tips, 'seconds': time.perf_counter() - start,
+                  'peak_rss_mb': peak_rss_mb()}))
+'''
+
+def _write_tip_dump(path: str, size_mb: int, tips_per_page: int = 100) -> int:
+    """Write a dump of concatenated myTips pages of about size_mb; returns the page size in bytes."""
+    tips = [{
+        'id': f'tip-{i}',
+        'issued_at': '2025-05-21T02:04:18+00:00',
+        'amount': -3 if i % 2 else 5.5,
+        'currency_code': 'XRP',
+        'type': 'Tip Withdraw' if i % 2 else 'Tip Deposit',
+        'sender_username': 'SupItsJ',
+        'receiver_username': f'user{i}',
+        'message': 'braces {inside} "strings" }{',
+        'is_public': True
+    } for i in range(tips_per_page)]
+    page = json.dumps({'data': {'myTips': {'results': tips, 'paginate': {'page_count': tips_per_page}}}},
+                      indent=4).encode('utf-8') + b'\n\n-----\n\n'
+
+    with open(path, 'wb') as f:
+        for _ in range(max(size_mb * 1024 * 1024 // len(page), 1)):
+            f.write(page)
+    return len(page)
+
+def benchmark_dump_memory(size_mb: int = 2048, modes: tuple = ('read', 'stream', 'mmap')) -> Dict[str, Any]:
+    """Peak RSS and time to walk a synthetic tips dump: f.read() vs. streaming vs. mmap."""
+    results = {'dump_mb': size_mb}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'tips_dump.json')
+        results['page_bytes'] = _write_tip_dump(path, size_mb)
+
+        for mode in modes:
+            run = subprocess.run([sys.executable, '-c', _DUMP_LOAD_SCRIPT, mode, path],
+                                 capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+            if run.returncode:
+                results[f'{mode}_error'] = (run.stderr.strip().splitlines() or ['failed'])[-1]
+                continue
+            measured = json.loads(run.stdout)
+            results[f'{mode}_tips'] = measured['tips']
+            results[f'{mode}_s'] = measured['seconds']
+            results[f'{mode}_peak_rss_mb'] = measured['peak_rss_mb']
+
+    return results
+
+def benchmark_columnar(competitor_rows: int = 1000000, competitors_per_race: int = 10) -> Dict[str, Any]:
+    """Race metrics over synthetic competitors: exact accumulator engine vs. NumPy columns."""
+    if not NUMPY_AVAILABLE:
+        return {'error': 'numpy is not installed'}
+
+    race_count = max(competitor_rows // competitors_per_race, 1)
+    races = [synthetic_race(race_id, competitors_per_race) for race_id in range(1, race_count + 1)]
+
+    start = time.perf_counter()
+    engine = RaceAnalysisEngine()
+    engine.feed_all(races)
+    exact = engine.results()
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = CompetitorColumns.from_races(races)
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    columnar = columnar_results(columns)
+    compute_time = time.perf_counter() - start
+
+    exact_pool = exact['prize_analysis']['avg_distribution_efficiency']
+    columnar_pool = columnar['prize_analysis']['avg_distribution_efficiency']
+    return {
+        'races': race_count,
+        'competitor_rows': len(columns.wagered),
+        'exact_s': exact_time,
+        'columnar_load_s': load_time,
+        'columnar_compute_s': compute_time,
+        'compute_speedup': exact_time / max(compute_time, 1e-9),
+        'end_to_end_speedup': exact_time / max(load_time + compute_time, 1e-9),
+        'efficiency_rel_diff': abs(exact_pool - columnar_pool) / max(abs(exact_pool), 1e-12)
+    }
+
+def _measured(run) -> tuple:
+    """Seconds for run(), then the peak Python heap (MB) of a second, traced run."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+def benchmark_sql_analysis(race_count: int = 50000) -> Dict[str, Any]:
+    """Race analysis from a JSON dump in Python vs. pushed down into SQL over a RaceDatabase."""
+    races = [synthetic_race(race_id) for race_id in range(1, race_count + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        races_file = os.path.join(tmp_dir, 'races.json')
+        with open(races_file, 'w', encoding='utf-8') as f:
+            json.dump(races, f)
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = RaceDatabase(os.path.join(tmp_dir, 'race_database.db'))
+            db.insert_races_bulk(races)
+        del races
+
+        def analyze(source):
+            analyzer = RaceAnalyzer(source, os.path.join(tmp_dir, 'races_cache.db'))
+            analyzer.analyze_all_races(incremental=False)
+            analyzer.conn.close()
+
+        json_time, json_peak = _measured(lambda: analyze(races_file))
+        sql_time, sql_peak = _measured(lambda: analyze(db))
+        db.close()
+
+    return {
+        'races': race_count,
+        'json_s': json_time,
+        'json_peak_heap_mb': json_peak,
+        'sql_s': sql_time,
+        'sql_peak_heap_mb': sql_peak,
+        'speedup': json_time / max(sql_time, 1e-9),
+        'heap_reduction': json_peak / max(sql_peak, 1e-9)
+    }
+
+def benchmark_parallel_analysis(race_count: int = 30000, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Exact race analysis in one process vs. merged shards on a process pool."""
+    workers = workers or os.cpu_count() or 1
+    races = [synthetic_race(race_id) for race_id in range(1, race_count + 1)]
+
+    start = time.perf_counter()
+    engine = RaceAnalysisEngine()
+    engine.feed_all(races)
+    single = engine.results()
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = RaceAnalysisEngine()
+    engine.feed_parallel(races, workers)
+    parallel = engine.results()
+    parallel_time = time.perf_counter() - start
+
+    return {
+        'races': race_count,
+        'workers': workers,
+        'single_process_s': single_time,
+        'parallel_s': parallel_time,
+        'speedup': single_time / max(parallel_time, 1e-9),
+        'identical_results': json.dumps(single) == json.dumps(parallel)
+    }
+
+def _retained(load) -> tuple:
+    """Seconds for load(), the Python heap (MB) its result holds on to, and the result."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            loaded = load()
+            elapsed = time.perf_counter() - start
+            retained = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+    return elapsed, retained / (1024 * 1024), loaded
+
+def benchmark_compact_records(race_count: int = 100000) -> Dict[str, Any]:
+    """Heap held by loaded races: full getRaceById response dicts vs. compact RaceRecords."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        races_file = os.path.join(tmp_dir, 'races.json')
+        with open(races_file, 'w', encoding='utf-8') as f:
+            json.dump([synthetic_race(race_id) for race_id in range(1, race_count + 1)], f)
+
+        # What RaceAnalyzer kept before: every response envelope as parsed
+        dict_time, dict_mb, races = _retained(lambda: list(iter_json_objects(races_file)))
+        engine = RaceAnalysisEngine()
+        engine.feed_all(races)
+        dict_results = engine.results()
+        del races
+
+        record_time, record_mb, analyzer = _retained(
+            lambda: RaceAnalyzer(races_file, os.path.join(tmp_dir, 'races_cache.db')))
+        analyzer.conn.close()
+        engine = RaceAnalysisEngine()
+        engine.feed_all(analyzer.races_data)
+        record_results = engine.results()
+
+    return {
+        'races': race_count,
+        'dict_load_s': dict_time,
+        'dict_heap_mb': dict_mb,
+        'record_load_s': record_time,
+        'record_heap_mb': record_mb,
+        'bytes_per_race_dict': dict_mb * 1024 * 1024 / race_count,
+        'bytes_per_race_record': record_mb * 1024 * 1024 / race_count,
+        'heap_reduction': dict_mb / max(record_mb, 1e-9),
+        'identical_results': json.dumps(dict_results) == json.dumps(record_results)
+    }
+
+def _tip_page(page_index: int, tips_per_page: int = 100) -> Dict[str, Any]:
+    """A myTips page of unique synthetic tips, newer for higher page_index."""
+    tips = []
+    for i in range(tips_per_page):
+        serial = page_index * tips_per_page + i
+        tips.append({
+            'id': f'tip-{serial}',
+            'issued_at': time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(1700000000 + serial * 60)),
+            'amount': -3 if i % 2 else 5.5,
+            'currency_code': ('XRP', 'USDT', 'BTC')[i % 3],
+            'type': 'Tip Withdraw' if i % 2 else 'Tip Deposit',
+            'sender_username': 'SupItsJ' if i % 2 else f'user{serial % 500}',
+            'receiver_username': f'user{serial % 500}' if i % 2 else 'SupItsJ',
+            'is_public': True,
+            '__typename': 'Tip'
+        })
+    return {'data': {'myTips': {'results': tips, 'paginate': {'page_count': tips_per_page}}}}
+
+def benchmark_tip_store(history_pages: int = 1000) -> Dict[str, Any]:
+    """Adding one page of tips: full re-consolidation into JSON vs. an upsert into the tip store."""
+    pages = [_tip_page(i) for i in range(history_pages)]
+    new_page = _tip_page(history_pages)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # What each run did before: consolidate every page, write the file, re-parse it to analyze
+        start = time.perf_counter()
+        consolidated = consolidate_tip_data(pages + [new_page])
+        consolidated_file = os.path.join(tmp_dir, 'tips_consolidated.json')
+        with open(consolidated_file, 'w', encoding='utf-8') as f:
+            json.dump(consolidated, f, indent=2, ensure_ascii=False)
+        with open(consolidated_file, 'r', encoding='utf-8') as f:
+            json_stats = analyze_tips(json.load(f))
+        json_time = time.perf_counter() - start
+
+        store = TipStore(os.path.join(tmp_dir, 'tips.db'))
+        store.add_pages(pages)
+        start = time.perf_counter()
+        store.add_page(new_page)
+        add_time = time.perf_counter() - start
+        start = time.perf_counter()
+        store_stats = store.analyze()
+        analyze_time = time.perf_counter() - start
+        store.close()
+
+    return {
+        'history_tips': len(pages) * len(new_page['data']['myTips']['results']),
+        'reconsolidate_s': json_time,
+        'store_add_page_s': add_time,
+        'store_analyze_s': analyze_time,
+        'speedup': json_time / max(add_time + analyze_time, 1e-9),
+        'same_totals': json_stats['total_transactions'] == store_stats['total_transactions'] and
+                       json_stats['currencies'] == store_stats['currencies']
+    }
+
+def benchmark_incremental_tips(history_pages: int = 1000) -> Dict[str, Any]:
+    """Hourly refresh of a dump grown by one page: a full pass into the tip store vs. an incremental one."""
+    pages = [_tip_page(i) for i in range(history_pages + 1)]
+    for page in pages:
+        page['data']['myTips']['results'].reverse()  # The API serves newest first
+    dump = pages[::-1]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        full_store = TipStore(os.path.join(tmp_dir, 'full.db'))
+        store = TipStore(os.path.join(tmp_dir, 'tips.db'))
+        full_store.add_pages(pages[:-1])
+        store.add_pages(pages[:-1])
+
+        # What consolidate_tips.py --full does: upsert every tip of the dump again
+        start = time.perf_counter()
+        full_store.add_pages(dump)
+        full_time = time.perf_counter() - start
+
+        # The default run: only tips newer than the store's watermark are written
+        start = time.perf_counter()
+        new_tips = store.add_pages(dump, incremental=True)
+        incremental_time = time.perf_counter() - start
+
+        history_tips = full_store.count()
+        identical = full_store.tips() == store.tips()
+        full_store.close()
+        store.close()
+
+    return {
+        'history_tips': history_tips,
+        'new_tips': new_tips,
+        'full_s': full_time,
+        'incremental_s': incremental_time,
+        'speedup': full_time / max(incremental_time, 1e-9),
+        'identical_results': identical
+    }
+
+def benchmark_tip_paging(history_pages: int = 200, latency: float = 0.02) -> Dict[str, Any]:
+    """Paging myTips into the tip store: sequential vs. prefetched requests, and a refresh with one new page."""
+    pages = [_tip_page(i) for i in range(history_pages + 1)]
+    for page in pages:
+        page['data']['myTips']['results'].reverse()  # The API serves newest first
+    pages.reverse()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with StubGambaServer(latency=latency, tip_pages=pages[1:]) as server:
+            client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited())
+
+            sequential_store = TipStore(os.path.join(tmp_dir, 'sequential.db'))
+            start = time.perf_counter()
+            sequential_store.add_pages(client.iter_tip_pages(query_hash='stub', prefetch=False))
+            sequential_time = time.perf_counter() - start
+
+            store = TipStore(os.path.join(tmp_dir, 'tips.db'))
+            start = time.perf_counter()
+            fetch_tip_pages(store, client, 'stub')
+            prefetch_time = time.perf_counter() - start
+            full_requests = server.request_count // 2
+            identical = store.tips() == sequential_store.tips()
+            sequential_store.close()
+
+        # An hour later one more page exists; paging stops once it reaches stored tips
+        with StubGambaServer(latency=latency, tip_pages=pages) as server:
+            client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited())
+            start = time.perf_counter()
+            new_tips = fetch_tip_pages(store, client, 'stub')
+            refresh_time = time.perf_counter() - start
+            refresh_requests = server.request_count
+        store.close()
+
+    return {
+        'pages': history_pages,
+        'server_latency_s': latency,
+        'sequential_s': sequential_time,
+        'prefetch_s': prefetch_time,
+        'prefetch_speedup': sequential_time / max(prefetch_time, 1e-9),
+        'full_requests': full_requests,
+        'refresh_new_tips': new_tips,
+        'refresh_requests': refresh_requests,
+        'refresh_s': refresh_time,
+        'identical_results': identical
+    }
+
+def benchmark_streaming_pipeline(race_count: int = 3000, latency: float = 0.002,
+                                 concurrency: int = 16) -> Dict[str, Any]:
+    """Fetching a race range into the database and analytics: list, file and reload vs. the streaming pipeline."""
+    race_ids = list(range(1, race_count + 1))
+    first_stored = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir, StubGambaServer(latency=latency) as server:
+        client = GambaAPIClient(base_url=server.base_url, rate_limiter=unlimited())
+        runs = iter(range(1000))
+
+        def batch_run():
+            # What a backfill did before: collect every race, dump it with indent=2, re-read it, insert, analyze
+            start = time.perf_counter()
+            db = RaceDatabase(os.path.join(tmp_dir, f'batch_{next(runs)}.db'))
+            races = client.get_multiple_races_concurrent(race_ids, concurrency=concurrency)
+            races_file = os.path.join(tmp_dir, 'fetched_races.json')
+            with open(races_file, 'w', encoding='utf-8') as f:
+                json.dump(races, f, indent=2, ensure_ascii=False)
+            races = list(iter_json_objects(races_file))
+            db.insert_races_bulk(races[:100])
+            first_stored.setdefault('batch', time.perf_counter() - start)
+            db.insert_races_bulk(races[100:])
+            RaceAnalysisEngine().feed_all(races)
+            db.close()
+
+        def stream_run():
+            start = time.perf_counter()
+            db = RaceDatabase(os.path.join(tmp_dir, f'stream_{next(runs)}.db'))
+            stats = new_pipeline_stats()
+            records = normalize_races(validate_races(fetch_races(client, race_ids, concurrency), stats))
+            for record in analyze_races(RaceAnalysisEngine(), insert_races(db, records, stats, 100), stats):
+                first_stored.setdefault('stream', time.perf_counter() - start)
+            db.close()
+
+        batch_time, batch_mb = _measured(batch_run)
+        stream_time, stream_mb = _measured(stream_run)
+
+    return {
+        'races': race_count,
+        'server_latency_s': latency,
+        'batch_s': batch_time,
+        'stream_s': stream_time,
+        'batch_first_stored_s': first_stored['batch'],
+        'stream_first_stored_s': first_stored['stream'],
+        'batch_peak_mb': batch_mb,
+        'stream_peak_mb': stream_mb,
+        'memory_reduction': batch_mb / max(stream_mb, 1e-9)
+    }
+
+def benchmark_price_cache(callers: int = 16, latency: float = 0.3) -> Dict[str, Any]:
+    """CoinGecko requests and wall-clock time: cold, warm, concurrent callers and an outage."""
+    with tempfile.TemporaryDirectory() as tmp_dir, StubCoinGeckoServer(latency=latency) as server:
+        fetcher = CryptoDataFetcher(os.path.join(tmp_dir, 'crypto_cache.db'), price_ttl=60, api_url=server.base_url)
+
+        start = time.perf_counter()
+        cold = fetcher.fetch_current_prices()
+        cold_time = time.perf_counter() - start
+        cold_requests = server.request_count
+
+        start = time.perf_counter()
+        warm = fetcher.fetch_current_prices()
+        warm_time = time.perf_counter() - start
+        warm_requests = server.request_count - cold_requests
+
+        # Prices expire; every caller misses at once, and a caller wanting fewer currencies joins too
+        fetcher.price_ttl = 0
+        before = server.request_count
+        threads = [threading.Thread(target=fetcher.fetch_current_prices, args=(['BTC'] if i % 2 else None,))
+                   for i in range(callers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        concurrent_time = time.perf_counter() - start
+        concurrent_requests = server.request_count - before
+
+        server.available = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            outage = fetcher.fetch_current_prices()
+        fetcher.conn.close()
+
+    return {
+        'cold_requests': cold_requests,
+        'cold_s': cold_time,
+        'warm_requests': warm_requests,
+        'warm_s': warm_time,
+        'concurrent_callers': callers,
+        'concurrent_requests': concurrent_requests,
+        'concurrent_s': concurrent_time,
+        'outage_served_cached': all(outage[code]['price'] == cold[code]['price'] for code in cold),
+        'warm_matches_cold': warm == cold
+    }
+
+BENCHMARKS = {
+    'fetch': benchmark_race_fetching,
+    'rate_limit': benchmark_rate_limiting,
+    'retry': benchmark_retries,
+    'cache': benchmark_response_cache,
+    'ingest': benchmark_ingestion,
+    'concurrent_reads': benchmark_concurrent_reads,
+    'pooled_reads': benchmark_pooled_reads,
+    'incremental_analysis': benchmark_incremental_analysis,
+    'dump_memory': benchmark_dump_memory,
+    'columnar': benchmark_columnar,
+    'sql_analysis': benchmark_sql_analysis,
+    'parallel_analysis': benchmark_parallel_analysis,
+    'compact_records': benchmark_compact_records,
+    'tip_store': benchmark_tip_store,
+    'incremental_tips': benchmark_incremental_tips,
+    'tip_paging': benchmark_tip_paging,
+    'streaming_pipeline': benchmark_streaming_pipeline,
+    'price_cache': benchmark_price_cache,
+}
+
+def print_results(name: str, results: Dict[str, Any]):
+    """Print a formatted benchmark result block."""
+    print("\n" + "=" * 60)
+    print(f"⏱️  BENCHMARK: {name}")
+    print("=" * 60)
+    for key, value in results.items():
+        if isinstance(value, float):
+            print(f"{key:>24}: {value:,.3f}")
+        else:
+            print(f"{key:>24}: {value}")
+
+def main():
+    """Run the requested benchmarks (all by default)."""
+    names = sys.argv[1:] or list(BENCHMARKS)
+
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            continue
+        print_results(name, BENCHMARKS[name]())
+
+if __name__ == "__main__":
+    main()
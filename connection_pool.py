@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+SQLite connection pool: one serialized writer connection plus N reader connections.
+Lets ingestion and queries share a database file from several threads.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Union
+from sqlite_profile import connect
+
+class ConnectionPool:
+    """One writer connection handed out through a queue, plus a pool of readers."""
+
+    def __init__(self, db_path: str, readers: int = 4,
+                 profile: Union[str, Dict[str, Any], None] = 'performance'):
+        self.db_path = db_path
+        self.writer_conn = self._open(profile)
+        self._writer_queue = queue.Queue(maxsize=1)
+        self._writer_queue.put(self.writer_conn)
+        self._writer_owner = threading.local()
+
+        # An in-memory database is private to its connection, so readers share the writer
+        self.shared = db_path == ':memory:'
+        self._reader_queue = queue.Queue()
+        self._readers = []
+        if not self.shared:
+            for _ in range(max(readers, 1)):
+                conn = self._open(profile)
+                conn.execute('PRAGMA query_only = 1')
+                self._readers.append(conn)
+                self._reader_queue.put(conn)
+
+    def _open(self, profile) -> sqlite3.Connection:
+        conn = connect(self.db_path, profile, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Exclusive use of the writer connection; re-entrant within a thread."""
+        depth = getattr(self._writer_owner, 'depth', 0)
+        if depth:
+            self._writer_owner.depth += 1
+            try:
+                yield self.writer_conn
+            finally:
+                self._writer_owner.depth -= 1
+            return
+
+        conn = self._writer_queue.get()
+        self._writer_owner.depth = 1
+        try:
+            yield conn
+        finally:
+            self._writer_owner.depth = 0
+            self._writer_queue.put(conn)
+
+    @contextmanager
+    def reader(self):
+        """A read-only connection for the duration of the block."""
+        if self.shared:
+            with self.writer() as conn:
+                yield conn
+            return
+
+        conn = self._reader_queue.get()
+        try:
+            yield conn
+        finally:
+            self._reader_queue.put(conn)
+
+    def close(self):
+        """Close every pooled connection."""
+        for conn in self._readers:
+            conn.close()
+        self.writer_conn.close()
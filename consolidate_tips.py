@@ -2,73 +2,17 @@
 """
 Script to consolidate multiple concatenated JSON objects from tips.json
 into a single valid JSON structure.
+Tips are upserted into the indexed tip store (tips.db); the consolidated
+JSON is exported from it for the static tips viewer.
 """
 
 import json
-import re
-from typing import List, Dict, Any
-
-def extract_json_objects(file_path: str) -> List[Dict[str, Any]]:
-    """
-    Extract individual JSON objects from a file containing multiple concatenated JSON objects.
-    """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find all JSON objects by looking for patterns that start with { and end with }
-    # We'll use a simple approach: split by lines that contain only "{"
-    lines = content.split('\n')
-    json_objects = []
-    current_object_lines = []
-    brace_count = 0
-    in_object = False
-    
-    for line in lines:
-        stripped_line = line.strip()
-        
-        # Start of a new JSON object
-        if stripped_line == '{' and not in_object:
-            if current_object_lines:
-                # Process previous object
-                try:
-                    obj_str = '\n'.join(current_object_lines)
-                    obj = json.loads(obj_str)
-                    json_objects.append(obj)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON object: {e}")
-                    print(f"Object content: {obj_str[:200]}...")
-            
-            current_object_lines = [line]
-            brace_count = 1
-            in_object = True
-        elif in_object:
-            current_object_lines.append(line)
-            # Count braces to know when object ends
-            brace_count += line.count('{') - line.count('}')
-            
-            if brace_count == 0:
-                # Object is complete
-                try:
-                    obj_str = '\n'.join(current_object_lines)
-                    obj = json.loads(obj_str)
-                    json_objects.append(obj)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON object: {e}")
-                    print(f"Object content: {obj_str[:200]}...")
-                
-                current_object_lines = []
-                in_object = False
-    
-    # Handle last object if file doesn't end properly
-    if current_object_lines and in_object:
-        try:
-            obj_str = '\n'.join(current_object_lines)
-            obj = json.loads(obj_str)
-            json_objects.append(obj)
-        except json.JSONDecodeError as e:
-            print(f"Error parsing final JSON object: {e}")
-    
-    return json_objects
+import os
+import sys
+from typing import List, Dict, Any, Optional
+from gamba_api_client import GambaAPIClient
+from json_stream import iter_json_objects
+from tip_store import TipStore
 
 def consolidate_tip_data(json_objects: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -183,30 +127,69 @@ def analyze_tips(tips_data: Dict[str, Any]) -> Dict[str, Any]:
     
     return stats
 
+def store_tip_pages(store: TipStore, file_path: str, mmap_input: bool = False,
+                    incremental: bool = False) -> int:
+    """
+    Upsert every myTips page of a dump into the tip store, one page at a time.
+    Returns the number of tips written; tips already stored are updated in place.
+    With incremental=True, tips behind the store's watermark are skipped.
+    """
+    try:
+        return store.add_pages(iter_json_objects(file_path, mmap_input=mmap_input), incremental)
+    except ValueError as e:
+        print(f"Error parsing JSON object: {e}")
+        return 0
+
+def fetch_tip_pages(store: TipStore, client: GambaAPIClient, query_hash: Optional[str] = None) -> int:
+    """
+    Page myTips from the API straight into the tip store, newest first.
+    
+    Paging stops at the first page reaching tips already stored, and all
+    pages go in one transaction: a fetch that fails part way leaves the
+    store as it was, so its watermark never skips the pages that were lost.
+    Returns the number of new tips written.
+    """
+    try:
+        return store.add_pages(client.iter_tip_pages(store.watermark(), query_hash), incremental=True)
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}; tip store left unchanged")
+        return 0
+
 def main():
-    input_file = 'tips.json'
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    input_files = args or ['tips.json']
     output_file = 'tips_consolidated.json'
     stats_file = 'tips_analysis.json'
-    
-    print("Extracting JSON objects from tips.json...")
-    json_objects = extract_json_objects(input_file)
-    print(f"Found {len(json_objects)} JSON objects")
-    
-    print("Consolidating tip data...")
-    consolidated_data = consolidate_tip_data(json_objects)
+    store = TipStore('tips.db')
+    
+    # Only tips newer than the stored history, unless --full asks for a backfill
+    incremental = '--full' not in sys.argv[1:]
+    if '--fetch' in sys.argv[1:]:
+        # Token and myTips query hash come from a logged-in browser session
+        client = GambaAPIClient(auth_token=os.environ.get('GAMBA_AUTH_TOKEN'))
+        print("Fetching new tip pages from the API...")
+        stored = fetch_tip_pages(store, client, os.environ.get('GAMBA_TIPS_QUERY_HASH'))
+        print(f"Stored {stored} new tips")
+        input_files = args
+    for input_file in input_files:
+        print(f"Storing tip pages from {input_file}...")
+        stored = store_tip_pages(store, input_file, mmap_input='--mmap' in sys.argv[1:],
+                                 incremental=incremental)
+        print(f"Stored {stored} {'new ' if incremental else ''}tips")
     
     print("Analyzing tip data...")
-    stats = analyze_tips(consolidated_data)
+    stats = store.analyze()
     
-    # Save consolidated data
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(consolidated_data, f, indent=2, ensure_ascii=False)
+    # Export consolidated data for the tips viewer
+    store.export_consolidated(output_file)
+    store.close()
     
     # Save analysis
     with open(stats_file, 'w', encoding='utf-8') as f:
         json.dump(stats, f, indent=2, ensure_ascii=False)
     
     print(f"\n=== CONSOLIDATION COMPLETE ===")
+    print(f"Tip store: tips.db")
     print(f"Consolidated data saved to: {output_file}")
     print(f"Analysis saved to: {stats_file}")
     print(f"\n=== QUICK STATS ===")
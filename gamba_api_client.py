@@ -5,18 +5,82 @@ Handles GraphQL queries and authentication for live data retrieval.
 """
 
 import requests
+import aiohttp
+import asyncio
 import json
+import queue
+import random
+import threading
 import time
-from typing import Dict, Any, List, Optional
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import quote
 import hashlib
+from rate_limiter import TokenBucket, parse_retry_after
+from response_cache import ResponseCache
+from tip_store import tip_id, newer_tips
+
+RACE_QUERY_HASH = "c682a2e9795a0f35f291d417f01543135f4be142180598bcb6159c26ba2177ef"
+# The myTips hash is not published: copy it from the extensions of a myTips request in the browser
+TIPS_QUERY_HASH: Optional[str] = None
+
+# Shared by every client in the process so threads and coroutines draw from one budget
+GAMBA_RATE_LIMITER = TokenBucket(rate=2.0, capacity=5)
+
+DELAY_DEPRECATED = "delay is deprecated: requests are paced by the client's rate limiter"
+
+def race_is_finished(race_info: Dict[str, Any]) -> bool:
+    """Whether a race's end_date is in the past, i.e. its data can no longer change."""
+    end_date = race_info.get('end_date')
+    if not end_date:
+        return False
+    try:
+        ended_at = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    if ended_at.tzinfo is None:
+        ended_at = ended_at.replace(tzinfo=timezone.utc)
+    return ended_at < datetime.now(timezone.utc)
+
+class RetryPolicy:
+    """Retry settings for API requests: attempts, backoff with jitter and timeouts."""
+    
+    RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+    
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 timeout: float = 30.0, retryable_statuses: Optional[frozenset] = None):
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.retryable_statuses = retryable_statuses or self.RETRYABLE_STATUSES
+    
+    def is_retryable_status(self, status: int) -> bool:
+        """Whether an HTTP status is worth another attempt."""
+        return status in self.retryable_statuses
+    
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt: full-jitter exponential backoff, at least Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
 
 class GambaAPIClient:
     """Client for interacting with Gamba's GraphQL API."""
     
-    def __init__(self, auth_token: str = None):
-        self.base_url = "https://gamba.com/_api/@"
+    def __init__(self, auth_token: str = None, base_url: str = "https://gamba.com/_api/@",
+                 rate_limiter: Optional[TokenBucket] = None, retry_policy: Optional[RetryPolicy] = None,
+                 cache: Optional[ResponseCache] = None):
+        self.base_url = base_url
         self.auth_token = auth_token
+        self.rate_limiter = rate_limiter or GAMBA_RATE_LIMITER
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache  # Finished races are served from here without touching the network
+        self.last_failed_ids: List[int] = []  # Race IDs that exhausted their retries in the last batch
         self.session = requests.Session()
         self.setup_headers()
     
@@ -39,9 +103,37 @@ class GambaAPIClient:
         if self.auth_token:
             self.session.headers['authorization'] = f'Bearer {self.auth_token}'
     
+    def build_query_url(self, operation_name: str, variables: Dict[str, Any], sha256_hash: str) -> str:
+        """Build a persisted-query GET URL for a GraphQL operation."""
+        extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": sha256_hash
+            }
+        }
+        
+        # URL encode the parameters
+        variables_encoded = quote(json.dumps(variables))
+        extensions_encoded = quote(json.dumps(extensions))
+        
+        return f"{self.base_url}?operationName={operation_name}&variables={variables_encoded}&extensions={extensions_encoded}"
+    
+    def load_cached_race(self, variables: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a cached getRaceById response if the cache holds a usable one."""
+        if not self.cache:
+            return None
+        body = self.cache.get(RACE_QUERY_HASH, variables)
+        return json.loads(body) if body is not None else None
+    
+    def store_cached_race(self, variables: Dict[str, Any], body: bytes, data: Dict[str, Any]):
+        """Cache a getRaceById response; finished races are marked immutable."""
+        race_info = (data.get('data') or {}).get('getRaceById')
+        if self.cache and race_info:  # Missing races may still appear, so never cache them
+            self.cache.put(RACE_QUERY_HASH, variables, body, immutable=race_is_finished(race_info))
+    
     def get_race_by_id(self, race_id: int) -> Optional[Dict[str, Any]]:
         """
-        Fetch race data by race ID.
+        Fetch race data by race ID, retrying transient failures.
         
         Args:
             race_id: The ID of the race to fetch
@@ -49,54 +141,102 @@ class GambaAPIClient:
         Returns:
             Race data dictionary or None if failed
         """
-        try:
-            # Prepare GraphQL query parameters
-            variables = {"raceId": race_id}
-            extensions = {
-                "persistedQuery": {
-                    "version": 1,
-                    "sha256Hash": "c682a2e9795a0f35f291d417f01543135f4be142180598bcb6159c26ba2177ef"
-                }
-            }
-            
-            # URL encode the parameters
-            variables_encoded = quote(json.dumps(variables))
-            extensions_encoded = quote(json.dumps(extensions))
-            
-            # Build the URL
-            url = f"{self.base_url}?operationName=getRaceById&variables={variables_encoded}&extensions={extensions_encoded}"
-            
-            # Make the request
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+        variables = {"raceId": race_id}
+        cached = self.load_cached_race(variables)
+        if cached is not None:
+            return cached
+        
+        url = self.build_query_url("getRaceById", variables, RACE_QUERY_HASH)
+        response = self.get_json(url, f"race {race_id}")
+        if response is None:
+            return None
+        body, data = response
+        self.store_cached_race(variables, body, data)
+        return data
+    
+    def get_json(self, url: str, what: str) -> Optional[Tuple[bytes, Any]]:
+        """
+        GET a query URL through the rate limiter, retrying transient failures.
+        
+        Args:
+            url: Persisted-query URL from build_query_url
+            what: What is being fetched, for log messages (e.g. "race 98")
             
-            data = response.json()
-            return data
+        Returns:
+            (raw body, decoded JSON) or None if failed
+        """
+        policy = self.retry_policy
+        error = None
+        
+        for attempt in range(policy.max_attempts):
+            retry_after = None
+            try:
+                # Make the request
+                self.rate_limiter.acquire()
+                response = self.session.get(url, timeout=policy.timeout)
+                self.record_rate_limit(response.status_code, response.headers.get('Retry-After'))
+                
+                if not policy.is_retryable_status(response.status_code):
+                    response.raise_for_status()
+                    return response.content, json.loads(response.content)
+                
+                error = f"HTTP {response.status_code}"
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                
+            except json.JSONDecodeError as e:
+                print(f"❌ Failed to parse JSON response for {what}: {e}")
+                return None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                error = e
+            except requests.exceptions.RequestException as e:
+                print(f"❌ API request failed for {what}: {e}")
+                return None
+            except Exception as e:
+                print(f"❌ Unexpected error fetching {what}: {e}")
+                return None
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ API request failed for race {race_id}: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON response for race {race_id}: {e}")
-            return None
-        except Exception as e:
-            print(f"❌ Unexpected error fetching race {race_id}: {e}")
-            return None
+            if attempt + 1 < policy.max_attempts:
+                delay = policy.backoff(attempt, retry_after)
+                print(f"🔁 Retrying {what} in {delay:.1f}s (attempt {attempt + 2}/{policy.max_attempts}): {error}")
+                time.sleep(delay)
+        
+        print(f"❌ API request failed for {what} after {policy.max_attempts} attempts: {error}")
+        return None
+    
+    def record_rate_limit(self, status: int, retry_after: Optional[str]):
+        """Feed a response status back into the shared rate limiter."""
+        if status == 429:
+            wait = parse_retry_after(retry_after)
+            print(f"🐢 Rate limited by server, backing off{f' for {wait:.1f}s' if wait else ''}")
+            self.rate_limiter.penalize(wait)
+        elif status < 400:
+            self.rate_limiter.reward()
     
-    def get_multiple_races(self, race_ids: List[int], delay: float = 1.0) -> List[Dict[str, Any]]:
+    def get_multiple_races(self, race_ids: List[int], delay: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Fetch multiple races with rate limiting.
+        IDs that still fail after retries are left in `last_failed_ids`.
         
         Args:
             race_ids: List of race IDs to fetch
-            delay: Delay between requests in seconds
+            delay: Deprecated; seconds to sleep between requests on top of the rate limiter
             
         Returns:
             List of race data dictionaries
         """
+        if delay is not None:
+            warnings.warn(DELAY_DEPRECATED, DeprecationWarning, stacklevel=2)
+        return self._fetch_sequentially(race_ids, delay)
+    
+    def _fetch_sequentially(self, race_ids: List[int], delay: Optional[float]) -> List[Dict[str, Any]]:
+        """get_multiple_races without the deprecation warning."""
         races = []
+        self.last_failed_ids = []
         
         for i, race_id in enumerate(race_ids):
+            if delay and i:
+                time.sleep(delay)
             print(f"📡 Fetching race {race_id} ({i+1}/{len(race_ids)})...")
             
             race_data = self.get_race_by_id(race_id)
@@ -104,43 +244,295 @@ class GambaAPIClient:
                 races.append(race_data)
                 print(f"✅ Successfully fetched race {race_id}")
             else:
+                self.last_failed_ids.append(race_id)
                 print(f"❌ Failed to fetch race {race_id}")
+        
+        return races
+    
+    async def _fetch_race_async(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                                race_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch a single race inside the concurrency cap, retrying transient failures."""
+        variables = {"raceId": race_id}
+        cached = self.load_cached_race(variables)
+        if cached is not None:
+            return cached
+        
+        url = self.build_query_url("getRaceById", variables, RACE_QUERY_HASH)
+        policy = self.retry_policy
+        timeout = aiohttp.ClientTimeout(total=policy.timeout)
+        error = None
+        
+        for attempt in range(policy.max_attempts):
+            retry_after = None
+            async with semaphore:
+                try:
+                    await self.rate_limiter.acquire_async()
+                    async with session.get(url, timeout=timeout) as response:
+                        self.record_rate_limit(response.status, response.headers.get('Retry-After'))
+                        
+                        if not policy.is_retryable_status(response.status):
+                            response.raise_for_status()
+                            body = await response.read()
+                            data = json.loads(body)
+                            self.store_cached_race(variables, body, data)
+                            return data
+                        
+                        error = f"HTTP {response.status}"
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        
+                except aiohttp.ClientResponseError as e:
+                    print(f"❌ API request failed for race {race_id}: {e}")
+                    return None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = str(e) or type(e).__name__
+                except json.JSONDecodeError as e:
+                    print(f"❌ Failed to parse JSON response for race {race_id}: {e}")
+                    return None
             
-            # Rate limiting
-            if i < len(race_ids) - 1:
-                time.sleep(delay)
+            # Back off outside the semaphore so other fetches keep the slot busy
+            if attempt + 1 < policy.max_attempts:
+                await asyncio.sleep(policy.backoff(attempt, retry_after))
         
+        print(f"❌ API request failed for race {race_id} after {policy.max_attempts} attempts: {error}")
+        return None
+    
+    async def fetch_races_async(self, race_ids: List[int], concurrency: int = 8) -> List[Optional[Dict[str, Any]]]:
+        """
+        Fetch races concurrently with at most `concurrency` requests in flight.
+        
+        Args:
+            race_ids: List of race IDs to fetch
+            concurrency: Maximum number of simultaneous requests
+            
+        Returns:
+            One entry per race ID in the same order, None where the fetch failed
+        """
+        # aiohttp negotiates its own content encodings
+        headers = {k: v for k, v in self.session.headers.items() if k.lower() != 'accept-encoding'}
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        connector = aiohttp.TCPConnector(limit=max(concurrency, 1))
+        
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            tasks = [self._fetch_race_async(session, semaphore, race_id) for race_id in race_ids]
+            return await asyncio.gather(*tasks)
+    
+    async def stream_races_async(self, race_ids: Iterable[int],
+                                 concurrency: int = 8) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Fetch races concurrently, yielding (race_id, data) in race ID order as they arrive.
+        
+        Requests are started over a sliding window of 2 x `concurrency` IDs,
+        so at most that many races are held however long the range is; data
+        is None where the fetch failed.
+        """
+        headers = {k: v for k, v in self.session.headers.items() if k.lower() != 'accept-encoding'}
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        connector = aiohttp.TCPConnector(limit=max(concurrency, 1))
+        window = deque()
+        
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            try:
+                for race_id in race_ids:
+                    task = asyncio.ensure_future(self._fetch_race_async(session, semaphore, race_id))
+                    window.append((race_id, task))
+                    if len(window) >= 2 * max(concurrency, 1):
+                        race_id, task = window.popleft()
+                        yield race_id, await task
+                while window:
+                    race_id, task = window.popleft()
+                    yield race_id, await task
+            finally:
+                for _, task in window:
+                    task.cancel()
+                await asyncio.gather(*(task for _, task in window), return_exceptions=True)
+    
+    def iter_races(self, race_ids: Iterable[int], concurrency: int = 8,
+                   buffer: int = 64) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Synchronous stream_races_async: (race_id, data) in race ID order.
+        
+        Fetching runs on a background event loop and hands races over through
+        a queue of `buffer` entries; when the consumer falls behind, fetching
+        pauses instead of piling up races in memory.
+        """
+        results = queue.Queue(maxsize=max(buffer, 1))
+        stop = threading.Event()
+        end = object()
+        errors = []
+        
+        async def produce():
+            loop = asyncio.get_running_loop()
+            stream = self.stream_races_async(race_ids, concurrency)
+            try:
+                async for item in stream:
+                    # Blocking put, off the event loop so in-flight requests keep going
+                    await loop.run_in_executor(None, results.put, item)
+                    if stop.is_set():
+                        break
+            finally:
+                await stream.aclose()
+        
+        def run():
+            try:
+                asyncio.run(produce())
+            except BaseException as e:
+                errors.append(e)
+            results.put(end)
+        
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is end:
+                    break
+                yield item
+            if errors:
+                raise errors[0]
+        finally:
+            # Unblock the producer if the consumer stopped early
+            stop.set()
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+    
+    def get_multiple_races_concurrent(self, race_ids: List[int], concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Fetch multiple races concurrently, preserving race ID order.
+        IDs that still fail after retries are left in `last_failed_ids`.
+        
+        Args:
+            race_ids: List of race IDs to fetch
+            concurrency: Maximum number of simultaneous requests
+            
+        Returns:
+            List of race data dictionaries for the races that were fetched
+        """
+        print(f"📡 Fetching {len(race_ids)} races with {concurrency} concurrent requests...")
+        results = asyncio.run(self.fetch_races_async(race_ids, concurrency))
+        
+        races = [race_data for race_data in results if race_data]
+        self.last_failed_ids = [race_id for race_id, race_data in zip(race_ids, results) if not race_data]
+        print(f"✅ Successfully fetched {len(races)}/{len(race_ids)} races")
         return races
     
-    def get_race_range(self, start_id: int, end_id: int, delay: float = 1.0) -> List[Dict[str, Any]]:
+    def get_race_range(self, start_id: int, end_id: int, delay: Optional[float] = None, *,
+                       concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Fetch a range of race IDs.
         
         Args:
             start_id: Starting race ID
             end_id: Ending race ID (inclusive)
-            delay: Delay between requests in seconds
+            delay: Deprecated; seconds to sleep between sequential requests on top of the rate limiter,
+                ignored when fetching concurrently
+            concurrency: Fetch concurrently with this many requests in flight instead of sequentially
             
         Returns:
             List of race data dictionaries
         """
+        if delay is not None:
+            warnings.warn(DELAY_DEPRECATED, DeprecationWarning, stacklevel=2)
         race_ids = list(range(start_id, end_id + 1))
-        return self.get_multiple_races(race_ids, delay)
+        if concurrency:
+            return self.get_multiple_races_concurrent(race_ids, concurrency)
+        return self._fetch_sequentially(race_ids, delay)
+    
+    def get_tip_page(self, cursor: Optional[Dict[str, Any]], query_hash: str, number: int = 1) -> Dict[str, Any]:
+        """
+        Fetch one myTips page, starting after `cursor` (None for the newest page).
+        
+        Raises RuntimeError when the page cannot be fetched, so a consumer
+        writing pages in one transaction rolls back instead of keeping a gap.
+        """
+        url = self.build_query_url("myTips", {"exclusive_start_key": cursor}, query_hash)
+        response = self.get_json(url, f"tips page {number}")
+        page = response[1] if response else None
+        if not page or not (page.get('data') or {}).get('myTips'):
+            raise RuntimeError(f"Failed to fetch tips page {number}")
+        return page
     
-    def save_races_to_file(self, races: List[Dict[str, Any]], filename: str = 'fetched_races.json'):
+    def iter_tip_pages(self, watermark: Optional[Dict[str, Any]] = None, query_hash: Optional[str] = None,
+                       prefetch: bool = True, max_pages: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         """
-        Save fetched race data to JSON file.
+        Stream myTips pages newest first, following paginate.exclusive_start_key.
+        
+        With prefetch, the next page is requested on a background thread as
+        soon as the current page's cursor is known, so it downloads while the
+        caller parses and stores the current one. Given a watermark (see
+        TipStore.watermark), paging stops at the first page that reaches tips
+        already stored; that page is still yielded for its new tips.
         
         Args:
-            races: List of race data dictionaries
+            watermark: Latest stored issued_at and the IDs issued at it
+            query_hash: Persisted-query hash of myTips (defaults to TIPS_QUERY_HASH)
+            prefetch: Overlap the next request with processing of the current page
+            max_pages: Stop after this many pages
+            
+        Yields:
+            myTips response pages; raises RuntimeError if a page fails after retries
+        """
+        query_hash = query_hash or TIPS_QUERY_HASH
+        if not query_hash:
+            raise ValueError("No myTips persisted-query hash: pass query_hash or set TIPS_QUERY_HASH")
+        
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        
+        def request(cursor, number):
+            if executor:
+                return executor.submit(self.get_tip_page, cursor, query_hash, number).result
+            return lambda: self.get_tip_page(cursor, query_hash, number)
+        
+        number = 1
+        pending = request(None, number)
+        try:
+            while pending:
+                page = pending()
+                tips_data = page['data']['myTips']
+                tips = tips_data.get('results') or []
+                cursor = (tips_data.get('paginate') or {}).get('exclusive_start_key')
+                reached_store = watermark is not None and \
+                    len(newer_tips(tips, watermark)) < sum(1 for tip in tips if tip_id(tip))
+                
+                pending = None
+                if cursor and not reached_store and (max_pages is None or number < max_pages):
+                    number += 1
+                    pending = request(cursor, number)
+                yield page
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+    
+    def save_races_to_file(self, races: Iterable[Dict[str, Any]], filename: str = 'fetched_races.json') -> int:
+        """
+        Save race data to a JSON file, writing one race at a time.
+        
+        Races are written compactly, one per line inside a JSON array, so a
+        generator of races is saved without being collected in memory; the
+        file loads with json.load as well as iter_json_objects.
+        
+        Args:
+            races: Race data dictionaries (any iterable)
             filename: Output filename
+            
+        Returns:
+            Number of races saved
         """
+        count = 0
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(races, f, indent=2, ensure_ascii=False)
-            print(f"💾 Saved {len(races)} races to {filename}")
+                f.write('[')
+                for race in races:
+                    f.write(',\n' if count else '\n')
+                    json.dump(race, f, ensure_ascii=False, separators=(',', ':'))
+                    count += 1
+                f.write('\n]\n')
+            print(f"💾 Saved {count} races to {filename}")
         except Exception as e:
             print(f"❌ Failed to save races to {filename}: {e}")
+        return count
     
     def get_player_standings(self, race_id: int) -> Optional[List[Dict[str, Any]]]:
         """
@@ -211,7 +603,7 @@ def create_sample_payloads() -> Dict[str, Any]:
             "extensions": {
                 "persistedQuery": {
                     "version": 1,
-                    "sha256Hash": "c682a2e9795a0f35f291d417f01543135f4be142180598bcb6159c26ba2177ef"
+                    "sha256Hash": RACE_QUERY_HASH
                 }
             },
             "headers": {
@@ -243,8 +635,20 @@ def create_sample_payloads() -> Dict[str, Any]:
         "batch_fetch": {
             "description": "Fetch multiple races sequentially",
             "race_ids": [34, 98, 99, 100],
-            "rate_limit": "1 request per second recommended",
-            "total_time_estimate": "4 seconds for 4 races"
+            "rate_limit": "Token bucket shared by all clients (2 req/s, burst of 5), backs off on 429 / Retry-After",
+            "total_time_estimate": "Under 1 second for 4 races (within burst)"
+        },
+        "concurrent_fetch": {
+            "description": "Fetch multiple races concurrently with a bounded worker pool",
+            "race_ids": [34, 98, 99, 100],
+            "concurrency": 8,
+            "result_order": "Same order as race_ids"
+        },
+        "tip_pages": {
+            "description": "Page through myTips newest first, passing back paginate.exclusive_start_key",
+            "variables": {"exclusive_start_key": None},
+            "prefetch": "Next page requested while the current one is stored",
+            "stop": "At the first page reaching tips already in the tip store"
         },
         "monitoring": {
             "description": "Monitor live race for updates",
@@ -277,9 +681,12 @@ def main():
         print("✅ Successfully fetched race data")
     
     # Fetch multiple races
-    races = client.get_multiple_races([34, 98], delay=1.0)
+    races = client.get_multiple_races([34, 98])
     client.save_races_to_file(races, 'new_races.json')
     
+    # Fetch a range concurrently
+    races = client.get_race_range(90, 100, concurrency=8)
+    
     # Get player standings
     standings = client.get_player_standings(98)
     if standings:
@@ -290,6 +697,7 @@ def main():
     print("1. Add your Gamba auth token")
     print("2. Call client.get_race_by_id(race_id)")
     print("3. Use client.get_multiple_races() for batch fetching")
+    print("   (or client.get_multiple_races_concurrent() for parallel fetching)")
     print("4. Monitor live races with client.monitor_race_updates()")
 
 if __name__ == "__main__":
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Gamba GraphQL endpoint for offline testing and benchmarks.
+Serves persisted-query GET requests with synthetic or file-backed race data,
+and replays captured myTips pages as one cursor-linked sequence. A second
+stub serves CoinGecko simple/price quotes for the price calculator.
+"""
+
+import http.server
+import json
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, parse_qs
+from json_stream import iter_json_objects
+
+VIP_LEVELS = ['BRONZE 1', 'SILVER 2', 'GOLD 1', 'PLATINUM 2', 'DIAMOND 1']
+
+def synthetic_race(race_id: int, competitor_count: int = 10, live: bool = False) -> Dict[str, Any]:
+    """Build a deterministic synthetic race in getRaceById response format."""
+    rng = random.Random(race_id)
+    prize_pool = rng.choice([100, 200, 500, 1000])
+    payouts = [0.5, 0.25, 0.15, 0.1]
+    competitors = []
+    player_ids = rng.sample(range(1000, 1000 + competitor_count * 50), competitor_count)
+    for position, player_number in enumerate(player_ids, 1):
+        player_id = str(player_number)
+        competitors.append({
+            'id': player_id,
+            'competitor_id': player_id,
+            'vip_level_name': rng.choice(VIP_LEVELS),
+            'display_name': f"Player{player_id}",
+            'total_wagered': round(rng.uniform(100, 50000), 2),
+            'winner_amount': prize_pool * payouts[position - 1] if position <= len(payouts) else 0,
+            'position': position,
+            'avatar': f"https://example.com/avatar{player_id}.png"
+        })
+
+    return {
+        'data': {
+            'getRaceById': {
+                'id': str(race_id),
+                'prize_pool': prize_pool,
+                'currency_id': '456',
+                'start_date': '2024-10-07 00:00:00',
+                'end_date': '2099-12-31 23:59:59' if live else '2024-10-13 23:59:59',
+                'sponsor_id': '2209',
+                'race_name': f"${prize_pool} Synthetic Race {race_id}",
+                'style': '5',
+                'sponsored': True,
+                'eligibility': [],
+                'competitors': competitors,
+                'sponsor': {'id': '2209', 'username': 'SupItsJ', 'vip_level_name': 'DIAMOND 1'},
+                'currency': {'id': '456', 'code': 'USDT'}
+            }
+        }
+    }
+
+def page_cursor(index: int) -> Dict[str, Any]:
+    """Opaque exclusive_start_key leading to the replayed tip page at index, in DynamoDB key style."""
+    return {'page': {'N': str(index)}}
+
+def linked_tip_pages(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copies of myTips pages whose exclusive_start_key points at the next page.
+
+    Captured pages mostly lost their cursors (or carry ones that cannot be
+    replayed), so each page is re-linked to its successor; the last page
+    gets None, which ends paging.
+    """
+    linked = []
+    for index, page in enumerate(pages):
+        tips_data = dict(page['data']['myTips'])
+        paginate = dict(tips_data.get('paginate') or {})
+        paginate['exclusive_start_key'] = page_cursor(index + 1) if index + 1 < len(pages) else None
+        tips_data['paginate'] = paginate
+        linked.append({'data': {'myTips': tips_data}})
+    return linked
+
+class _StubHTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Default backlog of 5 drops concurrent connects
+
+class StubGambaServer:
+    """Threaded HTTP server mimicking Gamba's persisted-query GraphQL API."""
+
+    def __init__(self, port: int = 0, latency: float = 0.0, max_race_id: int = 10000,
+                 competitor_count: int = 10, races: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_requests_per_second: Optional[int] = None, failure_rate: float = 0.0,
+                 live_from_id: Optional[int] = None, tip_pages: Optional[List[Dict[str, Any]]] = None):
+        self.latency = latency
+        self.tip_pages = linked_tip_pages(tip_pages or [])  # myTips pages served newest first
+        self.live_from_id = live_from_id  # Races from this ID on are still running
+        self.failure_rate = failure_rate  # Fraction of requests answered with a transient 503
+        self.failed_count = 0
+        self._failure_rng = random.Random(0)
+        self.max_requests_per_second = max_requests_per_second  # Answer 429 beyond this
+        self.throttled_count = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self.max_race_id = max_race_id
+        self.competitor_count = competitor_count
+        self.races = races  # Optional race_id -> response mapping replacing synthetic data
+        self.request_count = 0
+        self.in_flight = 0  # Requests being handled right now
+        self.max_in_flight = 0  # Highest in_flight seen
+        self._lock = threading.Lock()
+        self.httpd = _StubHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to GambaAPIClient."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/_api/@"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    status, body = server.handle_operation(
+                        params.get('operationName', [''])[0],
+                        json.loads(params.get('variables', ['{}'])[0])
+                    )
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        return Handler
+
+    def handle_operation(self, operation: str, variables: Dict[str, Any]):
+        """Return (status, body) for a GraphQL operation."""
+        with self._lock:
+            self.request_count += 1
+            if self.max_requests_per_second:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                if self._window_count > self.max_requests_per_second:
+                    self.throttled_count += 1
+                    return 429, {'errors': [{'message': 'Too many requests'}]}
+            if self.failure_rate and self._failure_rng.random() < self.failure_rate:
+                self.failed_count += 1
+                return 503, {'errors': [{'message': 'Service temporarily unavailable'}]}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if operation == 'getRaceById':
+            race_id = int(variables.get('raceId', 0))
+            if self.races is not None:
+                return 200, self.races.get(str(race_id), {'data': {'getRaceById': None}})
+            if 1 <= race_id <= self.max_race_id:
+                live = self.live_from_id is not None and race_id >= self.live_from_id
+                return 200, synthetic_race(race_id, self.competitor_count, live)
+            return 200, {'data': {'getRaceById': None}}
+
+        if operation == 'myTips':
+            cursor = variables.get('exclusive_start_key')
+            index = int(cursor['page']['N']) if cursor else 0
+            if index < len(self.tip_pages):
+                return 200, self.tip_pages[index]
+            return 200, {'data': {'myTips': {'results': [], 'paginate': {
+                'exclusive_start_key': None, 'page_count': 0, '__typename': 'TransactionPaginate'}}}}
+
+        return 400, {'errors': [{'message': f"Unknown operation {operation}"}]}
+
+    def start(self) -> 'StubGambaServer':
+        """Serve requests on a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def synthetic_quote(coin_id: str) -> Dict[str, Any]:
+    """A deterministic CoinGecko simple/price entry for a coin."""
+    rng = random.Random(coin_id)
+    price = round(rng.uniform(0.05, 50000), 4)
+    return {
+        'usd': price,
+        'usd_market_cap': price * rng.randint(10 ** 6, 10 ** 9),
+        'usd_24h_vol': price * rng.randint(10 ** 5, 10 ** 8),
+        'usd_24h_change': round(rng.uniform(-10, 10), 3),
+        'usd_7d_change': round(rng.uniform(-25, 25), 3)
+    }
+
+class StubCoinGeckoServer:
+    """Threaded HTTP server mimicking CoinGecko's simple/price endpoint."""
+
+    def __init__(self, port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.available = True  # False answers every request with a 503, like an outage
+        self.request_count = 0
+        self.requested_ids: List[List[str]] = []  # Coin IDs of each simple/price request, in arrival order
+        self._lock = threading.Lock()
+        self.httpd = _StubHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        """API base URL to pass to CryptoDataFetcher."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = server.handle_request(url.path, parse_qs(url.query))
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle_request(self, path: str, params: Dict[str, List[str]]):
+        """Return (status, body) for a CoinGecko API path."""
+        coin_ids = [coin_id for coin_id in params.get('ids', [''])[0].split(',') if coin_id]
+        with self._lock:
+            self.request_count += 1
+            self.requested_ids.append(coin_ids)
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.available:
+            return 503, {'status': {'error_message': 'Service unavailable'}}
+        if path.endswith('/simple/price'):
+            return 200, {coin_id: synthetic_quote(coin_id) for coin_id in coin_ids}
+        return 404, {'error': 'Not found'}
+
+    def start(self) -> 'StubCoinGeckoServer':
+        """Serve requests on a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main():
+    """Run the stub server in the foreground."""
+    import sys
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    port = int(args[0]) if args else 8765
+    tip_pages = None
+    tips_file = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--tips=')), None)
+    if tips_file:
+        tip_pages = [page for page in iter_json_objects(tips_file) if 'myTips' in page.get('data', {})]
+        print(f"🧾 Replaying {len(tip_pages)} myTips pages from {tips_file}")
+    server = StubGambaServer(port=port, tip_pages=tip_pages)
+    print(f"🧪 Stub Gamba API running at: {server.base_url}")
+    print("💡 Press Ctrl+C to stop the server")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stub server stopped")
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
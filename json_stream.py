@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for dumps of concatenated GraphQL responses.
+Yields one top-level JSON object at a time from a sliding buffer, or from
+object spans found directly in a memory-mapped file.
+"""
+
+import json
+import mmap
+import os
+import re
+from typing import Any, Iterator, TextIO, Tuple, Union
+
+# Anything between top-level objects: whitespace, commas, array brackets and
+# stray text such as the "-----" separator lines in hand-collected dumps
+_GAP = re.compile(r'[^{\[]*')
+
+# Everything up to and including the next brace outside a string; written as
+# an unrolled loop so the regex engine skips string contents without backtracking
+_NEXT_BRACE = re.compile(rb'[^{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}"]*)*[{}]', re.DOTALL)
+
+# Mapped pages behind the read position are released in steps of this size
+RELEASE_STEP = 1024 * 1024
+
+class MappedJSONDump:
+    """
+    A dump file mapped read-only into memory and decoded one object at a time.
+
+    Top-level object boundaries are found by scanning the mapped bytes for
+    braces outside strings; only each object's span is copied out and
+    decoded. Pages already consumed are handed back to the kernel, so peak
+    memory is bounded by the largest object rather than by the file, even
+    for dumps larger than RAM.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._released = 0
+
+    def spans(self) -> Iterator[Tuple[int, int]]:
+        """(start, end) byte offsets of each top-level object, in file order."""
+        data = self.buffer
+        pos = 0
+        while True:
+            # Like iter_json_objects, anything before the next '{' is skipped,
+            # which also unwraps top-level arrays
+            start = data.find(b'{', pos)
+            if start < 0:
+                return
+            pos = start + 1
+            depth = 1
+            while depth:
+                brace = _NEXT_BRACE.match(data, pos)
+                if brace is None:
+                    raise ValueError(f"Malformed JSON at byte {start}: object is never closed")
+                pos = brace.end()
+                depth += 1 if data[pos - 1] == 0x7B else -1  # '{'
+            yield start, pos
+
+    def _release(self, offset: int):
+        """Drop mapped pages before offset from memory; they are re-read if touched again."""
+        if offset - self._released < RELEASE_STEP or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        end = offset - offset % mmap.PAGESIZE
+        self.buffer.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+        self._released = end
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.buffer is None:
+            return
+        self._released = 0
+        for start, end in self.spans():
+            try:
+                value = json.loads(self.buffer[start:end])
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Malformed JSON in the object at byte {start}: {e.msg} "
+                                 f"(character {e.pos} of the object)") from None
+            self._release(end)
+            yield value
+
+    def close(self):
+        if self.buffer is not None:
+            self.buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_json_objects(source: Union[str, TextIO], chunk_size: int = 1 << 16,
+                      mmap_input: bool = False) -> Iterator[Any]:
+    """
+    Yield top-level JSON objects from a file, one at a time.
+
+    Handles objects that are concatenated, comma-separated, or wrapped in a
+    top-level array (whose elements are yielded), and skips any other text
+    between them. Objects are decoded with json.JSONDecoder.raw_decode, so
+    braces inside strings are handled correctly, and memory is bounded by
+    the largest single object plus one chunk rather than by the file size.
+
+    Args:
+        source: Path of the dump, or an open text file
+        chunk_size: Characters read per refill of the buffer
+        mmap_input: Map a dump given by path into memory instead of reading it
+            (see MappedJSONDump); suited to dumps larger than RAM
+
+    Raises:
+        ValueError: If the dump holds malformed JSON (reported with its offset)
+    """
+    if isinstance(source, str) and mmap_input:
+        with MappedJSONDump(source) as dump:
+            yield from dump
+        return
+
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from iter_json_objects(f, chunk_size)
+        return
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    consumed = 0  # Characters dropped from the front of the buffer
+    eof = False
+    read_size = chunk_size
+
+    while True:
+        pos = _GAP.match(buffer, pos).end()
+
+        # Array wrappers are skipped so their elements come out as top-level objects
+        while pos < len(buffer) and buffer[pos] == '[':
+            pos = _GAP.match(buffer, pos + 1).end()
+
+        if pos == len(buffer):
+            if eof:
+                return
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Usually the object is just cut off at the end of the buffer
+                if eof:
+                    raise ValueError(f"Malformed JSON at character {consumed + e.pos}: {e.msg}") from None
+            else:
+                yield value
+                pos = end
+                read_size = chunk_size
+                continue
+
+        # Need more input: drop what has been decoded and read another chunk.
+        # Reads grow while a single object keeps failing, so re-decoding it stays linear.
+        if pos:
+            consumed += pos
+            buffer = buffer[pos:]
+            pos = 0
+        chunk = source.read(read_size)
+        if chunk:
+            buffer += chunk
+            if len(buffer) > read_size:
+                read_size = len(buffer)
+        else:
+            eof = True
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Online statistics with O(1) memory per group.
+Running sums, means, variances and quantiles that are fed one value at a
+time instead of being computed from full lists at the end.
+"""
+
+import math
+import statistics
+from fractions import Fraction
+from typing import Dict, Any, List
+
+def _exact_total(partials: Dict[int, int]) -> Fraction:
+    """Sum numerator partials keyed by denominator over their common denominator."""
+    denominator = math.lcm(*partials) if partials else 1
+    return Fraction(sum(n * (denominator // d) for d, n in partials.items()), denominator)
+
+def _expansion(values: List[float]) -> List[float]:
+    """
+    Floats whose exact sum equals the exact sum of values.
+
+    Each part is the correctly rounded remainder left by the previous ones
+    (math.fsum is exact up to one final rounding), so a handful of parts
+    carry the sum of any number of values without error.
+    """
+    parts = []
+    while True:
+        part = math.fsum(values)
+        if not part:
+            return parts
+        parts.append(part)
+        values.append(-part)
+
+def _int_parts(n: int) -> List[float]:
+    """Floats that add up exactly to the int n."""
+    parts = []
+    while n:
+        part = float(n)
+        parts.append(part)
+        n -= int(part)
+    return parts
+
+class ExactSum:
+    """
+    Running sum whose total does not depend on the order values were added.
+
+    Added values are buffered and folded into a short exact expansion (see
+    _expansion), so memory stays bounded and sums of shards merge to exactly
+    the sum of all values. The total is rounded once, and stays an int when
+    every value was an int, like sum() of ints.
+    """
+
+    __slots__ = ('parts', 'int_total', 'is_float', 'pending')
+
+    FOLD_AT = 256  # Buffered values before they are folded into the expansion
+
+    def __init__(self):
+        self.parts: List[float] = []
+        self.int_total = 0
+        self.is_float = False
+        self.pending: List[Any] = []
+
+    def add(self, value):
+        pending = self.pending
+        pending.append(value)
+        if len(pending) >= self.FOLD_AT:
+            self._fold()
+
+    def _fold(self):
+        pending = self.pending
+        if not pending:
+            return
+        ints = [value for value in pending if type(value) is int]
+        self.int_total += sum(ints)
+        if len(ints) != len(pending):
+            self.is_float = True
+            self.parts = _expansion(self.parts + [value for value in pending if type(value) is not int])
+        self.pending = []
+
+    def merge(self, other: 'ExactSum'):
+        other._fold()
+        self.int_total += other.int_total
+        self.is_float = self.is_float or other.is_float
+        self.pending.extend(other.parts)
+        if len(self.pending) >= self.FOLD_AT:
+            self._fold()
+
+    def total(self):
+        self._fold()
+        if not self.is_float:
+            return self.int_total
+        return math.fsum(self.parts + _int_parts(self.int_total))
+
+    def get_state(self) -> Dict[str, Any]:
+        self._fold()
+        return {'parts': self.parts, 'int_total': self.int_total, 'is_float': self.is_float}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'ExactSum':
+        exact = cls()
+        exact.parts = list(state['parts'])
+        exact.int_total = state['int_total']
+        exact.is_float = state['is_float']
+        return exact
+
+class ExactMean:
+    """
+    Running mean that rounds exactly like statistics.mean.
+
+    Values are summed as exact integer ratios grouped by denominator, and the
+    result keeps int type when every value was an int and the mean is whole.
+    """
+
+    __slots__ = ('partials', 'count', 'is_float')
+
+    def __init__(self):
+        self.partials: Dict[int, int] = {}
+        self.count = 0
+        self.is_float = False
+
+    def add(self, value):
+        if type(value) is int:
+            numerator, denominator = value, 1
+        else:
+            if isinstance(value, float):
+                self.is_float = True
+            numerator, denominator = value.as_integer_ratio()
+        self.partials[denominator] = self.partials.get(denominator, 0) + numerator
+        self.count += 1
+
+    def merge(self, other: 'ExactMean'):
+        for denominator, numerator in other.partials.items():
+            self.partials[denominator] = self.partials.get(denominator, 0) + numerator
+        self.count += other.count
+        self.is_float = self.is_float or other.is_float
+
+    def get_state(self) -> Dict[str, Any]:
+        return {'partials': list(self.partials.items()), 'count': self.count, 'is_float': self.is_float}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'ExactMean':
+        exact = cls()
+        exact.partials = {d: n for d, n in state['partials']}
+        exact.count = state['count']
+        exact.is_float = state['is_float']
+        return exact
+
+    def mean(self):
+        if not self.count:
+            raise statistics.StatisticsError('mean requires at least one data point')
+        value = _exact_total(self.partials) / self.count
+        if not self.is_float and value.denominator == 1:
+            return int(value)
+        return float(value)
+
+class RunningStats:
+    """
+    Count, sum, min, max, mean and variance of a stream (Welford's algorithm).
+
+    Merging uses the pairwise update of Chan et al., so partial statistics of
+    shards combine into the statistics of all values up to float rounding.
+    """
+
+    __slots__ = ('count', 'total', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0  # Left-to-right sum, as sum() of the values
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'RunningStats'):
+        if not other.count:
+            return
+        if not self.count:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self) -> float:
+        """Sample variance, like statistics.variance."""
+        if self.count < 2:
+            raise statistics.StatisticsError('variance requires at least two data points')
+        return self.m2 / (self.count - 1)
+
+    def stdev(self) -> float:
+        """Sample standard deviation, like statistics.stdev."""
+        return math.sqrt(self.variance())
+
+    def get_state(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'RunningStats':
+        stats = cls()
+        for name in cls.__slots__:
+            setattr(stats, name, state[name])
+        return stats
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with five markers (the P² algorithm of Jain and Chlamtac).
+
+    The first exact_limit values are kept, so short streams get the exact
+    quantile; past that the markers are seeded from them and track the
+    quantile with a piecewise-parabolic fit in constant memory. Unlike
+    RunningStats it cannot be merged, so feed it a single stream.
+    """
+
+    __slots__ = ('p', 'exact_limit', 'buffer', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p: float = 0.5, exact_limit: int = 1024):
+        self.p = p
+        self.exact_limit = max(exact_limit, 5)
+        self.buffer: List[Any] = []  # None once the markers have taken over
+        self.heights: List[float] = []
+        self.positions: List[int] = []
+        self.desired: List[float] = []
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        if self.buffer is not None:
+            self.buffer.append(value)
+            if len(self.buffer) > self.exact_limit:
+                self._seed_markers()
+            return
+
+        # Cell of the new value; extreme markers follow new minimums and maximums
+        heights = self.heights
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        positions = self.positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _seed_markers(self):
+        """Place the markers at their quantiles of the buffered values and drop the buffer."""
+        data = sorted(self.buffer)
+        last = len(data) - 1
+        self.positions = [1 + round(last * increment) for increment in self.increments]
+        self.heights = [data[position - 1] for position in self.positions]
+        self.desired = [1 + last * increment for increment in self.increments]
+        self.buffer = None
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self):
+        """The current quantile: exact up to exact_limit values, estimated after that."""
+        buffer = self.buffer
+        if buffer is None:
+            return self.heights[2]
+        if not buffer:
+            raise statistics.StatisticsError('no quantile for empty data')
+        if self.p == 0.5:
+            return statistics.median(buffer)
+        data = sorted(buffer)
+        return data[min(int(self.p * len(data)), len(data) - 1)]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Interned player identities shared by the race analyzer and race database.
+Maps each competitor ID to a small integer key and the player's latest
+display name, so renamed players stay one player and per-competitor work
+hashes ints instead of name strings.
+"""
+
+import sqlite3
+from typing import Dict, Any, List, Optional
+
+class PlayerIndex:
+    """
+    competitor_id <-> integer key <-> latest display_name.
+
+    Keys are dense and assigned in order of first appearance; once persisted
+    they never change, so state keyed by them stays valid across runs.
+    Competitors without an ID fall back to being identified by display name.
+    """
+
+    def __init__(self):
+        self.keys: Dict[str, int] = {}  # Identity -> key
+        self.identities: List[str] = []  # Key -> identity
+        self.names: List[str] = []  # Key -> latest display name
+        self.dirty: Dict[int, None] = {}  # Keys added or renamed since the last save
+
+    def key_of(self, player_id: Optional[str], name: str) -> int:
+        """Integer key of a player, interning it and tracking renames."""
+        identity = 'name:' + name if player_id is None else str(player_id)
+        key = self.keys.get(identity)
+        if key is None:
+            key = self.keys[identity] = len(self.names)
+            self.identities.append(identity)
+            self.names.append(name)
+            self.dirty[key] = None
+        elif self.names[key] != name:
+            self.names[key] = name
+            self.dirty[key] = None
+        return key
+
+    def key_for(self, comp: Dict[str, Any]) -> int:
+        """Integer key of a competitor dict, by the same ID RaceDatabase stores the player under."""
+        return self.key_of(comp.get('competitor_id') or comp.get('id'), comp.get('display_name', 'Unknown'))
+
+    def name_of(self, key: int) -> str:
+        return self.names[key]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def create_table(conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS player_index (
+                player_key INTEGER PRIMARY KEY,
+                player_id TEXT UNIQUE NOT NULL,
+                display_name TEXT
+            )
+        ''')
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> 'PlayerIndex':
+        """The index persisted in a database's player_index table."""
+        index = cls()
+        for key, identity, name in conn.execute(
+                'SELECT player_key, player_id, display_name FROM player_index ORDER BY player_key'):
+            if key != len(index.names):
+                raise ValueError(f"player_index keys are not dense at key {key}")
+            index.keys[identity] = key
+            index.identities.append(identity)
+            index.names.append(name)
+        return index
+
+    def save(self, conn: sqlite3.Connection):
+        """Write keys added or renamed since the last save; the caller commits."""
+        conn.executemany('''
+            INSERT INTO player_index (player_key, player_id, display_name) VALUES (?, ?, ?)
+            ON CONFLICT(player_key) DO UPDATE SET display_name = excluded.display_name
+        ''', [(key, self.identities[key], self.names[key]) for key in self.dirty])
+        self.dirty.clear()
@@ -4,19 +4,34 @@ Advanced cryptocurrency portfolio analyzer with comprehensive market data integr
 Features: Real-time prices, historical data, tax calculations, risk analysis, and more.
 """
 
+import asyncio
 import json
+import os
+import sys
+import threading
 import requests
-import sqlite3
-from typing import Dict, Any, List, Tuple
+from concurrent.futures import Future
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 import statistics
 import hashlib
 import time
+from online_stats import RunningStats, P2Quantile
+from sqlite_profile import connect
+from tip_store import TipStore
 
 class CryptoDataFetcher:
     """Advanced cryptocurrency data fetcher with multiple API sources and caching."""
 
-    def __init__(self):
+    def __init__(self, cache_db: str = 'crypto_cache.db', price_ttl: float = 300.0,
+                 api_url: str = "https://api.coingecko.com/api/v3", timeout: float = 15.0):
+        """
+        Args:
+            cache_db: SQLite file holding the price cache
+            price_ttl: Seconds a cached current price is served before CoinGecko is asked again
+            api_url: CoinGecko API base URL
+            timeout: Seconds before a CoinGecko request is given up
+        """
         self.currency_mapping = {
             'BTC': 'bitcoin',
             'ETH': 'ethereum',
@@ -30,11 +45,19 @@ class CryptoDataFetcher:
             'LTC': 'litecoin',
             'TRX': 'tron'
         }
+        self.cache_db = cache_db
+        self.price_ttl = price_ttl
+        self.api_url = api_url
+        self.timeout = timeout
+        self.http_requests = 0  # CoinGecko price requests actually sent
+        self._lock = threading.Lock()  # Guards the cache connection
+        self._in_flight: Dict[frozenset, Future] = {}  # Currencies being fetched -> their pending result
+        self._in_flight_lock = threading.Lock()
         self.setup_cache_db()
 
     def setup_cache_db(self):
         """Setup SQLite database for caching price data."""
-        self.conn = sqlite3.connect('crypto_cache.db')
+        self.conn = connect(self.cache_db, check_same_thread=False)
         self.conn.execute('''
             CREATE TABLE IF NOT EXISTS price_cache (
                 currency TEXT,
@@ -57,46 +80,143 @@ class CryptoDataFetcher:
         ''')
         self.conn.commit()
 
-    def fetch_current_prices(self) -> Dict[str, Dict[str, float]]:
-        """Fetch comprehensive current market data."""
-        try:
-            coin_ids = ','.join(self.currency_mapping.values())
-            url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_ids}&vs_currencies=usd&include_market_cap=true&include_24hr_vol=true&include_24hr_change=true&include_7d_change=true"
-
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            price_data = response.json()
-
-            enhanced_prices = {}
-            current_timestamp = int(time.time())
-
-            for currency_code, coin_id in self.currency_mapping.items():
-                if coin_id in price_data:
-                    data = price_data[coin_id]
-                    enhanced_prices[currency_code] = {
-                        'price': data.get('usd', 0),
-                        'market_cap': data.get('usd_market_cap', 0),
-                        'volume_24h': data.get('usd_24h_vol', 0),
-                        'price_change_24h': data.get('usd_24h_change', 0),
-                        'price_change_7d': data.get('usd_7d_change', 0),
-                        'last_updated': current_timestamp
+    def cached_prices(self, currencies: Iterable[str], max_age: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Latest price_cache row of each currency, read through the (currency, timestamp) key.
+
+        Rows older than max_age seconds are ignored; with max_age None the
+        latest row is returned however old it is.
+        """
+        now = time.time()
+        prices = {}
+        with self._lock:
+            for currency in currencies:
+                row = self.conn.execute('''
+                    SELECT timestamp, price, market_cap, volume_24h, price_change_24h, price_change_7d
+                    FROM price_cache WHERE currency = ? ORDER BY timestamp DESC LIMIT 1
+                ''', (currency,)).fetchone()
+                if row and (max_age is None or now - row[0] < max_age):
+                    prices[currency] = {
+                        'price': row[1],
+                        'market_cap': row[2],
+                        'volume_24h': row[3],
+                        'price_change_24h': row[4],
+                        'price_change_7d': row[5],
+                        'last_updated': row[0]
                     }
+        return prices
+
+    def fetch_current_prices(self, currencies: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Fetch comprehensive current market data through the price cache.
+
+        Currencies with a cached price younger than price_ttl are served from
+        price_cache; the rest are fetched in one CoinGecko request, shared
+        with any concurrent call already fetching them. If CoinGecko cannot
+        be reached, the most recent cached prices are used, and the built-in
+        fallback table only for currencies never fetched.
+        """
+        wanted = [code for code in (currencies or self.currency_mapping) if code in self.currency_mapping]
+        prices = self.cached_prices(wanted, self.price_ttl)
+        missing = [code for code in wanted if code not in prices]
+
+        if missing:
+            try:
+                prices.update(self._fetch_coalesced(missing))
+            except Exception as e:
+                print(f"Error fetching current prices: {e}")
+                stale = self.cached_prices(missing)
+                if stale:
+                    print(f"⚠️ Using cached prices for {len(stale)} currencies")
+                fallback = self.get_fallback_prices()
+                for code in missing:
+                    prices[code] = stale.get(code) or fallback[code]
+
+        return {code: prices[code] for code in wanted if code in prices}
+
+    async def fetch_current_prices_async(self, currencies: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+        """fetch_current_prices for coroutines; coalesces with threads and other coroutines alike."""
+        return await asyncio.to_thread(self.fetch_current_prices, currencies)
+
+    def _fetch_coalesced(self, currencies: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Fetch prices, sharing requests with concurrent callers.
+
+        Currencies another caller is already fetching are taken from that
+        request; only the rest are fetched here, after a second look at the
+        cache in case a request finished since fetch_current_prices checked.
+        Currencies CoinGecko leaves out of its reply are not cached, so they
+        are asked for again on every call.
+        """
+        remaining = set(currencies)
+        joined: List[Tuple[Future, frozenset]] = []
+        with self._in_flight_lock:
+            for key, future in self._in_flight.items():
+                shared = remaining & key
+                if shared:
+                    joined.append((future, frozenset(shared)))
+                    remaining -= shared
+            if remaining:
+                led = frozenset(remaining)
+                leader = self._in_flight[led] = Future()
+
+        prices = {}
+        if remaining:
+            try:
+                prices = self.cached_prices(led, self.price_ttl)
+                stale = [code for code in currencies if code in led and code not in prices]
+                if stale:
+                    prices.update(self._request_prices(stale))
+                leader.set_result(dict(prices))
+            except Exception as e:
+                leader.set_exception(e)
+                raise
+            finally:
+                with self._in_flight_lock:
+                    del self._in_flight[led]
+
+        for future, shared in joined:
+            result = future.result()  # Re-raises the other caller's error
+            prices.update({code: result[code] for code in shared if code in result})
+        return {code: prices[code] for code in currencies if code in prices}
+
+    def _request_prices(self, currencies: List[str]) -> Dict[str, Dict[str, float]]:
+        """One CoinGecko simple/price request for the given currencies; results are written to price_cache."""
+        coin_ids = ','.join(self.currency_mapping[code] for code in currencies)
+        url = f"{self.api_url}/simple/price?ids={coin_ids}&vs_currencies=usd&include_market_cap=true&include_24hr_vol=true&include_24hr_change=true&include_7d_change=true"
+
+        with self._lock:
+            self.http_requests += 1
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        price_data = response.json()
+
+        enhanced_prices = {}
+        current_timestamp = int(time.time())
+
+        for currency_code in currencies:
+            coin_id = self.currency_mapping[currency_code]
+            if coin_id in price_data:
+                data = price_data[coin_id]
+                enhanced_prices[currency_code] = {
+                    'price': data.get('usd', 0),
+                    'market_cap': data.get('usd_market_cap', 0),
+                    'volume_24h': data.get('usd_24h_vol', 0),
+                    'price_change_24h': data.get('usd_24h_change', 0),
+                    'price_change_7d': data.get('usd_7d_change', 0),
+                    'last_updated': current_timestamp
+                }
 
-                    # Cache the data
-                    self.conn.execute('''
-                        INSERT OR REPLACE INTO price_cache
-                        (currency, timestamp, price, market_cap, volume_24h, price_change_24h, price_change_7d)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (currency_code, current_timestamp, enhanced_prices[currency_code]['price'],
-                          enhanced_prices[currency_code]['market_cap'], enhanced_prices[currency_code]['volume_24h'],
-                          enhanced_prices[currency_code]['price_change_24h'], enhanced_prices[currency_code]['price_change_7d']))
-
+        # Cache the data
+        with self._lock:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO price_cache
+                (currency, timestamp, price, market_cap, volume_24h, price_change_24h, price_change_7d)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [(code, current_timestamp, data['price'], data['market_cap'], data['volume_24h'],
+                   data['price_change_24h'], data['price_change_7d']) for code, data in enhanced_prices.items()])
             self.conn.commit()
-            return enhanced_prices
-
-        except Exception as e:
-            print(f"Error fetching current prices: {e}")
-            return self.get_fallback_prices()
+        return enhanced_prices
 
     def get_fallback_prices(self) -> Dict[str, Dict[str, float]]:
         """Return fallback prices with estimated market data."""
@@ -130,8 +250,8 @@ class CryptoDataFetcher:
             if not coin_id:
                 return []
 
-            url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days={days}&interval=daily"
-            response = requests.get(url, timeout=15)
+            url = f"{self.api_url}/coins/{coin_id}/market_chart?vs_currency=usd&days={days}&interval=daily"
+            response = requests.get(url, timeout=self.timeout)
             response.raise_for_status()
 
             data = response.json()
@@ -142,13 +262,13 @@ class CryptoDataFetcher:
                 date = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
                 historical_data.append((date, price))
 
-                # Cache historical data
-                self.conn.execute('''
+            # Cache historical data
+            with self._lock:
+                self.conn.executemany('''
                     INSERT OR REPLACE INTO historical_prices (currency, date, price)
                     VALUES (?, ?, ?)
-                ''', (currency, date, price))
-
-            self.conn.commit()
+                ''', [(currency, date, price) for date, price in historical_data])
+                self.conn.commit()
             return historical_data
 
         except Exception as e:
@@ -417,14 +537,17 @@ class AdvancedPortfolioAnalyzer:
 
     def _analyze_transaction_patterns(self) -> Dict[str, Any]:
         """Analyze transaction patterns and behaviors."""
-        transaction_sizes = []
+        # Streaming stats: memory stays constant however many tips there are
+        transaction_sizes = RunningStats()
+        median_size = P2Quantile(0.5)
         hourly_distribution = {}
         daily_distribution = {}
 
         for tip in self.tips:
             amount = abs(tip.get('amount', 0))
             if amount > 0:
-                transaction_sizes.append(amount)
+                transaction_sizes.add(amount)
+                median_size.add(amount)
 
             # Time analysis
             date_str = tip.get('issued_at', '')
@@ -440,10 +563,11 @@ class AdvancedPortfolioAnalyzer:
                     pass
 
         return {
-            'average_transaction_size': statistics.mean(transaction_sizes) if transaction_sizes else 0,
-            'median_transaction_size': statistics.median(transaction_sizes) if transaction_sizes else 0,
-            'largest_transaction': max(transaction_sizes) if transaction_sizes else 0,
-            'smallest_transaction': min(transaction_sizes) if transaction_sizes else 0,
+            'average_transaction_size': transaction_sizes.mean if transaction_sizes.count else 0,
+            # Exact for up to 1024 transactions (P2Quantile exact_limit), a P² estimate beyond
+            'median_transaction_size': median_size.value() if transaction_sizes.count else 0,
+            'largest_transaction': transaction_sizes.max if transaction_sizes.count else 0,
+            'smallest_transaction': transaction_sizes.min if transaction_sizes.count else 0,
             'most_active_hour': max(hourly_distribution.items(), key=lambda x: x[1])[0] if hourly_distribution else None,
             'most_active_day': max(daily_distribution.items(), key=lambda x: x[1])[0] if daily_distribution else None,
             'hourly_distribution': hourly_distribution,
@@ -495,10 +619,15 @@ class AdvancedPortfolioAnalyzer:
 
 def main():
     """Main function to run comprehensive portfolio analysis."""
-    # Load consolidated tips data
+    # Query the tip store if consolidate_tips.py built one, else load the consolidated file
     try:
-        with open('tips_consolidated.json', 'r', encoding='utf-8') as f:
-            tips_data = json.load(f)
+        if os.path.exists('tips.db'):
+            store = TipStore('tips.db')
+            tips_data = store.tips_data()
+            store.close()
+        else:
+            with open('tips_consolidated.json', 'r', encoding='utf-8') as f:
+                tips_data = json.load(f)
     except FileNotFoundError:
         print("Error: tips_consolidated.json not found. Please run consolidate_tips.py first.")
         return
@@ -506,7 +635,9 @@ def main():
     print("🚀 Starting Advanced Portfolio Analysis...")
 
     # Initialize data fetcher and get market data
-    data_fetcher = CryptoDataFetcher()
+    # Prices fetched within the last --price-ttl seconds (default 300) are reused from crypto_cache.db
+    price_ttl = next((float(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--price-ttl=')), 300.0)
+    data_fetcher = CryptoDataFetcher(price_ttl=price_ttl)
     print("📊 Fetching current market data...")
     market_data = data_fetcher.fetch_current_prices()
 
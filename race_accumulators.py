@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""
+Single-pass race analysis engine.
+Each analysis is an accumulator fed by one traversal over races and competitors.
+"""
+
+import os
+import statistics
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Iterable, Tuple, Callable, Optional, Union
+from online_stats import ExactSum, ExactMean, RunningStats
+from player_index import PlayerIndex
+from race_records import RaceRecord, CompetitorRecord, as_race_record
+
+# Competitor fields every accumulator needs, extracted once per competitor:
+# (player key, total_wagered, winner_amount, position, vip_level_name)
+CompetitorEntry = Tuple[int, Any, Any, Any, str]
+
+def competitor_entry(comp: CompetitorRecord, players: PlayerIndex) -> CompetitorEntry:
+    """The analysed fields of a competitor, keyed through the players index."""
+    return (
+        players.key_of(comp.player_id, comp.display_name),
+        comp.total_wagered,
+        comp.winner_amount,
+        comp.position,
+        comp.vip_level_name
+    )
+
+class RaceAccumulator:
+    """Base accumulator: folds in each race record of the traversal with its competitor entries."""
+
+    key = None
+
+    def add_race(self, race: RaceRecord, entries: List[CompetitorEntry]):
+        raise NotImplementedError
+
+    def result(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def merge(self, other: 'RaceAccumulator'):
+        """
+        Fold in an accumulator of the same kind fed with the races that follow.
+
+        Merging shard accumulators in race order gives exactly the result of
+        feeding every race to one accumulator.
+        """
+        raise NotImplementedError
+
+    def get_state(self) -> Dict[str, Any]:
+        """JSON-serializable running state, restored with set_state."""
+        raise NotImplementedError
+
+    def set_state(self, state: Dict[str, Any]):
+        raise NotImplementedError
+
+class RaceSummaryAccumulator(RaceAccumulator):
+    """Overall race counts, totals and averages."""
+
+    key = 'summary'
+
+    def __init__(self):
+        self.total_races = 0
+        self.total_prize_pool = ExactSum()
+        self.total_competitors = 0
+        self.total_wagered = ExactSum()
+        self.currencies: Dict[str, None] = {}  # Ordered set, in order of first appearance
+        self.players = set()
+
+    def add_race(self, race, entries):
+        race_wagered = 0
+        for entry in entries:
+            race_wagered += entry[1]
+            self.players.add(entry[0])
+
+        self.total_races += 1
+        self.total_prize_pool.add(race.prize_pool)
+        self.total_competitors += len(entries)
+        self.total_wagered.add(race_wagered)
+        self.currencies[race.currency_code] = None
+
+    def result(self):
+        total_races = self.total_races
+        total_prize_pool = self.total_prize_pool.total()
+        total_wagered = self.total_wagered.total()
+        return {
+            "total_races": total_races,
+            "total_prize_pool": total_prize_pool,
+            "total_competitors": self.total_competitors,
+            "unique_players": len(self.players),
+            "total_wagered": total_wagered,
+            "avg_prize_per_race": total_prize_pool / max(total_races, 1),
+            "avg_competitors_per_race": self.total_competitors / max(total_races, 1),
+            "avg_wager_per_competitor": total_wagered / max(self.total_competitors, 1),
+            "currencies_used": list(self.currencies),
+            "total_prize_to_wager_ratio": (total_prize_pool / max(total_wagered, 1)) * 100
+        }
+
+    def merge(self, other):
+        self.total_races += other.total_races
+        self.total_prize_pool.merge(other.total_prize_pool)
+        self.total_competitors += other.total_competitors
+        self.total_wagered.merge(other.total_wagered)
+        self.currencies.update(other.currencies)
+        self.players |= other.players
+
+    def get_state(self):
+        return {
+            'total_races': self.total_races,
+            'total_prize_pool': self.total_prize_pool.get_state(),
+            'total_competitors': self.total_competitors,
+            'total_wagered': self.total_wagered.get_state(),
+            'currencies': list(self.currencies),
+            'players': list(self.players)
+        }
+
+    def set_state(self, state):
+        self.total_races = state['total_races']
+        self.total_prize_pool = ExactSum.from_state(state['total_prize_pool'])
+        self.total_competitors = state['total_competitors']
+        self.total_wagered = ExactSum.from_state(state['total_wagered'])
+        self.currencies = dict.fromkeys(state['currencies'])
+        self.players = set(state['players'])
+
+class PlayerPerformanceAccumulator(RaceAccumulator):
+    """Per-player totals, positions and VIP levels across races, keyed by player key."""
+
+    key = 'player_analytics'
+
+    def __init__(self, players: PlayerIndex, top_count: int = 20):
+        self.players = players  # Resolves keys to display names in results
+        self.top_count = top_count
+        self.player_stats = defaultdict(lambda: {
+            'races_participated': 0,
+            'total_wagered': ExactSum(),
+            'total_prizes': ExactSum(),
+            'best_position': float('inf'),
+            'position_mean': ExactMean(),
+            'vip_levels': {}  # Ordered set, in order of first appearance
+        })
+
+    def add_race(self, race, entries):
+        player_stats = self.player_stats
+        for player, wagered, prize, position, vip_level in entries:
+            stats = player_stats[player]
+            stats['races_participated'] += 1
+            stats['total_wagered'].add(wagered)
+            stats['total_prizes'].add(prize)
+            stats['position_mean'].add(position)
+            stats['vip_levels'][vip_level] = None
+            if position < stats['best_position']:
+                stats['best_position'] = position
+
+    @staticmethod
+    def roi_percentage(total_wagered, total_prizes):
+        if total_wagered > 0:
+            return ((total_prizes / total_wagered) - 1) * 100
+        return 0
+
+    def player_result(self, player: int, total_wagered, total_prizes) -> Dict[str, Any]:
+        """A player's stats with derived metrics, in the exported field order."""
+        stats = self.player_stats[player]
+        return {
+            'races_participated': stats['races_participated'],
+            'total_wagered': total_wagered,
+            'total_prizes': total_prizes,
+            'best_position': stats['best_position'],
+            # Only the exported top performers need their average position
+            'avg_position': stats['position_mean'].mean() if stats['races_participated'] else 0,
+            'vip_levels': list(stats['vip_levels']),
+            'roi_percentage': self.roi_percentage(total_wagered, total_prizes)
+        }
+
+    def result(self):
+        player_stats = self.player_stats
+        # (total_wagered, total_prizes) per player, rounded once
+        totals = {
+            player: (stats['total_wagered'].total(), stats['total_prizes'].total())
+            for player, stats in player_stats.items()
+        }
+        top_performers = sorted(totals.items(), key=lambda x: x[1][1], reverse=True)[:self.top_count]
+
+        races_per_player = [s['races_participated'] for s in player_stats.values()]
+        avg_races = statistics.mean(races_per_player) if races_per_player else 0
+
+        name_of = self.players.name_of
+        most_active = name_of(max(player_stats.items(), key=lambda x: x[1]['races_participated'])[0]) \
+            if player_stats else "None"
+        highest_roi = name_of(max(totals.items(), key=lambda x: self.roi_percentage(*x[1]))[0]) \
+            if player_stats else "None"
+
+        return {
+            "top_performers": [
+                {
+                    "player_name": name_of(player),
+                    "stats": self.player_result(player, *player_totals)
+                }
+                for player, player_totals in top_performers
+            ],
+            "total_unique_players": len(player_stats),
+            "avg_races_per_player": avg_races,
+            "most_active_player": most_active,
+            "highest_roi_player": highest_roi
+        }
+
+    def merge(self, other):
+        player_stats = self.player_stats
+        for player, theirs in other.player_stats.items():
+            if player not in player_stats:
+                player_stats[player] = theirs
+                continue
+            stats = player_stats[player]
+            stats['races_participated'] += theirs['races_participated']
+            stats['total_wagered'].merge(theirs['total_wagered'])
+            stats['total_prizes'].merge(theirs['total_prizes'])
+            stats['position_mean'].merge(theirs['position_mean'])
+            stats['vip_levels'].update(theirs['vip_levels'])
+            if theirs['best_position'] < stats['best_position']:
+                stats['best_position'] = theirs['best_position']
+
+    def get_state(self):
+        return {
+            'player_stats': [
+                [player, dict(stats, total_wagered=stats['total_wagered'].get_state(),
+                            total_prizes=stats['total_prizes'].get_state(),
+                            position_mean=stats['position_mean'].get_state(),
+                            vip_levels=list(stats['vip_levels']))]
+                for player, stats in self.player_stats.items()
+            ]
+        }
+
+    def set_state(self, state):
+        self.player_stats.clear()
+        for player, stats in state['player_stats']:
+            stats['total_wagered'] = ExactSum.from_state(stats['total_wagered'])
+            stats['total_prizes'] = ExactSum.from_state(stats['total_prizes'])
+            stats['position_mean'] = ExactMean.from_state(stats['position_mean'])
+            stats['vip_levels'] = dict.fromkeys(stats['vip_levels'])
+            self.player_stats[player] = stats
+
+class PrizeDistributionAccumulator(RaceAccumulator):
+    """Prize pool efficiency per race and prize tallies per finishing position."""
+
+    key = 'prize_analysis'
+
+    def __init__(self):
+        self.prize_data = []
+        self.total_prize_pools = ExactSum()
+        self.total_distributed = ExactSum()
+        self.efficiency = ExactMean()
+        self.position_prizes: Dict[Any, Dict[str, Any]] = {}
+
+    def add_race(self, race, entries):
+        race_prizes = 0
+        position_prizes = self.position_prizes
+        for entry in entries:
+            prize, position = entry[2], entry[3]
+            race_prizes += prize
+
+            tally = position_prizes.get(position)
+            if tally is None:
+                tally = position_prizes[position] = {
+                    'mean': ExactMean(), 'max': prize, 'min': prize, 'count': 0
+                }
+            tally['mean'].add(prize)
+            tally['count'] += 1
+            if prize > tally['max']:
+                tally['max'] = prize
+            if prize < tally['min']:
+                tally['min'] = prize
+
+        prize_pool = race.prize_pool
+        efficiency = (race_prizes / max(prize_pool, 1)) * 100
+        self.prize_data.append({
+            'race_id': race.id,
+            'prize_pool': prize_pool,
+            'distributed_prizes': race_prizes,
+            'efficiency': efficiency
+        })
+        self.total_prize_pools.add(prize_pool)
+        self.total_distributed.add(race_prizes)
+        self.efficiency.add(efficiency)
+
+    def result(self):
+        return {
+            "total_prize_pools": self.total_prize_pools.total(),
+            "total_distributed": self.total_distributed.total(),
+            "avg_distribution_efficiency": self.efficiency.mean(),
+            "prize_by_position": {
+                pos: {
+                    "avg_prize": tally['mean'].mean(),
+                    "max_prize": tally['max'],
+                    "min_prize": tally['min'],
+                    "total_awards": tally['count']
+                }
+                for pos, tally in self.position_prizes.items()
+            },
+            "race_efficiency_details": list(self.prize_data)
+        }
+
+    def merge(self, other):
+        self.prize_data.extend(other.prize_data)
+        self.total_prize_pools.merge(other.total_prize_pools)
+        self.total_distributed.merge(other.total_distributed)
+        self.efficiency.merge(other.efficiency)
+        position_prizes = self.position_prizes
+        for pos, theirs in other.position_prizes.items():
+            tally = position_prizes.get(pos)
+            if tally is None:
+                position_prizes[pos] = theirs
+                continue
+            tally['mean'].merge(theirs['mean'])
+            tally['count'] += theirs['count']
+            if theirs['max'] > tally['max']:
+                tally['max'] = theirs['max']
+            if theirs['min'] < tally['min']:
+                tally['min'] = theirs['min']
+
+    def get_state(self):
+        return {
+            'prize_data': self.prize_data,
+            'total_prize_pools': self.total_prize_pools.get_state(),
+            'total_distributed': self.total_distributed.get_state(),
+            'efficiency': self.efficiency.get_state(),
+            # Pairs rather than an object, so int positions survive JSON
+            'position_prizes': [
+                [pos, dict(tally, mean=tally['mean'].get_state())]
+                for pos, tally in self.position_prizes.items()
+            ]
+        }
+
+    def set_state(self, state):
+        self.prize_data = state['prize_data']
+        self.total_prize_pools = ExactSum.from_state(state['total_prize_pools'])
+        self.total_distributed = ExactSum.from_state(state['total_distributed'])
+        self.efficiency = ExactMean.from_state(state['efficiency'])
+        self.position_prizes = {
+            pos: dict(tally, mean=ExactMean.from_state(tally['mean']))
+            for pos, tally in state['position_prizes']
+        }
+
+class CompetitionMetricsAccumulator(RaceAccumulator):
+    """Competition intensity and stakes per race."""
+
+    key = 'competition_metrics'
+
+    def __init__(self):
+        self.competition_data = []
+        self.competitor_counts = ExactMean()
+        self.most_competitive = None
+        self.highest_stakes = None
+
+    def add_race(self, race, entries):
+        if not entries:
+            return
+
+        # Races are never split across shards, so per-race stats need no exact merge
+        wagers = RunningStats()
+        for entry in entries:
+            wagers.add(entry[1])
+
+        total_wagered = wagers.total
+        details = {
+            'race_id': race.id,
+            'race_name': race.race_name,
+            'competitor_count': wagers.count,
+            'total_wagered': total_wagered,
+            'avg_wager': wagers.mean,
+            'wager_spread': wagers.max - wagers.min,
+            'wager_concentration': (wagers.max / total_wagered) * 100 if total_wagered > 0 else 0,
+            'competition_intensity': wagers.count * wagers.stdev() if wagers.count > 1 else 0
+        }
+        self.competition_data.append(details)
+        self.competitor_counts.add(wagers.count)
+
+        # Keep the first race on ties, as max() over the list would
+        if self.most_competitive is None or \
+                details['competition_intensity'] > self.most_competitive['competition_intensity']:
+            self.most_competitive = details
+        if self.highest_stakes is None or details['total_wagered'] > self.highest_stakes['total_wagered']:
+            self.highest_stakes = details
+
+    def result(self):
+        avg_competitors = self.competitor_counts.mean()
+        if self.most_competitive is None:
+            raise ValueError('max() arg is an empty sequence')
+        return {
+            "avg_competitors_per_race": avg_competitors,
+            "most_competitive_race": self.most_competitive,
+            "highest_stakes_race": self.highest_stakes,
+            "competition_details": list(self.competition_data)
+        }
+
+    def merge(self, other):
+        self.competition_data.extend(other.competition_data)
+        self.competitor_counts.merge(other.competitor_counts)
+        # Earlier races win ties, as in add_race
+        if other.most_competitive is not None and (
+                self.most_competitive is None or
+                other.most_competitive['competition_intensity'] > self.most_competitive['competition_intensity']):
+            self.most_competitive = other.most_competitive
+        if other.highest_stakes is not None and (
+                self.highest_stakes is None or
+                other.highest_stakes['total_wagered'] > self.highest_stakes['total_wagered']):
+            self.highest_stakes = other.highest_stakes
+
+    def get_state(self):
+        data = self.competition_data
+        return {
+            'competition_data': data,
+            'competitor_counts': self.competitor_counts.get_state(),
+            # Stored as indexes into competition_data
+            'most_competitive': data.index(self.most_competitive) if self.most_competitive else None,
+            'highest_stakes': data.index(self.highest_stakes) if self.highest_stakes else None
+        }
+
+    def set_state(self, state):
+        data = self.competition_data = state['competition_data']
+        self.competitor_counts = ExactMean.from_state(state['competitor_counts'])
+        self.most_competitive = data[state['most_competitive']] if state['most_competitive'] is not None else None
+        self.highest_stakes = data[state['highest_stakes']] if state['highest_stakes'] is not None else None
+
+class VIPLevelAccumulator(RaceAccumulator):
+    """Participation, wagering and prizes per VIP level."""
+
+    key = 'vip_analysis'
+
+    def __init__(self):
+        self.vip_stats = defaultdict(lambda: {
+            'player_count': 0,
+            'total_wagered': ExactSum(),
+            'total_prizes': ExactSum()
+        })
+        self.position_means = defaultdict(ExactMean)
+
+    def add_race(self, race, entries):
+        vip_stats = self.vip_stats
+        for _, wagered, prize, position, vip_level in entries:
+            stats = vip_stats[vip_level]
+            stats['player_count'] += 1
+            stats['total_wagered'].add(wagered)
+            stats['total_prizes'].add(prize)
+            self.position_means[vip_level].add(position)
+
+    def result(self):
+        results = {}
+        for vip_level, stats in self.vip_stats.items():
+            total_wagered = stats['total_wagered'].total()
+            total_prizes = stats['total_prizes'].total()
+            level = {
+                'player_count': stats['player_count'],
+                'total_wagered': total_wagered,
+                'total_prizes': total_prizes,
+                'avg_position': 0
+            }
+            if stats['player_count']:
+                level['avg_position'] = self.position_means[vip_level].mean()
+                level['avg_wager'] = total_wagered / stats['player_count']
+                level['avg_prize'] = total_prizes / stats['player_count']
+                level['roi_percentage'] = ((total_prizes / max(total_wagered, 1)) - 1) * 100
+            results[vip_level] = level
+        return results
+
+    def merge(self, other):
+        vip_stats = self.vip_stats
+        for level, theirs in other.vip_stats.items():
+            if level not in vip_stats:
+                vip_stats[level] = theirs
+                continue
+            stats = vip_stats[level]
+            stats['player_count'] += theirs['player_count']
+            stats['total_wagered'].merge(theirs['total_wagered'])
+            stats['total_prizes'].merge(theirs['total_prizes'])
+        for level, mean in other.position_means.items():
+            self.position_means[level].merge(mean)
+
+    def get_state(self):
+        return {
+            'vip_stats': [
+                [level, dict(stats, total_wagered=stats['total_wagered'].get_state(),
+                             total_prizes=stats['total_prizes'].get_state())]
+                for level, stats in self.vip_stats.items()
+            ],
+            'position_means': [[level, mean.get_state()] for level, mean in self.position_means.items()]
+        }
+
+    def set_state(self, state):
+        self.vip_stats.clear()
+        for level, stats in state['vip_stats']:
+            stats['total_wagered'] = ExactSum.from_state(stats['total_wagered'])
+            stats['total_prizes'] = ExactSum.from_state(stats['total_prizes'])
+            self.vip_stats[level] = stats
+        self.position_means.clear()
+        self.position_means.update((level, ExactMean.from_state(mean)) for level, mean in state['position_means'])
+
+class SponsorAccumulator(RaceAccumulator):
+    """Races and prize money put up by one sponsor."""
+
+    key = 'sponsor_analysis'
+
+    def __init__(self, username: str = 'SupItsJ', vip_level: str = 'DIAMOND 1'):
+        self.username = username
+        self.vip_level = vip_level
+        self.sponsor_races = 0
+        self.total_sponsored_prizes = ExactSum()
+
+    def add_race(self, race, entries):
+        if race.sponsor_username == self.username:
+            self.sponsor_races += 1
+            self.total_sponsored_prizes.add(race.prize_pool)
+
+    def result(self):
+        total_sponsored_prizes = self.total_sponsored_prizes.total()
+        return {
+            "races_sponsored": self.sponsor_races,
+            "total_prize_investment": total_sponsored_prizes,
+            "avg_prize_per_race": total_sponsored_prizes / max(self.sponsor_races, 1),
+            "sponsor_username": self.username,
+            "sponsor_vip_level": self.vip_level
+        }
+
+    def merge(self, other):
+        self.sponsor_races += other.sponsor_races
+        self.total_sponsored_prizes.merge(other.total_sponsored_prizes)
+
+    def get_state(self):
+        return {'sponsor_races': self.sponsor_races,
+                'total_sponsored_prizes': self.total_sponsored_prizes.get_state()}
+
+    def set_state(self, state):
+        self.sponsor_races = state['sponsor_races']
+        self.total_sponsored_prizes = ExactSum.from_state(state['total_sponsored_prizes'])
+
+def default_accumulators(players: PlayerIndex) -> List[RaceAccumulator]:
+    """The accumulators behind RaceAnalyzer.analyze_all_races."""
+    return [
+        RaceSummaryAccumulator(),
+        PlayerPerformanceAccumulator(players),
+        PrizeDistributionAccumulator(),
+        CompetitionMetricsAccumulator(),
+        VIPLevelAccumulator(),
+        SponsorAccumulator()
+    ]
+
+class RaceAnalysisEngine:
+    """
+    Feeds races through registered accumulators in a single traversal.
+
+    Each competitor dict is read once into a CompetitorEntry tuple; every
+    accumulator then folds in the race with that shared list of entries.
+    Players are keyed through the players index, which accumulators given
+    explicitly must share.
+    """
+
+    def __init__(self, accumulators: List[RaceAccumulator] = None, players: PlayerIndex = None):
+        self.players = players if players is not None else PlayerIndex()
+        self.accumulators: List[RaceAccumulator] = []
+        for accumulator in accumulators if accumulators is not None else default_accumulators(self.players):
+            self.register(accumulator)
+
+    def register(self, accumulator: RaceAccumulator):
+        """Add an accumulator; its result is reported under accumulator.key."""
+        self.accumulators.append(accumulator)
+
+    def feed(self, race: Union[RaceRecord, Dict[str, Any]]):
+        """Fold one race (a RaceRecord or getRaceById envelope) into every accumulator."""
+        race = as_race_record(race)
+        players = self.players
+        entries = [competitor_entry(comp, players) for comp in race.competitors]
+        for accumulator in self.accumulators:
+            accumulator.add_race(race, entries)
+
+    def feed_all(self, races: Iterable[Union[RaceRecord, Dict[str, Any]]]):
+        for race_obj in races:
+            self.feed(race_obj)
+
+    def feed_parallel(self, races: List[Union[RaceRecord, Dict[str, Any]]], workers: Optional[int] = None,
+                      factory: Callable[[PlayerIndex], List[RaceAccumulator]] = default_accumulators):
+        """
+        Fold races in with a process pool, one contiguous shard per worker.
+
+        Each worker feeds its shard to fresh accumulators from factory (a
+        picklable top-level function building the same accumulators as this
+        engine) and returns their state; shards are merged back in race order,
+        so the results equal those of feed_all. Players are interned here
+        first, so every worker keys them the same way.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 2 or len(races) < 2:
+            self.feed_all(races)
+            return
+
+        races = [as_race_record(race) for race in races]
+        key_of = self.players.key_of
+        for race in races:
+            for comp in race.competitors:
+                key_of(comp.player_id, comp.display_name)
+
+        shard_size = -(-len(races) // workers)
+        shards = [races[start:start + shard_size] for start in range(0, len(races), shard_size)]
+        # Each task carries only its own shard, so under spawn or forkserver the races
+        # are pickled once in total rather than once per worker
+        with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_shard_worker,
+                                 initargs=(factory, self.players)) as executor:
+            for state in executor.map(_analyze_shard, shards):
+                shard = RaceAnalysisEngine(factory(self.players), self.players)
+                shard.set_state(state)
+                self.merge(shard)
+
+    def merge(self, other: 'RaceAnalysisEngine'):
+        """Fold in an engine fed with the races that follow; other must not be fed afterwards."""
+        theirs = {accumulator.key: accumulator for accumulator in other.accumulators}
+        for accumulator in self.accumulators:
+            accumulator.merge(theirs[accumulator.key])
+
+    def results(self) -> Dict[str, Any]:
+        """Results of every accumulator keyed by its analysis name."""
+        return {accumulator.key: accumulator.result() for accumulator in self.accumulators}
+
+    def get_state(self) -> Dict[str, Any]:
+        """Running state of every accumulator, keyed like results()."""
+        return {accumulator.key: accumulator.get_state() for accumulator in self.accumulators}
+
+    def set_state(self, state: Dict[str, Any]):
+        """Restore accumulators from get_state(); every registered key must be present."""
+        for accumulator in self.accumulators:
+            accumulator.set_state(state[accumulator.key])
+
+# Accumulator factory and players index of a feed_parallel worker process
+_shard_factory: Callable[[PlayerIndex], List[RaceAccumulator]] = default_accumulators
+_shard_players: Optional[PlayerIndex] = None
+
+def _init_shard_worker(factory: Callable[[PlayerIndex], List[RaceAccumulator]], players: PlayerIndex):
+    global _shard_factory, _shard_players
+    _shard_factory, _shard_players = factory, players
+
+def _analyze_shard(races: List[RaceRecord]) -> Dict[str, Any]:
+    """Accumulator state of one shard of races."""
+    engine = RaceAnalysisEngine(_shard_factory(_shard_players), _shard_players)
+    engine.feed_all(races)
+    return engine.get_state()
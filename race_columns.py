@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Columnar NumPy backend for race analytics.
+Loads every competitor into parallel arrays once and computes the race
+analyses with vectorized group-bys instead of per-competitor Python loops.
+"""
+
+from typing import Dict, Any, Iterable, Union
+from race_accumulators import competitor_entry
+from player_index import PlayerIndex
+from race_records import RaceRecord, as_race_record
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: only this backend needs it
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+class CompetitorColumns:
+    """
+    All competitors of a set of races as parallel NumPy arrays.
+
+    Players, VIP levels and positions are coded in order of first appearance,
+    so group-by results come out in the same order as the accumulator engine.
+    Results match the exact engine up to floating-point rounding of sums.
+    """
+
+    def __init__(self):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("The columnar backend requires numpy (pip install numpy)")
+
+    @classmethod
+    def from_races(cls, races: Iterable[Union[RaceRecord, Dict[str, Any]]]) -> 'CompetitorColumns':
+        """Build the columns in one pass over race records (or getRaceById envelopes)."""
+        columns = cls()
+        # A fresh index codes this set's players densely, in order of first appearance
+        players = PlayerIndex()
+        vip_levels: Dict[str, int] = {}
+        positions: Dict[Any, int] = {}
+
+        race_index, player_code, vip_code, position_code = [], [], [], []
+        position, wagered, prize = [], [], []
+        columns.race_ids, columns.race_names, columns.currencies, columns.sponsors = [], [], [], []
+        prize_pools = []
+
+        for index, race in enumerate(races):
+            race = as_race_record(race)
+            columns.race_ids.append(race.id)
+            columns.race_names.append(race.race_name)
+            columns.currencies.append(race.currency_code)
+            columns.sponsors.append(race.sponsor_username)
+            prize_pools.append(race.prize_pool)
+
+            for comp in race.competitors:
+                player, comp_wagered, comp_prize, comp_position, vip_level = competitor_entry(comp, players)
+                race_index.append(index)
+                player_code.append(player)
+                vip_code.append(vip_levels.setdefault(vip_level, len(vip_levels)))
+                position_code.append(positions.setdefault(comp_position, len(positions)))
+                position.append(comp_position)
+                wagered.append(comp_wagered)
+                prize.append(comp_prize)
+
+        columns.players = players.names
+        columns.vip_levels = list(vip_levels)
+        columns.positions = list(positions)
+        columns.prize_pools = np.array(prize_pools, dtype=np.float64)
+        columns.race_index = np.array(race_index, dtype=np.int64)
+        columns.player_code = np.array(player_code, dtype=np.int64)
+        columns.vip_code = np.array(vip_code, dtype=np.int64)
+        columns.position_code = np.array(position_code, dtype=np.int64)
+        # Kept in its original dtype so exported best positions stay ints
+        columns.position = np.array(position)
+        columns.wagered = np.array(wagered, dtype=np.float64)
+        columns.prize = np.array(prize, dtype=np.float64)
+        return columns
+
+    @property
+    def race_count(self) -> int:
+        return len(self.race_ids)
+
+def _group_sum(codes, values, groups: int):
+    return np.bincount(codes, weights=values, minlength=groups)
+
+def _group_count(codes, groups: int):
+    return np.bincount(codes, minlength=groups)
+
+def _group_extreme(ufunc, codes, values, groups: int, initial: float):
+    result = np.full(groups, initial, dtype=np.float64)
+    ufunc.at(result, codes, values)
+    return result
+
+def _summary(c: CompetitorColumns) -> Dict[str, Any]:
+    total_races = c.race_count
+    total_prize_pool = float(c.prize_pools.sum())
+    total_competitors = len(c.wagered)
+    total_wagered = float(c.wagered.sum())
+    return {
+        "total_races": total_races,
+        "total_prize_pool": total_prize_pool,
+        "total_competitors": total_competitors,
+        "unique_players": len(c.players),
+        "total_wagered": total_wagered,
+        "avg_prize_per_race": total_prize_pool / max(total_races, 1),
+        "avg_competitors_per_race": total_competitors / max(total_races, 1),
+        "avg_wager_per_competitor": total_wagered / max(total_competitors, 1),
+        "currencies_used": list(dict.fromkeys(c.currencies)),
+        "total_prize_to_wager_ratio": (total_prize_pool / max(total_wagered, 1)) * 100
+    }
+
+def _player_analytics(c: CompetitorColumns, top_count: int = 20) -> Dict[str, Any]:
+    groups = len(c.players)
+    if not groups:
+        return {"top_performers": [], "total_unique_players": 0, "avg_races_per_player": 0,
+                "most_active_player": "None", "highest_roi_player": "None"}
+
+    races = _group_count(c.player_code, groups)
+    wagered = _group_sum(c.player_code, c.wagered, groups)
+    prizes = _group_sum(c.player_code, c.prize, groups)
+    position_sums = _group_sum(c.player_code, c.position, groups)
+    roi = np.zeros(groups)
+    played = wagered > 0
+    roi[played] = (prizes[played] / wagered[played] - 1) * 100
+
+    # Stable descending sort keeps first-seen order among ties, like sorted(reverse=True)
+    top = np.argsort(-prizes, kind='stable')[:top_count]
+    top_performers = []
+    for code in top.tolist():
+        rows = np.flatnonzero(c.player_code == code)
+        top_performers.append({
+            "player_name": c.players[code],
+            "stats": {
+                'races_participated': int(races[code]),
+                'total_wagered': float(wagered[code]),
+                'total_prizes': float(prizes[code]),
+                'best_position': c.position[rows].min().item(),
+                'avg_position': float(position_sums[code] / races[code]),
+                'vip_levels': [c.vip_levels[v] for v in dict.fromkeys(c.vip_code[rows].tolist())],
+                'roi_percentage': float(roi[code])
+            }
+        })
+
+    return {
+        "top_performers": top_performers,
+        "total_unique_players": groups,
+        "avg_races_per_player": float(races.mean()),
+        "most_active_player": c.players[int(np.argmax(races))],
+        "highest_roi_player": c.players[int(np.argmax(roi))]
+    }
+
+def _prize_analysis(c: CompetitorColumns) -> Dict[str, Any]:
+    distributed = _group_sum(c.race_index, c.prize, c.race_count)
+    efficiency = distributed / np.maximum(c.prize_pools, 1) * 100
+
+    groups = len(c.positions)
+    counts = _group_count(c.position_code, groups)
+    sums = _group_sum(c.position_code, c.prize, groups)
+    highest = _group_extreme(np.maximum, c.position_code, c.prize, groups, -np.inf)
+    lowest = _group_extreme(np.minimum, c.position_code, c.prize, groups, np.inf)
+
+    return {
+        "total_prize_pools": float(c.prize_pools.sum()),
+        "total_distributed": float(distributed.sum()),
+        "avg_distribution_efficiency": float(efficiency.mean()),
+        "prize_by_position": {
+            pos: {
+                "avg_prize": float(sums[code] / counts[code]),
+                "max_prize": float(highest[code]),
+                "min_prize": float(lowest[code]),
+                "total_awards": int(counts[code])
+            }
+            for code, pos in enumerate(c.positions)
+        },
+        "race_efficiency_details": [
+            {
+                'race_id': race_id,
+                'prize_pool': pool,
+                'distributed_prizes': paid,
+                'efficiency': eff
+            }
+            for race_id, pool, paid, eff in zip(c.race_ids, c.prize_pools.tolist(),
+                                                distributed.tolist(), efficiency.tolist())
+        ]
+    }
+
+def _competition_metrics(c: CompetitorColumns) -> Dict[str, Any]:
+    groups = c.race_count
+    counts = _group_count(c.race_index, groups)
+    totals = _group_sum(c.race_index, c.wagered, groups)
+    present = counts > 0
+    means = np.divide(totals, counts, out=np.zeros(groups), where=present)
+
+    # Two-pass variance: squared deviations from each race's own mean
+    deviations = c.wagered - means[c.race_index]
+    squares = _group_sum(c.race_index, deviations * deviations, groups)
+    stdevs = np.sqrt(np.divide(squares, counts - 1, out=np.zeros(groups), where=counts > 1))
+
+    highest = _group_extreme(np.maximum, c.race_index, c.wagered, groups, -np.inf)
+    lowest = _group_extreme(np.minimum, c.race_index, c.wagered, groups, np.inf)
+    concentration = np.divide(highest * 100, totals, out=np.zeros(groups), where=totals > 0)
+    intensity = np.where(counts > 1, counts * stdevs, 0.0)
+
+    details = [
+        {
+            'race_id': c.race_ids[i],
+            'race_name': c.race_names[i],
+            'competitor_count': int(counts[i]),
+            'total_wagered': float(totals[i]),
+            'avg_wager': float(means[i]),
+            'wager_spread': float(highest[i] - lowest[i]),
+            'wager_concentration': float(concentration[i]),
+            'competition_intensity': float(intensity[i])
+        }
+        for i in np.flatnonzero(present).tolist()
+    ]
+    if not details:
+        raise ValueError("No races with competitors to compare")
+
+    raced = np.flatnonzero(present)
+    return {
+        "avg_competitors_per_race": float(counts[present].mean()),
+        "most_competitive_race": details[int(np.argmax(intensity[raced]))],
+        "highest_stakes_race": details[int(np.argmax(totals[raced]))],
+        "competition_details": details
+    }
+
+def _vip_analysis(c: CompetitorColumns) -> Dict[str, Any]:
+    groups = len(c.vip_levels)
+    counts = _group_count(c.vip_code, groups)
+    wagered = _group_sum(c.vip_code, c.wagered, groups)
+    prizes = _group_sum(c.vip_code, c.prize, groups)
+    position_sums = _group_sum(c.vip_code, c.position, groups)
+
+    results = {}
+    for code, vip_level in enumerate(c.vip_levels):
+        count = int(counts[code])
+        results[vip_level] = {
+            'player_count': count,
+            'total_wagered': float(wagered[code]),
+            'total_prizes': float(prizes[code]),
+            'avg_position': float(position_sums[code] / count),
+            'avg_wager': float(wagered[code] / count),
+            'avg_prize': float(prizes[code] / count),
+            'roi_percentage': float((prizes[code] / max(wagered[code], 1) - 1) * 100)
+        }
+    return results
+
+def _sponsor_analysis(c: CompetitorColumns, username: str = 'SupItsJ',
+                      vip_level: str = 'DIAMOND 1') -> Dict[str, Any]:
+    sponsored = np.array([sponsor == username for sponsor in c.sponsors], dtype=bool)
+    races = int(sponsored.sum())
+    total = float(c.prize_pools[sponsored].sum()) if races else 0
+    return {
+        "races_sponsored": races,
+        "total_prize_investment": total,
+        "avg_prize_per_race": total / max(races, 1),
+        "sponsor_username": username,
+        "sponsor_vip_level": vip_level
+    }
+
+def columnar_results(columns: CompetitorColumns) -> Dict[str, Any]:
+    """Race analyses from the columns, keyed like RaceAnalysisEngine.results()."""
+    return {
+        'summary': _summary(columns),
+        'player_analytics': _player_analytics(columns),
+        'prize_analysis': _prize_analysis(columns),
+        'competition_metrics': _competition_metrics(columns),
+        'vip_analysis': _vip_analysis(columns),
+        'sponsor_analysis': _sponsor_analysis(columns)
+    }
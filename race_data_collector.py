@@ -7,20 +7,30 @@ Fetches race data from Gamba API and stores in database with full analytics.
 import asyncio
 import aiohttp
 import json
+import os
+import socket
 import time
+import warnings
+from itertools import chain
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import logging
 from race_database import RaceDatabase
-from gamba_api_client import GambaAPIClient
+from gamba_api_client import GambaAPIClient, DELAY_DEPRECATED
+from response_cache import ResponseCache
 
 class RaceDataCollector:
     """Advanced race data collection and storage system."""
     
-    def __init__(self, auth_token: str = None, db_path: str = 'race_database.db'):
+    def __init__(self, auth_token: str = None, db_path: str = 'race_database.db',
+                 cache_path: str = 'race_response_cache.db', concurrency: int = 8):
         self.auth_token = auth_token
-        self.api_client = GambaAPIClient(auth_token)
+        self.concurrency = concurrency  # getRaceById requests in flight while collecting
+        self.response_cache = ResponseCache(cache_path)
+        self.api_client = GambaAPIClient(auth_token, cache=self.response_cache)
         self.database = RaceDatabase(db_path)
+        self.known_frontier = None  # Highest race ID seen to exist, kept between monitor cycles
+        self.last_probe_results: Dict[int, Optional[Dict[str, Any]]] = {}
         self.setup_logging()
     
     def setup_logging(self):
@@ -35,21 +45,46 @@ class RaceDataCollector:
         )
         self.logger = logging.getLogger(__name__)
     
-    def collect_race_range(self, start_race_id: int, end_race_id: int, delay: float = 1.0) -> Dict[str, Any]:
+    def collect_race_range(self, start_race_id: int, end_race_id: int, delay: Optional[float] = None, *,
+                           resume: bool = True, batch_size: int = 20,
+                           concurrency: Optional[int] = None) -> Dict[str, Any]:
         """
         Collect a range of race data and store in database.
+        Each leased batch is fetched with up to `concurrency` requests in
+        flight, paced by the client's shared rate limiter.
+        
+        Progress is checkpointed per race ID in a collection job, so an
+        interrupted backfill picks up where it stopped, and several processes
+        collecting the same range share the work instead of duplicating it.
         
         Args:
             start_race_id: Starting race ID
             end_race_id: Ending race ID (inclusive)
-            delay: Delay between API calls in seconds
+            delay: Deprecated; fetches one race at a time, sleeping this long between API calls
+            resume: Continue an unfinished job for this range instead of starting a new one
+            batch_size: Race IDs leased from the job per claim
+            concurrency: Requests in flight per batch (defaults to the collector's)
             
         Returns:
             Collection summary statistics
         """
-        self.logger.info(f"🚀 Starting race collection: {start_race_id} to {end_race_id}")
+        if delay is not None:
+            warnings.warn(DELAY_DEPRECATED, DeprecationWarning, stacklevel=2)
+        job_id = self.database.find_resumable_job(start_race_id, end_race_id) if resume else None
+        if job_id:
+            retried = self.database.reset_failed_job_items(job_id)
+            self.logger.info(f"♻️ Resuming collection job {job_id}: {start_race_id} to {end_race_id}"
+                             f"{f' (retrying {retried} failed IDs)' if retried else ''}")
+        else:
+            job_id = self.database.create_collection_job(start_race_id, end_race_id)
+            self.logger.info(f"🚀 Starting race collection job {job_id}: {start_race_id} to {end_race_id}")
+        
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        progress = self.database.get_job_progress(job_id)
         
         stats = {
+            'job_id': job_id,
+            'already_stored': progress['stored'],
             'total_races_attempted': 0,
             'successful_collections': 0,
             'failed_collections': 0,
@@ -59,69 +94,167 @@ class RaceDataCollector:
             'unique_sponsors': set(),
             'collection_start_time': datetime.now().isoformat(),
             'collection_end_time': None,
+            'failed_race_ids': [],
             'errors': []
         }
         
-        for race_id in range(start_race_id, end_race_id + 1):
-            stats['total_races_attempted'] += 1
+        while True:
+            race_ids = self.database.claim_job_items(job_id, worker, batch_size)
+            if not race_ids:
+                break
             
-            try:
-                self.logger.info(f"📡 Fetching race {race_id}...")
-                
-                # Fetch race data
-                race_data = self.api_client.get_race_by_id(race_id)
+            if delay is not None:
+                for race_id in race_ids:
+                    if delay and stats['total_races_attempted']:
+                        time.sleep(delay)
+                    self.collect_job_item(job_id, race_id, stats)
+                continue
+            
+            self.logger.info(f"📡 Fetching {len(race_ids)} races from {race_ids[0]} "
+                             f"({concurrency or self.concurrency} concurrent requests)...")
+            for race_id, race_data in self.api_client.iter_races(race_ids, concurrency or self.concurrency):
+                self.store_job_item(job_id, race_id, race_data, stats)
+        
+        stats['job_status'] = self.database.finish_collection_job(job_id)
+        stats['job_progress'] = self.database.get_job_progress(job_id)
+        stats['collection_end_time'] = datetime.now().isoformat()
+        stats['unique_sponsors'] = list(stats['unique_sponsors'])
+        
+        # Generate collection report
+        self.generate_collection_report(stats)
+        
+        return stats
+    
+    def collect_job_item(self, job_id: int, race_id: int, stats: Dict[str, Any]):
+        """Fetch and store one race ID of a collection job, checkpointing its state."""
+        self.logger.info(f"📡 Fetching race {race_id}...")
+        try:
+            race_data = self.api_client.get_race_by_id(race_id)
+        except Exception as e:
+            stats['total_races_attempted'] += 1
+            self.record_job_error(job_id, race_id, e, stats)
+            return
+        self.store_job_item(job_id, race_id, race_data, stats)
+    
+    def store_job_item(self, job_id: int, race_id: int, race_data: Optional[Dict[str, Any]],
+                       stats: Dict[str, Any]):
+        """Store one fetched race ID of a collection job (None if its fetch failed), checkpointing its state."""
+        stats['total_races_attempted'] += 1
+        
+        try:
+            if race_data and 'data' in race_data:
+                race_info = race_data['data'].get('getRaceById')
                 
-                if race_data and 'data' in race_data:
-                    race_info = race_data['data'].get('getRaceById')
+                if race_info:
+                    self.database.update_job_item(job_id, race_id, 'fetched')
                     
-                    if race_info:
-                        # Store in database
-                        success = self.database.insert_race_data(race_data)
-                        
-                        if success:
-                            stats['successful_collections'] += 1
-                            
-                            # Update statistics
-                            competitors = race_info.get('competitors', [])
-                            stats['total_players_found'] += len(competitors)
-                            stats['total_prize_pool'] += race_info.get('prize_pool', 0)
-                            stats['total_wagered'] += sum(c.get('total_wagered', 0) for c in competitors)
-                            
-                            sponsor = race_info.get('sponsor', {})
-                            if sponsor.get('username'):
-                                stats['unique_sponsors'].add(sponsor['username'])
+                    # Store in database
+                    success = self.database.insert_race_data(race_data)
+                    
+                    if success:
+                        self.database.update_job_item(job_id, race_id, 'stored')
+                        stats['successful_collections'] += 1
                             
-                            self.logger.info(f"✅ Successfully processed race {race_id}")
-                        else:
-                            stats['failed_collections'] += 1
-                            self.logger.error(f"❌ Failed to store race {race_id} in database")
+                        # Update statistics
+                        competitors = race_info.get('competitors', [])
+                        stats['total_players_found'] += len(competitors)
+                        stats['total_prize_pool'] += race_info.get('prize_pool', 0)
+                        stats['total_wagered'] += sum(c.get('total_wagered', 0) for c in competitors)
+                        
+                        sponsor = race_info.get('sponsor', {})
+                        if sponsor.get('username'):
+                            stats['unique_sponsors'].add(sponsor['username'])
+                        
+                        self.logger.info(f"✅ Successfully processed race {race_id}")
                     else:
+                        self.database.update_job_item(job_id, race_id, 'failed', 'database insert failed')
                         stats['failed_collections'] += 1
-                        self.logger.warning(f"⚠️ No race data found for race {race_id}")
+                        self.logger.error(f"❌ Failed to store race {race_id} in database")
                 else:
+                    self.database.update_job_item(job_id, race_id, 'not_found')
                     stats['failed_collections'] += 1
-                    self.logger.warning(f"⚠️ Invalid response for race {race_id}")
-                
-                # Rate limiting
-                if race_id < end_race_id:
-                    time.sleep(delay)
-                    
-            except Exception as e:
+                    self.logger.warning(f"⚠️ No race data found for race {race_id}")
+            elif race_data is None:
+                self.database.update_job_item(job_id, race_id, 'failed', 'fetch failed after retries')
+                stats['failed_collections'] += 1
+                stats['failed_race_ids'].append(race_id)
+                self.logger.warning(f"⚠️ Gave up on race {race_id} after retries")
+            else:
+                self.database.update_job_item(job_id, race_id, 'failed', 'invalid response')
                 stats['failed_collections'] += 1
-                error_msg = f"Error processing race {race_id}: {str(e)}"
-                stats['errors'].append(error_msg)
-                self.logger.error(error_msg)
+                self.logger.warning(f"⚠️ Invalid response for race {race_id}")
                 
-                # Continue with next race
-                continue
+        except Exception as e:
+            self.record_job_error(job_id, race_id, e, stats)
+    
+    def record_job_error(self, job_id: int, race_id: int, error: Exception, stats: Dict[str, Any]):
+        """Mark a race ID failed after an unexpected error while collecting it."""
+        self.database.update_job_item(job_id, race_id, 'failed', str(error))
+        stats['failed_collections'] += 1
+        error_msg = f"Error processing race {race_id}: {str(error)}"
+        stats['errors'].append(error_msg)
+        self.logger.error(error_msg)
+    
+    def get_max_stored_race_id(self) -> int:
+        """Highest race ID in the database, or 0 when empty."""
+        with self.database.pool.reader() as conn:
+            result = conn.execute('SELECT MAX(CAST(race_id AS INTEGER)) as max_id FROM races').fetchone()
+        return result['max_id'] if result and result['max_id'] else 0
+    
+    def _probe_race(self, race_id: int, gap_tolerance: int) -> Optional[int]:
+        """
+        Return the first existing race ID in [race_id, race_id + gap_tolerance), or None.
+        Responses are kept in last_probe_results so found races need not be fetched twice.
+        """
+        for candidate in range(race_id, race_id + gap_tolerance):
+            if candidate not in self.last_probe_results:
+                self.last_probe_results[candidate] = self.api_client.get_race_by_id(candidate)
+            
+            race_data = self.last_probe_results[candidate]
+            if race_data and (race_data.get('data') or {}).get('getRaceById'):
+                return candidate
+        return None
+    
+    def find_latest_race_id(self, gap_tolerance: int = 3) -> int:
+        """
+        Find the highest existing race ID with O(log n) requests.
         
-        stats['collection_end_time'] = datetime.now().isoformat()
-        stats['unique_sponsors'] = list(stats['unique_sponsors'])
+        Gallops forward from the cached frontier (or the highest stored race)
+        in doubling steps until a probe misses, then binary-searches the
+        bracket. Up to `gap_tolerance - 1` consecutive missing IDs are treated
+        as holes rather than the end of the sequence.
         
-        # Generate collection report
-        self.generate_collection_report(stats)
+        Args:
+            gap_tolerance: Consecutive IDs checked before a position counts as empty
+            
+        Returns:
+            Highest existing race ID (0 if none was found)
+        """
+        gap_tolerance = max(gap_tolerance, 1)
+        self.last_probe_results = {}
         
-        return stats
+        # lo is known to exist (0 acts as a sentinel), hi is known to be past the end
+        lo = max(self.known_frontier or 0, self.get_max_stored_race_id())
+        step = 1
+        while True:
+            found = self._probe_race(lo + step, gap_tolerance)
+            if found is None:
+                hi = lo + step
+                break
+            lo = found
+            step *= 2
+        
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            found = self._probe_race(mid, gap_tolerance)
+            if found is None:
+                hi = mid
+            else:
+                lo = found
+        
+        self.logger.info(f"🧭 Latest race ID is {lo} ({len(self.last_probe_results)} probe requests)")
+        self.known_frontier = lo
+        return lo
     
     def collect_recent_races(self, days_back: int = 30) -> Dict[str, Any]:
         """
@@ -137,49 +270,38 @@ class RaceDataCollector:
         races_per_week = 1.5
         estimated_races = int(days_back / 7 * races_per_week)
         
-        # Get the latest known race ID from database
-        cursor = self.database.conn.execute('SELECT MAX(CAST(race_id AS INTEGER)) as max_id FROM races')
-        result = cursor.fetchone()
-        max_known_id = result['max_id'] if result and result['max_id'] else 100
-        
-        # Collect from estimated range
-        start_id = max(max_known_id - estimated_races, 1)
-        end_id = max_known_id + 10  # Look ahead for new races
+        # Collect back from the newest race that actually exists
+        end_id = self.find_latest_race_id()
+        start_id = max(end_id - estimated_races, 1)
         
         return self.collect_race_range(start_id, end_id)
     
-    def monitor_new_races(self, check_interval: int = 3600, max_lookback: int = 5):
+    def monitor_new_races(self, check_interval: int = 3600, gap_tolerance: int = 3):
         """
         Monitor for new races continuously.
         
         Args:
             check_interval: Check interval in seconds (default: 1 hour)
-            max_lookback: How many race IDs to check back from latest
+            gap_tolerance: Consecutive missing IDs tolerated when searching for the newest race
         """
         self.logger.info(f"🔄 Starting race monitoring (checking every {check_interval}s)")
         
         while True:
             try:
-                # Get latest race ID from database
-                cursor = self.database.conn.execute('SELECT MAX(CAST(race_id AS INTEGER)) as max_id FROM races')
-                result = cursor.fetchone()
-                latest_id = result['max_id'] if result and result['max_id'] else 100
+                # Everything past the highest stored race is new
+                stored_id = self.get_max_stored_race_id()
+                latest_id = self.find_latest_race_id(gap_tolerance)
                 
-                # Check for new races
-                start_check = latest_id - max_lookback
-                end_check = latest_id + 10
+                self.logger.info(f"🔍 Checking for new races: {stored_id + 1} to {latest_id}")
                 
-                self.logger.info(f"🔍 Checking for new races: {start_check} to {end_check}")
+                # Reuse the responses the frontier search already fetched; fetch the rest concurrently
+                new_ids = range(stored_id + 1, latest_id + 1)
+                probed = [(race_id, self.last_probe_results[race_id]) for race_id in new_ids
+                          if self.last_probe_results.get(race_id)]
+                unfetched = [race_id for race_id in new_ids if not self.last_probe_results.get(race_id)]
                 
                 new_races_found = 0
-                for race_id in range(start_check, end_check + 1):
-                    # Check if race already exists
-                    cursor = self.database.conn.execute('SELECT race_id FROM races WHERE race_id = ?', (str(race_id),))
-                    if cursor.fetchone():
-                        continue  # Race already exists
-                    
-                    # Try to fetch new race
-                    race_data = self.api_client.get_race_by_id(race_id)
+                for race_id, race_data in chain(probed, self.api_client.iter_races(unfetched, self.concurrency)):
                     if race_data and 'data' in race_data and race_data['data'].get('getRaceById'):
                         success = self.database.insert_race_data(race_data)
                         if success:
@@ -222,45 +344,49 @@ class RaceDataCollector:
         """Get current database statistics."""
         stats = {}
         
-        # Race statistics
-        cursor = self.database.conn.execute('SELECT COUNT(*) as count, SUM(prize_pool) as total_prizes FROM races')
-        result = cursor.fetchone()
-        stats['total_races'] = result['count']
-        stats['total_prize_pools'] = result['total_prizes'] or 0
+        with self.database.pool.reader() as conn:
+            # Race statistics
+            cursor = conn.execute('SELECT COUNT(*) as count, SUM(prize_pool) as total_prizes FROM races')
+            result = cursor.fetchone()
+            stats['total_races'] = result['count']
+            stats['total_prize_pools'] = result['total_prizes'] or 0
         
-        # Player statistics
-        cursor = self.database.conn.execute('SELECT COUNT(*) as count FROM players')
-        stats['total_players'] = cursor.fetchone()['count']
+            # Player statistics
+            cursor = conn.execute('SELECT COUNT(*) as count FROM players')
+            stats['total_players'] = cursor.fetchone()['count']
         
-        # Sponsor statistics
-        cursor = self.database.conn.execute('SELECT COUNT(*) as count FROM sponsors')
-        stats['total_sponsors'] = cursor.fetchone()['count']
+            # Sponsor statistics
+            cursor = conn.execute('SELECT COUNT(*) as count FROM sponsors')
+            stats['total_sponsors'] = cursor.fetchone()['count']
         
-        # Participation statistics
-        cursor = self.database.conn.execute('SELECT COUNT(*) as count, SUM(total_wagered) as total_wagered FROM race_participants')
-        result = cursor.fetchone()
-        stats['total_participations'] = result['count']
-        stats['total_wagered'] = result['total_wagered'] or 0
+            # Participation statistics
+            cursor = conn.execute('SELECT COUNT(*) as count, SUM(total_wagered) as total_wagered FROM race_participants')
+            result = cursor.fetchone()
+            stats['total_participations'] = result['count']
+            stats['total_wagered'] = result['total_wagered'] or 0
         
         return stats
     
     def analyze_sponsors(self) -> List[Dict[str, Any]]:
         """Analyze sponsor performance."""
-        cursor = self.database.conn.execute('''
-            SELECT s.*, COUNT(r.race_id) as races_sponsored
-            FROM sponsors s
-            LEFT JOIN races r ON s.sponsor_id = r.sponsor_id
-            GROUP BY s.sponsor_id
-            ORDER BY s.total_prize_pool DESC
-        ''')
-        
-        return [dict(row) for row in cursor.fetchall()]
+        with self.database.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT s.*, COUNT(r.race_id) as races_sponsored
+                FROM sponsors s
+                LEFT JOIN races r ON s.sponsor_id = r.sponsor_id
+                GROUP BY s.sponsor_id
+                ORDER BY s.total_prize_pool DESC
+            ''')
+            return [dict(row) for row in cursor.fetchall()]
     
     def print_collection_summary(self, stats: Dict[str, Any]):
         """Print a formatted collection summary."""
         print("\n" + "="*60)
         print("🏁 RACE DATA COLLECTION SUMMARY")
         print("="*60)
+        if 'job_id' in stats:
+            print(f"🗂️ Job {stats['job_id']}: {stats.get('job_status', 'running')} "
+                  f"({stats['already_stored']} already stored before this run)")
         print(f"📊 Races Attempted: {stats['total_races_attempted']}")
         print(f"✅ Successful: {stats['successful_collections']}")
         print(f"❌ Failed: {stats['failed_collections']}")
@@ -272,6 +398,9 @@ class RaceDataCollector:
         if stats['unique_sponsors']:
             print(f"📋 Sponsors: {', '.join(stats['unique_sponsors'])}")
         
+        if stats.get('failed_race_ids'):
+            print(f"🔁 Unfetched race IDs (re-run to fill): {', '.join(map(str, stats['failed_race_ids']))}")
+        
         if stats['errors']:
             print(f"\n⚠️ Errors ({len(stats['errors'])}):")
             for error in stats['errors'][:5]:  # Show first 5 errors
@@ -279,6 +408,20 @@ class RaceDataCollector:
             if len(stats['errors']) > 5:
                 print(f"   • ... and {len(stats['errors']) - 5} more")
     
+    def print_job_progress(self):
+        """Print per-state progress of every collection job."""
+        jobs = self.database.list_collection_jobs()
+        if not jobs:
+            print("📭 No collection jobs recorded")
+            return
+        
+        for job in jobs:
+            progress = job['progress']
+            total = sum(progress.values())
+            done = total - progress['pending'] - progress['fetched']
+            print(f"🗂️ Job {job['job_id']} [{job['status']}] races {job['start_race_id']}-{job['end_race_id']}: "
+                  f"{done}/{total} resolved ({', '.join(f'{k}={v}' for k, v in progress.items())})")
+    
     def export_player_data(self, filename: str = 'player_export.json'):
         """Export all player data for analysis."""
         players = self.database.get_top_players(1000)  # Get all players
@@ -293,8 +436,9 @@ class RaceDataCollector:
         print(f"📤 Exported {len(players)} players to {filename}")
     
     def close(self):
-        """Close database connection."""
+        """Close database connections."""
         self.database.close()
+        self.response_cache.close()
 
 def main():
     """Main function for race data collection."""
@@ -303,40 +447,54 @@ def main():
     print("🏁 Race Data Collection System")
     print("="*50)
     
+    # --concurrency=N sets the getRaceById requests in flight while collecting
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    concurrency = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--concurrency=')), 8)
+    
     # Initialize collector (add your auth token here)
-    collector = RaceDataCollector(auth_token="YOUR_TOKEN_HERE")
+    collector = RaceDataCollector(auth_token="YOUR_TOKEN_HERE", concurrency=concurrency)
     
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+    if args:
+        command = args[0]
         
         if command == "collect":
             # Collect specific range
-            start_id = int(sys.argv[2]) if len(sys.argv) > 2 else 90
-            end_id = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+            start_id = int(args[1]) if len(args) > 1 else 90
+            end_id = int(args[2]) if len(args) > 2 else 100
             collector.collect_race_range(start_id, end_id)
             
         elif command == "recent":
             # Collect recent races
-            days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+            days = int(args[1]) if len(args) > 1 else 30
             collector.collect_recent_races(days)
             
         elif command == "monitor":
             # Monitor for new races
-            interval = int(sys.argv[2]) if len(sys.argv) > 2 else 3600
+            interval = int(args[1]) if len(args) > 1 else 3600
             collector.monitor_new_races(interval)
             
+        elif command == "rebuild-stats":
+            # Recompute player/sponsor aggregates from scratch
+            collector.database.rebuild_statistics()
+            
+        elif command == "jobs":
+            # Show backfill job progress
+            collector.print_job_progress()
+            
         elif command == "export":
             # Export player data
-            filename = sys.argv[2] if len(sys.argv) > 2 else 'player_export.json'
+            filename = args[1] if len(args) > 1 else 'player_export.json'
             collector.export_player_data(filename)
             
         else:
             print("❌ Unknown command")
     else:
         print("💡 Usage examples:")
-        print("  python race_data_collector.py collect 90 100")
+        print("  python race_data_collector.py collect 90 100 --concurrency=8")
         print("  python race_data_collector.py recent 30")
         print("  python race_data_collector.py monitor 3600")
+        print("  python race_data_collector.py jobs")
+        print("  python race_data_collector.py rebuild-stats")
         print("  python race_data_collector.py export players.json")
     
     collector.close()
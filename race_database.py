@@ -6,19 +6,42 @@ Stores races, players, wagers, sponsors, and performance metrics.
 
 import sqlite3
 import json
-from typing import Dict, Any, List, Optional, Tuple
+import time
+from typing import Dict, Any, List, Optional, Tuple, Set, Iterable, Iterator
 from datetime import datetime
 import hashlib
+from functools import wraps
+from itertools import islice
+from connection_pool import ConnectionPool
+from json_stream import iter_json_objects
+from player_index import PlayerIndex
+from race_records import RaceRecord, CompetitorRecord, interned
+
+# States of a race ID inside a collection job
+JOB_STATES = ('pending', 'fetched', 'stored', 'failed', 'not_found')
+
+def serialized_write(method):
+    """Run a RaceDatabase method while holding the pool's writer connection."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pool.writer():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class RaceDatabase:
     """Comprehensive database for race analytics and player tracking."""
     
-    def __init__(self, db_path: str = 'race_database.db'):
+    def __init__(self, db_path: str = 'race_database.db', profile: str = 'performance', readers: int = 4):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # Enable dict-like access
+        self.profile = profile  # See sqlite_profile.SQLITE_PROFILES
+        # Writes go through the single writer connection (self.conn); queries borrow readers
+        self.pool = ConnectionPool(db_path, readers, profile)
+        self.conn = self.pool.writer_conn
         self.setup_database()
+        # Integer keys and latest display names of players, shared with RaceAnalyzer
+        self.players = PlayerIndex.load(self.conn)
     
+    @serialized_write
     def setup_database(self):
         """Create all necessary tables for race analytics."""
         
@@ -74,6 +97,7 @@ class RaceDatabase:
                 total_prizes_won REAL DEFAULT 0,
                 best_position INTEGER DEFAULT 999,
                 avg_position REAL DEFAULT 999,
+                positioned_races INTEGER DEFAULT 0,  -- Participations with a position, the avg_position divisor
                 win_rate REAL DEFAULT 0,
                 roi_percentage REAL DEFAULT 0,
                 avatar_url TEXT,
@@ -145,16 +169,70 @@ class RaceDatabase:
             )
         ''')
         
+        # Backfill jobs and the per-race-ID checkpoint of each job
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS collection_jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_race_id INTEGER NOT NULL,
+                end_race_id INTEGER NOT NULL,
+                status TEXT DEFAULT 'running',
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS collection_job_items (
+                job_id INTEGER,
+                race_id INTEGER,
+                state TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                claimed_by TEXT,
+                claimed_at REAL,  -- Lease start; expired leases can be reclaimed
+                error TEXT,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (job_id, race_id),
+                FOREIGN KEY (job_id) REFERENCES collection_jobs (job_id)
+            )
+        ''')
+        
+        # Integer surrogate keys of players (see player_index.PlayerIndex)
+        PlayerIndex.create_table(self.conn)
+        # Players stored before the index existed are keyed in order of first participation
+        self.conn.execute('''
+            INSERT INTO player_index (player_key, player_id, display_name)
+            SELECT (SELECT COUNT(*) FROM player_index)
+                       + ROW_NUMBER() OVER (ORDER BY COALESCE(rp.first_seen, 0), p.rowid) - 1,
+                   p.player_id, p.display_name
+            FROM players p
+            LEFT JOIN (
+                SELECT player_id, MIN(id) AS first_seen FROM race_participants GROUP BY player_id
+            ) rp ON rp.player_id = p.player_id
+            WHERE p.player_id NOT IN (SELECT player_id FROM player_index)
+        ''')
+        
+        # Databases created before positioned_races existed get it backfilled
+        player_columns = {row[1] for row in self.conn.execute('PRAGMA table_info(players)')}
+        if 'positioned_races' not in player_columns:
+            self.conn.execute('ALTER TABLE players ADD COLUMN positioned_races INTEGER DEFAULT 0')
+            self.conn.execute('''
+                UPDATE players SET positioned_races = (
+                    SELECT COUNT(position) FROM race_participants WHERE player_id = players.player_id
+                )
+            ''')
+        
         # Create indexes for performance
         self.conn.execute('CREATE INDEX IF NOT EXISTS idx_races_sponsor ON races(sponsor_id)')
         self.conn.execute('CREATE INDEX IF NOT EXISTS idx_participants_race ON race_participants(race_id)')
         self.conn.execute('CREATE INDEX IF NOT EXISTS idx_participants_player ON race_participants(player_id)')
         self.conn.execute('CREATE INDEX IF NOT EXISTS idx_performance_player ON player_performance_history(player_id)')
         self.conn.execute('CREATE INDEX IF NOT EXISTS idx_performance_date ON player_performance_history(date)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_job_items_state ON collection_job_items(job_id, state)')
         
         self.conn.commit()
         print("✅ Database schema created successfully")
     
+    @serialized_write
     def insert_race_data(self, race_data: Dict[str, Any]) -> bool:
         """Insert complete race data including sponsor, players, and participants."""
         try:
@@ -162,6 +240,9 @@ class RaceDatabase:
             if not race_info:
                 return False
             
+            # Snapshot what this race already contributed before overwriting it
+            existing = self._snapshot_existing_races([race_info.get('id')])
+            
             # Insert sponsor
             sponsor = race_info.get('sponsor', {})
             if sponsor:
@@ -192,8 +273,8 @@ class RaceDatabase:
             
             # Update aggregated statistics
             self.update_race_statistics(race_id)
-            self.update_player_statistics()
-            self.update_sponsor_statistics()
+            self.apply_aggregate_deltas([race_info], *existing)
+            self.players.save(self.conn)
             
             self.conn.commit()
             print(f"✅ Successfully inserted race {race_id}")
@@ -202,8 +283,167 @@ class RaceDatabase:
         except Exception as e:
             print(f"❌ Error inserting race data: {e}")
             self.conn.rollback()
+            self.players = PlayerIndex.load(self.conn)
             return False
     
+    @serialized_write
+    def insert_races_bulk(self, races_data: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        Insert many race payloads, one executemany UPSERT per table and one commit per batch.
+        
+        Args:
+            races_data: getRaceById response payloads; any iterable, consumed one batch at a time
+            batch_size: Races written per transaction
+            
+        Returns:
+            Number of races inserted
+        """
+        inserted = 0
+        offset = 0
+        races = iter(races_data)
+        while True:
+            batch = list(islice(races, batch_size))
+            if not batch:
+                break
+            try:
+                inserted += self._insert_race_batch(batch)
+                self.conn.commit()
+            except Exception as e:
+                print(f"❌ Error inserting race batch at offset {offset}: {e}")
+                self.conn.rollback()
+                self.players = PlayerIndex.load(self.conn)
+            offset += len(batch)
+        
+        print(f"✅ Bulk inserted {inserted} races")
+        return inserted
+    
+    def _insert_race_batch(self, races_data: List[Dict[str, Any]]) -> int:
+        """Build per-table rows for a batch of races and write them with executemany."""
+        now = datetime.now().isoformat()
+        race_infos = [r.get('data', {}).get('getRaceById') for r in races_data]
+        race_infos = [race_info for race_info in race_infos if race_info]
+        existing = self._snapshot_existing_races([race_info.get('id') for race_info in race_infos])
+        
+        sponsor_rows = {}
+        race_rows = []
+        code_rows = []
+        player_rows = {}
+        participant_rows = []
+        history_rows = []
+        
+        for race_info in race_infos:
+            sponsor = race_info.get('sponsor', {})
+            if sponsor:
+                sponsor_rows[sponsor.get('id')] = (
+                    sponsor.get('id'), sponsor.get('username'), sponsor.get('vip_level_name'),
+                    json.dumps(sponsor.get('preferences', {})), now
+                )
+            
+            race_id = race_info.get('id')
+            prize_pool = race_info.get('prize_pool', 0)
+            competitors = race_info.get('competitors', [])
+            total_competitors = len(competitors)
+            total_wagered = sum(comp.get('total_wagered', 0) for comp in competitors)
+            distributed_prizes = sum(comp.get('winner_amount', 0) for comp in competitors)
+            race_rows.append((
+                race_id, race_info.get('sponsor_id'), race_info.get('race_name'), prize_pool,
+                race_info.get('currency_id'), race_info.get('currency', {}).get('code'),
+                race_info.get('start_date'), race_info.get('end_date'), race_info.get('style'),
+                total_competitors, total_wagered, total_wagered / max(total_competitors, 1),
+                (distributed_prizes / max(prize_pool, 1)) * 100, now
+            ))
+            
+            for code_info in race_info.get('eligibility', []):
+                code_rows.append((
+                    code_info.get('id'), race_id, code_info.get('code'), code_info.get('usage_limit'),
+                    code_info.get('usage_count', 0), code_info.get('total_wagered', 0)
+                ))
+            
+            for competitor in competitors:
+                player_id = competitor.get('competitor_id') or competitor.get('id')
+                self.players.key_for(competitor)
+                player_rows[player_id] = (
+                    player_id, competitor.get('display_name'), competitor.get('vip_level_name'),
+                    competitor.get('avatar'), now
+                )
+                
+                position = competitor.get('position')
+                wagered = competitor.get('total_wagered', 0)
+                prize_won = competitor.get('winner_amount', 0)
+                roi_percentage = ((prize_won / max(wagered, 1)) - 1) * 100 if wagered > 0 else 0
+                participant_rows.append((race_id, player_id, position, wagered, prize_won, roi_percentage, now))
+                
+                # Same 0-100 performance score as insert_performance_history
+                position_score = max(0, (total_competitors - position + 1) / total_competitors * 50) \
+                    if position is not None else 0
+                roi_score = min(50, max(0, ((prize_won / max(wagered, 1)) - 1) * 100))
+                history_rows.append((player_id, race_id, now, position, wagered, prize_won,
+                                     total_competitors, position_score + roi_score))
+        
+        self.conn.executemany('''
+            INSERT INTO sponsors (sponsor_id, username, vip_level, preferences, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(sponsor_id) DO UPDATE SET
+                username = excluded.username, vip_level = excluded.vip_level,
+                preferences = excluded.preferences, updated_at = excluded.updated_at
+        ''', list(sponsor_rows.values()))
+        
+        self.conn.executemany('''
+            INSERT INTO races
+            (race_id, sponsor_id, race_name, prize_pool, currency_id, currency_code,
+             start_date, end_date, style, total_competitors, total_wagered,
+             avg_wager_per_competitor, prize_distribution_efficiency, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(race_id) DO UPDATE SET
+                sponsor_id = excluded.sponsor_id, race_name = excluded.race_name,
+                prize_pool = excluded.prize_pool, currency_id = excluded.currency_id,
+                currency_code = excluded.currency_code, start_date = excluded.start_date,
+                end_date = excluded.end_date, style = excluded.style,
+                total_competitors = excluded.total_competitors, total_wagered = excluded.total_wagered,
+                avg_wager_per_competitor = excluded.avg_wager_per_competitor,
+                prize_distribution_efficiency = excluded.prize_distribution_efficiency,
+                updated_at = excluded.updated_at
+        ''', race_rows)
+        
+        self.conn.executemany('''
+            INSERT INTO sponsor_codes (code_id, race_id, code, usage_limit, usage_count, total_wagered)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(code_id) DO UPDATE SET
+                race_id = excluded.race_id, code = excluded.code, usage_limit = excluded.usage_limit,
+                usage_count = excluded.usage_count, total_wagered = excluded.total_wagered
+        ''', code_rows)
+        
+        self.conn.executemany('''
+            INSERT INTO players (player_id, display_name, vip_level, avatar_url, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(player_id) DO UPDATE SET
+                display_name = excluded.display_name, vip_level = excluded.vip_level,
+                avatar_url = excluded.avatar_url, updated_at = excluded.updated_at
+        ''', list(player_rows.values()))
+        
+        self.conn.executemany('''
+            INSERT INTO race_participants
+            (race_id, player_id, position, total_wagered, winner_amount, roi_percentage, participation_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(race_id, player_id) DO UPDATE SET
+                position = excluded.position, total_wagered = excluded.total_wagered,
+                winner_amount = excluded.winner_amount, roi_percentage = excluded.roi_percentage,
+                participation_date = excluded.participation_date
+        ''', participant_rows)
+        
+        self.conn.executemany('''
+            INSERT INTO player_performance_history
+            (player_id, race_id, date, position, wagered, prize_won, competitors_count, performance_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', history_rows)
+        
+        self.players.save(self.conn)
+        
+        # Aggregates once per batch, touching only the players and sponsors in it
+        self.apply_aggregate_deltas(race_infos, *existing)
+        
+        return len(race_rows)
+    
     def insert_sponsor(self, sponsor_data: Dict[str, Any]):
         """Insert or update sponsor information."""
         sponsor_id = sponsor_data.get('id')
@@ -211,10 +451,14 @@ class RaceDatabase:
         vip_level = sponsor_data.get('vip_level_name')
         preferences = json.dumps(sponsor_data.get('preferences', {}))
         
+        # Upsert so the incrementally maintained aggregates survive
         self.conn.execute('''
-            INSERT OR REPLACE INTO sponsors 
+            INSERT INTO sponsors 
             (sponsor_id, username, vip_level, preferences, updated_at)
             VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(sponsor_id) DO UPDATE SET
+                username = excluded.username, vip_level = excluded.vip_level,
+                preferences = excluded.preferences, updated_at = excluded.updated_at
         ''', (sponsor_id, username, vip_level, preferences, datetime.now().isoformat()))
     
     def insert_race(self, race_data: Dict[str, Any]):
@@ -257,6 +501,8 @@ class RaceDatabase:
             VALUES (?, ?, ?, ?)
         ''', (player_id, display_name, vip_level, avatar_url))
         
+        self.players.key_for(player_data)
+        
         # Update if exists
         self.conn.execute('''
             UPDATE players SET 
@@ -298,7 +544,9 @@ class RaceDatabase:
         prize_won = participant_data.get('winner_amount', 0)
         
         # Calculate performance score (0-100, higher is better)
-        position_score = max(0, (total_competitors - position + 1) / total_competitors * 50)
+        # Competitors without a position get no position score
+        position_score = max(0, (total_competitors - position + 1) / total_competitors * 50) \
+            if position is not None else 0
         roi_score = min(50, max(0, ((prize_won / max(wagered, 1)) - 1) * 100))
         performance_score = position_score + roi_score
         
@@ -330,126 +578,438 @@ class RaceDatabase:
                 WHERE race_id = ?
             ''', (efficiency, datetime.now().isoformat(), race_id))
     
-    def update_player_statistics(self):
-        """Update aggregated player statistics."""
-        self.conn.execute('''
-            UPDATE players SET 
-                total_races_participated = (
-                    SELECT COUNT(*) FROM race_participants WHERE player_id = players.player_id
-                ),
-                total_wagered = (
-                    SELECT COALESCE(SUM(total_wagered), 0) FROM race_participants WHERE player_id = players.player_id
-                ),
-                total_prizes_won = (
-                    SELECT COALESCE(SUM(winner_amount), 0) FROM race_participants WHERE player_id = players.player_id
-                ),
-                best_position = (
-                    SELECT MIN(position) FROM race_participants WHERE player_id = players.player_id
-                ),
-                avg_position = (
-                    SELECT AVG(position) FROM race_participants WHERE player_id = players.player_id
-                ),
-                updated_at = ?
-        ''', (datetime.now().isoformat(),))
-        
-        # Update ROI percentage
-        self.conn.execute('''
-            UPDATE players SET 
-                roi_percentage = CASE 
-                    WHEN total_wagered > 0 THEN ((total_prizes_won / total_wagered) - 1) * 100
-                    ELSE 0
-                END
-        ''')
+    def _snapshot_existing_races(self, race_ids: List[str]) -> Tuple[Set[Tuple[str, str]], Dict[str, str]]:
+        """Participations and sponsors already stored for these races, read before they are overwritten."""
+        participations = set()
+        race_sponsors = {}
+        
+        for offset in range(0, len(race_ids), 500):
+            chunk = race_ids[offset:offset + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = self.conn.execute(
+                f'SELECT race_id, player_id FROM race_participants WHERE race_id IN ({placeholders})', chunk)
+            participations.update((row['race_id'], row['player_id']) for row in cursor.fetchall())
+            cursor = self.conn.execute(
+                f'SELECT race_id, sponsor_id FROM races WHERE race_id IN ({placeholders})', chunk)
+            race_sponsors.update((row['race_id'], row['sponsor_id']) for row in cursor.fetchall())
+        
+        return participations, race_sponsors
     
-    def update_sponsor_statistics(self):
-        """Update aggregated sponsor statistics."""
-        self.conn.execute('''
-            UPDATE sponsors SET 
-                total_races_sponsored = (
-                    SELECT COUNT(*) FROM races WHERE sponsor_id = sponsors.sponsor_id
-                ),
-                total_prize_pool = (
-                    SELECT COALESCE(SUM(prize_pool), 0) FROM races WHERE sponsor_id = sponsors.sponsor_id
-                ),
-                updated_at = ?
-        ''', (datetime.now().isoformat(),))
-        
-        # Update average prize per race
-        self.conn.execute('''
-            UPDATE sponsors SET 
-                avg_prize_per_race = CASE 
-                    WHEN total_races_sponsored > 0 THEN total_prize_pool / total_races_sponsored
+    def apply_aggregate_deltas(self, race_infos: List[Dict[str, Any]],
+                               existing_participations: Set[Tuple[str, str]],
+                               existing_race_sponsors: Dict[str, str]):
+        """
+        Fold newly inserted races into player and sponsor aggregates.
+        
+        New participations are applied as deltas (count, sums, min position,
+        running average). Rows that replaced an already stored race cannot be
+        expressed as deltas, so those players and sponsors are recomputed from
+        race_participants / races instead.
+        """
+        player_deltas = {}
+        sponsor_deltas = {}
+        rebuild_players = set()
+        rebuild_sponsors = set()
+        seen_participations = set(existing_participations)
+        seen_races = set(existing_race_sponsors)
+        
+        for race_info in race_infos:
+            race_id = race_info.get('id')
+            sponsor_id = race_info.get('sponsor_id')
+            
+            if race_id in seen_races:
+                rebuild_sponsors.update({sponsor_id, existing_race_sponsors.get(race_id)})
+            elif sponsor_id is not None:
+                delta = sponsor_deltas.setdefault(sponsor_id, [0, 0])
+                delta[0] += 1
+                delta[1] += race_info.get('prize_pool', 0)
+            seen_races.add(race_id)
+            
+            # Later duplicates of a competitor replace earlier ones, like the upsert does
+            competitors = {}
+            for competitor in race_info.get('competitors', []):
+                competitors[competitor.get('competitor_id') or competitor.get('id')] = competitor
+            
+            for player_id, competitor in competitors.items():
+                if (race_id, player_id) in seen_participations:
+                    rebuild_players.add(player_id)
+                    continue
+                seen_participations.add((race_id, player_id))
+                
+                position = competitor.get('position')
+                delta = player_deltas.setdefault(player_id, [0, 0, 0, None, 0, 0])
+                delta[0] += 1
+                delta[1] += competitor.get('total_wagered', 0)
+                delta[2] += competitor.get('winner_amount', 0)
+                if position is not None:
+                    delta[3] = position if delta[3] is None else min(delta[3], position)
+                    delta[4] += position
+                    delta[5] += 1
+        
+        now = datetime.now().isoformat()
+        # SQLite evaluates every SET expression against the pre-update row
+        self.conn.executemany('''
+            UPDATE players SET
+                total_races_participated = total_races_participated + ?1,
+                total_wagered = total_wagered + ?2,
+                total_prizes_won = total_prizes_won + ?3,
+                best_position = MIN(COALESCE(best_position, ?4), COALESCE(?4, best_position)),
+                -- Averaged over participations with a position, like AVG(position) on rebuild
+                avg_position = CASE
+                    WHEN ?8 = 0 THEN avg_position
+                    WHEN positioned_races > 0
+                    THEN (avg_position * positioned_races + ?5) / (positioned_races + ?8)
+                    ELSE CAST(?5 AS REAL) / ?8
+                END,
+                positioned_races = positioned_races + ?8,
+                roi_percentage = CASE
+                    WHEN total_wagered + ?2 > 0 THEN (((total_prizes_won + ?3) / (total_wagered + ?2)) - 1) * 100
                     ELSE 0
-                END
-        ''')
+                END,
+                updated_at = ?6
+            WHERE player_id = ?7
+        ''', [(count, wagered, prizes, best, position_sum, now, player_id, positioned)
+              for player_id, (count, wagered, prizes, best, position_sum, positioned) in player_deltas.items()
+              if player_id not in rebuild_players])
+        
+        self.conn.executemany('''
+            UPDATE sponsors SET
+                total_races_sponsored = total_races_sponsored + ?1,
+                total_prize_pool = total_prize_pool + ?2,
+                avg_prize_per_race = (total_prize_pool + ?2) / (total_races_sponsored + ?1),
+                updated_at = ?3
+            WHERE sponsor_id = ?4
+        ''', [(count, prize_pool, now, sponsor_id)
+              for sponsor_id, (count, prize_pool) in sponsor_deltas.items()
+              if sponsor_id not in rebuild_sponsors])
+        
+        if rebuild_players:
+            self.update_player_statistics(rebuild_players)
+        rebuild_sponsors.discard(None)
+        if rebuild_sponsors:
+            self.update_sponsor_statistics(rebuild_sponsors)
+    
+    @serialized_write
+    def rebuild_statistics(self):
+        """Recompute every player and sponsor aggregate from scratch (repair command)."""
+        self.update_player_statistics()
+        self.update_sponsor_statistics()
+        self.conn.commit()
+        print("✅ Player and sponsor statistics rebuilt")
+    
+    def _id_filters(self, column: str, ids: Optional[Iterable[str]]) -> Iterator[Tuple[str, list]]:
+        """
+        WHERE clauses restricting an update to some IDs (one clause for all rows when ids is None).
+        IDs are split into chunks of 500, like _snapshot_existing_races, to stay under SQLite's variable limit.
+        """
+        if ids is None:
+            yield '', []
+            return
+        ids = list(ids)
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset:offset + 500]
+            yield f"WHERE {column} IN ({','.join('?' * len(chunk))})", chunk
+    
+    def update_player_statistics(self, player_ids: Optional[Iterable[str]] = None):
+        """Recompute aggregated player statistics, for all players or only `player_ids`."""
+        for where, params in self._id_filters('player_id', player_ids):
+            self.conn.execute(f'''
+                UPDATE players SET 
+                    total_races_participated = (
+                        SELECT COUNT(*) FROM race_participants WHERE player_id = players.player_id
+                    ),
+                    total_wagered = (
+                        SELECT COALESCE(SUM(total_wagered), 0) FROM race_participants WHERE player_id = players.player_id
+                    ),
+                    total_prizes_won = (
+                        SELECT COALESCE(SUM(winner_amount), 0) FROM race_participants WHERE player_id = players.player_id
+                    ),
+                    -- 999 stands for no position, as in the column defaults the incremental path keeps
+                    best_position = COALESCE((
+                        SELECT MIN(position) FROM race_participants WHERE player_id = players.player_id
+                    ), 999),
+                    avg_position = COALESCE((
+                        SELECT AVG(position) FROM race_participants WHERE player_id = players.player_id
+                    ), 999),
+                    positioned_races = (
+                        SELECT COUNT(position) FROM race_participants WHERE player_id = players.player_id
+                    ),
+                    updated_at = ?
+                {where}
+            ''', [datetime.now().isoformat()] + params)
+        
+            # Update ROI percentage
+            self.conn.execute(f'''
+                UPDATE players SET 
+                    roi_percentage = CASE 
+                        WHEN total_wagered > 0 THEN ((total_prizes_won / total_wagered) - 1) * 100
+                        ELSE 0
+                    END
+                {where}
+            ''', params)
+    
+    def update_sponsor_statistics(self, sponsor_ids: Optional[Iterable[str]] = None):
+        """Recompute aggregated sponsor statistics, for all sponsors or only `sponsor_ids`."""
+        for where, params in self._id_filters('sponsor_id', sponsor_ids):
+            self.conn.execute(f'''
+                UPDATE sponsors SET 
+                    total_races_sponsored = (
+                        SELECT COUNT(*) FROM races WHERE sponsor_id = sponsors.sponsor_id
+                    ),
+                    total_prize_pool = (
+                        SELECT COALESCE(SUM(prize_pool), 0) FROM races WHERE sponsor_id = sponsors.sponsor_id
+                    ),
+                    updated_at = ?
+                {where}
+            ''', [datetime.now().isoformat()] + params)
+        
+            # Update average prize per race
+            self.conn.execute(f'''
+                UPDATE sponsors SET 
+                    avg_prize_per_race = CASE 
+                        WHEN total_races_sponsored > 0 THEN total_prize_pool / total_races_sponsored
+                        ELSE 0
+                    END
+                {where}
+            ''', params)
     
     def get_top_players(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get top performing players."""
-        cursor = self.conn.execute('''
-            SELECT * FROM players 
-            WHERE total_races_participated > 0
-            ORDER BY total_prizes_won DESC, roi_percentage DESC
-            LIMIT ?
-        ''', (limit,))
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT * FROM players 
+                WHERE total_races_participated > 0
+                ORDER BY total_prizes_won DESC, roi_percentage DESC
+                LIMIT ?
+            ''', (limit,))
         
-        return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_sponsor_performance(self, sponsor_id: str) -> Dict[str, Any]:
         """Get detailed sponsor performance metrics."""
-        cursor = self.conn.execute('''
-            SELECT s.*, 
-                   COUNT(r.race_id) as races_count,
-                   AVG(r.total_competitors) as avg_competitors,
-                   AVG(r.total_wagered) as avg_total_wagered,
-                   AVG(r.prize_distribution_efficiency) as avg_efficiency
-            FROM sponsors s
-            LEFT JOIN races r ON s.sponsor_id = r.sponsor_id
-            WHERE s.sponsor_id = ?
-            GROUP BY s.sponsor_id
-        ''', (sponsor_id,))
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT s.*, 
+                       COUNT(r.race_id) as races_count,
+                       AVG(r.total_competitors) as avg_competitors,
+                       AVG(r.total_wagered) as avg_total_wagered,
+                       AVG(r.prize_distribution_efficiency) as avg_efficiency
+                FROM sponsors s
+                LEFT JOIN races r ON s.sponsor_id = r.sponsor_id
+                WHERE s.sponsor_id = ?
+                GROUP BY s.sponsor_id
+            ''', (sponsor_id,))
         
-        result = cursor.fetchone()
-        return dict(result) if result else {}
+            result = cursor.fetchone()
+            return dict(result) if result else {}
     
     def get_player_race_history(self, player_id: str) -> List[Dict[str, Any]]:
         """Get complete race history for a player."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT rp.*, r.race_name, r.prize_pool, r.start_date, r.total_competitors
+                FROM race_participants rp
+                JOIN races r ON rp.race_id = r.race_id
+                WHERE rp.player_id = ?
+                ORDER BY r.start_date DESC
+            ''', (player_id,))
+        
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def load_race_records(self) -> List[RaceRecord]:
+        """
+        Load every stored race as a compact RaceRecord, in insertion order.
+        
+        Participations do not record VIP level or the name raced under, so
+        competitors carry their player's current display name and VIP level.
+        """
+        with self.pool.reader() as conn:
+            # One read transaction, so races and participants come from the same snapshot
+            snapshot = not conn.in_transaction
+            if snapshot:
+                conn.execute('BEGIN')
+            try:
+                competitors: Dict[str, List[CompetitorRecord]] = {}
+                for race_id, *fields in conn.execute('''
+                    SELECT rp.race_id, rp.player_id, p.display_name, rp.total_wagered, rp.winner_amount,
+                           COALESCE(rp.position, 999), COALESCE(p.vip_level, 'UNKNOWN')
+                    FROM race_participants rp
+                    JOIN players p ON p.player_id = rp.player_id
+                    ORDER BY rp.id
+                '''):
+                    competitors.setdefault(race_id, []).append(CompetitorRecord(*map(interned, fields)))
+                
+                return [
+                    RaceRecord(race_id, race_name, prize_pool, interned(currency_code), interned(sponsor),
+                               start_date, end_date, tuple(competitors.get(race_id, ())))
+                    for race_id, race_name, prize_pool, currency_code, sponsor, start_date, end_date in conn.execute('''
+                        SELECT r.race_id, r.race_name, r.prize_pool, COALESCE(r.currency_code, 'UNKNOWN'),
+                               s.username, r.start_date, r.end_date
+                        FROM races r
+                        LEFT JOIN sponsors s ON s.sponsor_id = r.sponsor_id
+                        ORDER BY r.rowid
+                    ''')
+                ]
+            finally:
+                if snapshot:
+                    conn.execute('COMMIT')
+    
+    @serialized_write
+    def create_collection_job(self, start_race_id: int, end_race_id: int) -> int:
+        """
+        Create a backfill job covering a race ID range.
+        IDs already in the races table are marked stored in the same statement.
+        """
+        cursor = self.conn.execute('''
+            INSERT INTO collection_jobs (start_race_id, end_race_id) VALUES (?, ?)
+        ''', (start_race_id, end_race_id))
+        job_id = cursor.lastrowid
+        
+        self.conn.execute('''
+            WITH RECURSIVE ids(race_id) AS (
+                SELECT ? UNION ALL SELECT race_id + 1 FROM ids WHERE race_id < ?
+            )
+            INSERT INTO collection_job_items (job_id, race_id, state)
+            SELECT ?, ids.race_id, CASE WHEN r.race_id IS NULL THEN 'pending' ELSE 'stored' END
+            FROM ids LEFT JOIN races r ON r.race_id = CAST(ids.race_id AS TEXT)
+        ''', (start_race_id, end_race_id, job_id))
+        
+        self.conn.commit()
+        return job_id
+    
+    def find_resumable_job(self, start_race_id: int, end_race_id: int) -> Optional[int]:
+        """Return the latest unfinished job for exactly this range, if any."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT job_id FROM collection_jobs
+                WHERE start_race_id = ? AND end_race_id = ? AND status != 'completed'
+                ORDER BY job_id DESC LIMIT 1
+            ''', (start_race_id, end_race_id))
+            row = cursor.fetchone()
+            return row['job_id'] if row else None
+    
+    @serialized_write
+    def reset_failed_job_items(self, job_id: int) -> int:
+        """Put failed items of a job back in the queue; returns how many."""
         cursor = self.conn.execute('''
-            SELECT rp.*, r.race_name, r.prize_pool, r.start_date, r.total_competitors
-            FROM race_participants rp
-            JOIN races r ON rp.race_id = r.race_id
-            WHERE rp.player_id = ?
-            ORDER BY r.start_date DESC
-        ''', (player_id,))
+            UPDATE collection_job_items SET state = 'pending', claimed_by = NULL, claimed_at = NULL
+            WHERE job_id = ? AND state = 'failed'
+        ''', (job_id,))
+        self.conn.commit()
+        return cursor.rowcount
+    
+    @serialized_write
+    def claim_job_items(self, job_id: int, worker: str, limit: int = 20,
+                        lease_seconds: float = 600) -> List[int]:
+        """
+        Lease up to `limit` unfinished race IDs of a job to one worker.
+        Safe across processes: the claim runs in an immediate (write-locked) transaction.
+        """
+        now = time.time()
+        self.conn.commit()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = self.conn.execute('''
+                SELECT race_id FROM collection_job_items
+                WHERE job_id = ? AND state IN ('pending', 'fetched')
+                  AND (claimed_at IS NULL OR claimed_at < ?)
+                ORDER BY race_id LIMIT ?
+            ''', (job_id, now - lease_seconds, limit))
+            race_ids = [row['race_id'] for row in cursor.fetchall()]
+            
+            self.conn.executemany('''
+                UPDATE collection_job_items
+                SET claimed_by = ?, claimed_at = ?, attempts = attempts + 1
+                WHERE job_id = ? AND race_id = ?
+            ''', [(worker, now, job_id, race_id) for race_id in race_ids])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
         
-        return [dict(row) for row in cursor.fetchall()]
+        return race_ids
+    
+    @serialized_write
+    def update_job_item(self, job_id: int, race_id: int, state: str, error: str = None):
+        """Record a race ID's new state within a job."""
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job item state: {state}")
+        
+        # Finished items give up their lease so progress reflects reality
+        self.conn.execute('''
+            UPDATE collection_job_items
+            SET state = ?, error = ?, updated_at = ?,
+                claimed_at = CASE WHEN ? IN ('stored', 'not_found', 'failed') THEN NULL ELSE claimed_at END
+            WHERE job_id = ? AND race_id = ?
+        ''', (state, error, datetime.now().isoformat(), state, job_id, race_id))
+        self.conn.commit()
+    
+    def get_job_progress(self, job_id: int) -> Dict[str, int]:
+        """Count a job's race IDs per state."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT state, COUNT(*) as count FROM collection_job_items
+                WHERE job_id = ? GROUP BY state
+            ''', (job_id,))
+        
+            progress = {state: 0 for state in JOB_STATES}
+            progress.update({row['state']: row['count'] for row in cursor.fetchall()})
+            return progress
+    
+    def get_failed_job_items(self, job_id: int) -> List[int]:
+        """Race IDs of a job that failed."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT race_id FROM collection_job_items WHERE job_id = ? AND state = 'failed' ORDER BY race_id
+            ''', (job_id,))
+            return [row['race_id'] for row in cursor.fetchall()]
+    
+    @serialized_write
+    def finish_collection_job(self, job_id: int) -> str:
+        """Mark a job completed once every race ID is resolved; returns its status."""
+        progress = self.get_job_progress(job_id)
+        if progress['pending'] or progress['fetched']:
+            status = 'running'
+        elif progress['failed']:
+            status = 'incomplete'  # Still resumable; failed IDs are retried on resume
+        else:
+            status = 'completed'
+        
+        self.conn.execute('''
+            UPDATE collection_jobs SET status = ?, updated_at = ? WHERE job_id = ?
+        ''', (status, datetime.now().isoformat(), job_id))
+        self.conn.commit()
+        return status
+    
+    def list_collection_jobs(self) -> List[Dict[str, Any]]:
+        """All collection jobs with their per-state progress."""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('SELECT * FROM collection_jobs ORDER BY job_id')
+            jobs = [dict(row) for row in cursor.fetchall()]
+        
+        for job in jobs:
+            job['progress'] = self.get_job_progress(job['job_id'])
+        return jobs
     
     def close(self):
-        """Close database connection."""
-        self.conn.close()
+        """Close all pooled database connections."""
+        self.pool.close()
 
 def main():
     """Test the database system."""
+    import sys
+    
     db = RaceDatabase()
     
-    # Test with sample data
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild':
+        # Repair aggregates after manual edits or an interrupted ingest
+        db.rebuild_statistics()
+        db.close()
+        return
+    
+    # Test with sample data, streamed one race at a time
     try:
-        with open('sample_races.json', 'r') as f:
-            content = f.read()
-            # Parse multiple JSON objects
-            objects = content.strip().split('},\n{')
-            for i, obj in enumerate(objects):
-                if i == 0:
-                    obj = obj + '}' if not obj.endswith('}') else obj
-                elif i == len(objects) - 1:
-                    obj = '{' + obj if not obj.startswith('{') else obj
-                else:
-                    obj = '{' + obj + '}'
-                
-                try:
-                    race_data = json.loads(obj)
-                    db.insert_race_data(race_data)
-                except json.JSONDecodeError:
-                    continue
+        db.insert_races_bulk(iter_json_objects('sample_races.json'))
         
         print("\n🏆 TOP PLAYERS:")
         top_players = db.get_top_players(5)
@@ -458,6 +1018,8 @@ def main():
         
     except FileNotFoundError:
         print("Sample races file not found")
+    except ValueError as e:
+        print(f"❌ Error parsing sample races: {e}")
     
     db.close()
 
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Streaming race pipeline: fetch → validate → normalize → batch insert → analyze.
+Every stage is a generator taking the previous one, so races flow through one
+at a time, memory stays flat however long the range is, and each batch is
+committed (and queryable) while later races are still downloading.
+"""
+
+import sys
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from gamba_api_client import GambaAPIClient
+from json_stream import iter_json_objects
+from race_accumulators import RaceAnalysisEngine
+from race_database import RaceDatabase
+from race_records import RaceRecord, race_of
+
+# A race as it moves past normalize: its getRaceById payload and its compact record
+RaceItem = Tuple[Dict[str, Any], RaceRecord]
+
+def new_pipeline_stats() -> Dict[str, Any]:
+    """Counters the pipeline stages update as races pass through."""
+    return {
+        'fetched': 0,
+        'valid': 0,
+        'not_found': 0,
+        'failed_race_ids': [],
+        'inserted': 0,
+        'insert_failures': 0,
+        'analyzed': 0
+    }
+
+def fetch_races(client: GambaAPIClient, race_ids: Iterable[int], concurrency: int = 8,
+                buffer: int = 64) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Source stage: (race_id, payload) in ID order, at most `buffer` races ahead of the consumer."""
+    return client.iter_races(race_ids, concurrency, buffer)
+
+def file_races(path: str, mmap_input: bool = False) -> Iterator[Tuple[Optional[int], Dict[str, Any]]]:
+    """Source stage: getRaceById payloads of a dump file, in the shape fetch_races yields."""
+    for race_data in iter_json_objects(path, mmap_input=mmap_input):
+        yield None, race_data
+
+def validate_races(fetched: Iterable[Tuple[Optional[int], Optional[Dict[str, Any]]]],
+                   stats: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Pass on payloads that hold a race; count failed fetches and missing races."""
+    for race_id, race_data in fetched:
+        stats['fetched'] += 1
+        if race_data is None:
+            stats['failed_race_ids'].append(race_id)
+        elif not isinstance(race_data, dict) or not race_of(race_data) or not race_of(race_data).get('id'):
+            stats['not_found'] += 1
+        else:
+            stats['valid'] += 1
+            yield race_data
+
+def normalize_races(races: Iterable[Dict[str, Any]]) -> Iterator[RaceItem]:
+    """Pair each payload with its compact RaceRecord; the payload is dropped once stored."""
+    for race_data in races:
+        yield race_data, RaceRecord.from_envelope(race_data)
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group a stream into lists of up to `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def insert_races(db: RaceDatabase, items: Iterable[RaceItem], stats: Dict[str, Any],
+                 batch_size: int = 100) -> Iterator[RaceRecord]:
+    """
+    Write races with insert_races_bulk, one transaction per batch, then pass on their records.
+
+    A batch that fails is rolled back by insert_races_bulk and its races are
+    not passed on, so analytics only ever see races that are in the database.
+    """
+    for batch in batched(items, batch_size):
+        inserted = db.insert_races_bulk([race_data for race_data, _ in batch], batch_size=len(batch))
+        if inserted != len(batch):
+            stats['insert_failures'] += len(batch)
+            continue
+        stats['inserted'] += inserted
+        for _, record in batch:
+            yield record
+
+def analyze_races(engine: RaceAnalysisEngine, records: Iterable[RaceRecord],
+                  stats: Dict[str, Any]) -> Iterator[RaceRecord]:
+    """Feed each record into the analysis accumulators and pass it on."""
+    for record in records:
+        engine.feed(record)
+        stats['analyzed'] += 1
+        yield record
+
+def drain(stream: Iterable[Any]):
+    """Pull a pipeline through to the end, keeping nothing."""
+    for _ in stream:
+        pass
+
+def run_race_pipeline(db: RaceDatabase, source: Iterable[Tuple[Optional[int], Optional[Dict[str, Any]]]],
+                      engine: Optional[RaceAnalysisEngine] = None, batch_size: int = 100) -> Dict[str, Any]:
+    """
+    Stream races from a source stage (fetch_races or file_races) into the database and analytics.
+
+    Args:
+        db: Database the races are upserted into
+        source: (race_id, payload) pairs
+        engine: Analysis engine to feed; a new one when None
+        batch_size: Races per insert transaction
+
+    Returns:
+        Pipeline counters, with the analysis results under 'analysis'
+    """
+    stats = new_pipeline_stats()
+    engine = engine or RaceAnalysisEngine()
+    records = normalize_races(validate_races(source, stats))
+    drain(analyze_races(engine, insert_races(db, records, stats, batch_size), stats))
+    stats['analysis'] = engine.results() if stats['analyzed'] else {}
+    return stats
+
+def main():
+    """Stream a range of races from the API into the race database."""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) < 2:
+        print("Usage: python race_pipeline.py START_ID END_ID [--concurrency=N] [--batch=N]")
+        return
+    start_id, end_id = int(args[0]), int(args[1])
+    concurrency = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--concurrency=')), 8)
+    batch_size = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--batch=')), 100)
+
+    client = GambaAPIClient()
+    db = RaceDatabase()
+    print(f"🚰 Streaming races {start_id} to {end_id} ({concurrency} concurrent requests, batches of {batch_size})")
+    stats = run_race_pipeline(db, fetch_races(client, range(start_id, end_id + 1), concurrency), batch_size=batch_size)
+    db.close()
+
+    print(f"\n✅ Stored {stats['inserted']}/{stats['fetched']} races")
+    print(f"⚠️ Not found: {stats['not_found']}, failed fetches: {len(stats['failed_race_ids'])}, "
+          f"failed inserts: {stats['insert_failures']}")
+    summary = stats['analysis'].get('summary')
+    if summary:
+        print(f"📊 {summary['unique_players']} players, ${summary['total_wagered']:,.2f} wagered")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compact typed records of races and competitors.
+Loaders keep only the fields the analyzers read, in slotted dataclasses,
+instead of the full nested getRaceById response dicts.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, Union
+
+def interned(value):
+    """Share one copy of strings repeated across races (names, IDs, levels)."""
+    return sys.intern(value) if type(value) is str else value
+
+def race_of(race_obj: Dict[str, Any]) -> Dict[str, Any]:
+    """The race inside a getRaceById response envelope."""
+    return race_obj.get('data', {}).get('getRaceById', {})
+
+@dataclass(slots=True)
+class CompetitorRecord:
+    """One competitor's standing in a race, with the analyzer's defaults applied."""
+
+    player_id: Optional[str]  # competitor_id, or id when that is missing
+    display_name: str
+    total_wagered: Any
+    winner_amount: Any
+    position: Any
+    vip_level_name: str
+
+    @classmethod
+    def from_competitor(cls, comp: Dict[str, Any]) -> 'CompetitorRecord':
+        return cls(
+            interned(comp.get('competitor_id') or comp.get('id')),
+            interned(comp.get('display_name', 'Unknown')),
+            comp.get('total_wagered', 0),
+            comp.get('winner_amount', 0),
+            comp.get('position', 999),
+            interned(comp.get('vip_level_name', 'UNKNOWN'))
+        )
+
+@dataclass(slots=True)
+class RaceRecord:
+    """A race with the fields the analyzers read; avatars, typenames and the like are dropped."""
+
+    id: Optional[str]
+    race_name: Optional[str]
+    prize_pool: Any
+    currency_code: str
+    sponsor_username: Optional[str]
+    start_date: Optional[str]
+    end_date: Optional[str]
+    competitors: Tuple[CompetitorRecord, ...]
+
+    @classmethod
+    def from_race(cls, race: Dict[str, Any]) -> 'RaceRecord':
+        """Record of a race dict (the getRaceById object itself)."""
+        return cls(
+            race.get('id'),
+            race.get('race_name'),
+            race.get('prize_pool', 0),
+            interned(race.get('currency', {}).get('code', 'UNKNOWN')),
+            interned(race.get('sponsor', {}).get('username')),
+            race.get('start_date'),
+            race.get('end_date'),
+            tuple(CompetitorRecord.from_competitor(comp) for comp in race.get('competitors', []))
+        )
+
+    @classmethod
+    def from_envelope(cls, race_obj: Dict[str, Any]) -> 'RaceRecord':
+        """Record of a race object wrapped in its getRaceById response envelope."""
+        return cls.from_race(race_of(race_obj))
+
+def as_race_record(race: Union[RaceRecord, Dict[str, Any]]) -> RaceRecord:
+    """A RaceRecord as it is, or the record of a getRaceById response envelope."""
+    return race if type(race) is RaceRecord else RaceRecord.from_envelope(race)
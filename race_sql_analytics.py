@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Race analytics pushed down into SQL over a RaceDatabase.
+Aggregates are computed by SQLite with GROUP BY and window functions, so
+races are never materialized as nested dicts in Python.
+"""
+
+import math
+import sqlite3
+from typing import Dict, Any
+
+def has_races(conn: sqlite3.Connection) -> bool:
+    return conn.execute('SELECT EXISTS (SELECT 1 FROM races)').fetchone()[0] == 1
+
+def _summary(conn: sqlite3.Connection) -> Dict[str, Any]:
+    total_races, total_prize_pool = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(prize_pool), 0) FROM races'
+    ).fetchone()
+    total_competitors, unique_players, total_wagered = conn.execute('''
+        SELECT COUNT(*), COUNT(DISTINCT player_id), COALESCE(SUM(total_wagered), 0)
+        FROM race_participants
+    ''').fetchone()
+    currencies = [row[0] for row in conn.execute('''
+        SELECT COALESCE(currency_code, 'UNKNOWN') AS code FROM races
+        GROUP BY code ORDER BY MIN(rowid)
+    ''')]
+    return {
+        "total_races": total_races,
+        "total_prize_pool": total_prize_pool,
+        "total_competitors": total_competitors,
+        "unique_players": unique_players,
+        "total_wagered": total_wagered,
+        "avg_prize_per_race": total_prize_pool / max(total_races, 1),
+        "avg_competitors_per_race": total_competitors / max(total_races, 1),
+        "avg_wager_per_competitor": total_wagered / max(total_competitors, 1),
+        "currencies_used": currencies,
+        "total_prize_to_wager_ratio": (total_prize_pool / max(total_wagered, 1)) * 100
+    }
+
+def _player_analytics(conn: sqlite3.Connection, top_count: int = 20) -> Dict[str, Any]:
+    # One aggregation pass; window functions rank the players and summarize
+    # all of them, with ties broken by first appearance like the JSON analyzer
+    rows = conn.execute('''
+        WITH stats AS (
+            SELECT player_id,
+                   COUNT(*) AS races,
+                   SUM(total_wagered) AS wagered,
+                   SUM(winner_amount) AS prizes,
+                   MIN(COALESCE(position, 999)) AS best_position,
+                   AVG(COALESCE(position, 999)) AS avg_position,
+                   MIN(id) AS first_seen
+            FROM race_participants
+            GROUP BY player_id
+        ), ranked AS (
+            SELECT s.*, p.display_name, COALESCE(p.vip_level, 'UNKNOWN') AS vip_level,
+                   CASE WHEN s.wagered > 0 THEN (s.prizes / s.wagered - 1) * 100 ELSE 0 END AS roi,
+                   COUNT(*) OVER () AS unique_players,
+                   AVG(s.races) OVER () AS avg_races,
+                   ROW_NUMBER() OVER (ORDER BY s.prizes DESC, s.first_seen) AS prize_rank,
+                   ROW_NUMBER() OVER (ORDER BY s.races DESC, s.first_seen) AS activity_rank,
+                   ROW_NUMBER() OVER (
+                       ORDER BY CASE WHEN s.wagered > 0 THEN (s.prizes / s.wagered - 1) * 100 ELSE 0 END DESC,
+                                s.first_seen
+                   ) AS roi_rank
+            FROM stats s
+            JOIN players p ON p.player_id = s.player_id
+        )
+        SELECT * FROM ranked
+        WHERE prize_rank <= ? OR activity_rank = 1 OR roi_rank = 1
+        ORDER BY prize_rank
+    ''', (top_count,)).fetchall()
+
+    if not rows:
+        return {"top_performers": [], "total_unique_players": 0, "avg_races_per_player": 0,
+                "most_active_player": "None", "highest_roi_player": "None"}
+
+    top = [row for row in rows if row['prize_rank'] <= top_count]
+    return {
+        "top_performers": [
+            {
+                "player_name": row['display_name'],
+                "stats": {
+                    'races_participated': row['races'],
+                    'total_wagered': row['wagered'],
+                    'total_prizes': row['prizes'],
+                    'best_position': row['best_position'],
+                    'avg_position': row['avg_position'],
+                    # Participations do not record VIP level, so this is the player's current one
+                    'vip_levels': [row['vip_level']],
+                    'roi_percentage': row['roi']
+                }
+            }
+            for row in top
+        ],
+        "total_unique_players": rows[0]['unique_players'],
+        "avg_races_per_player": rows[0]['avg_races'],
+        "most_active_player": next(row['display_name'] for row in rows if row['activity_rank'] == 1),
+        "highest_roi_player": next(row['display_name'] for row in rows if row['roi_rank'] == 1)
+    }
+
+def _prize_analysis(conn: sqlite3.Connection) -> Dict[str, Any]:
+    races = conn.execute('''
+        SELECT race_id, prize_pool, distributed,
+               distributed / MAX(prize_pool, 1) * 100 AS efficiency,
+               SUM(prize_pool) OVER () AS total_pools,
+               SUM(distributed) OVER () AS total_distributed,
+               AVG(distributed / MAX(prize_pool, 1) * 100) OVER () AS avg_efficiency
+        FROM (
+            SELECT r.rowid AS stored, r.race_id, r.prize_pool,
+                   COALESCE(SUM(rp.winner_amount), 0) AS distributed
+            FROM races r
+            LEFT JOIN race_participants rp ON rp.race_id = r.race_id
+            GROUP BY r.race_id
+        )
+        ORDER BY stored
+    ''').fetchall()
+
+    by_position = conn.execute('''
+        SELECT COALESCE(position, 999) AS pos, AVG(winner_amount), MAX(winner_amount),
+               MIN(winner_amount), COUNT(*)
+        FROM race_participants
+        GROUP BY pos
+        ORDER BY MIN(id)
+    ''').fetchall()
+
+    return {
+        "total_prize_pools": races[0]['total_pools'] if races else 0,
+        "total_distributed": races[0]['total_distributed'] if races else 0,
+        "avg_distribution_efficiency": races[0]['avg_efficiency'] if races else 0,
+        "prize_by_position": {
+            pos: {
+                "avg_prize": avg_prize,
+                "max_prize": max_prize,
+                "min_prize": min_prize,
+                "total_awards": awards
+            }
+            for pos, avg_prize, max_prize, min_prize, awards in by_position
+        },
+        "race_efficiency_details": [
+            {
+                'race_id': row['race_id'],
+                'prize_pool': row['prize_pool'],
+                'distributed_prizes': row['distributed'],
+                'efficiency': row['efficiency']
+            }
+            for row in races
+        ]
+    }
+
+def _competition_metrics(conn: sqlite3.Connection) -> Dict[str, Any]:
+    # Squared deviations from each race's mean (a window AVG) give the sample stdev
+    rows = conn.execute('''
+        SELECT r.race_id, r.race_name, w.competitors, w.total, w.mean,
+               w.highest - w.lowest AS spread,
+               CASE WHEN w.total > 0 THEN w.highest * 100 / w.total ELSE 0 END AS concentration,
+               w.squares
+        FROM races r
+        JOIN (
+            SELECT race_id, COUNT(*) AS competitors, SUM(wagered) AS total, MAX(mean) AS mean,
+                   MAX(wagered) AS highest, MIN(wagered) AS lowest,
+                   SUM((wagered - mean) * (wagered - mean)) AS squares
+            FROM (
+                SELECT race_id, COALESCE(total_wagered, 0) AS wagered,
+                       AVG(COALESCE(total_wagered, 0)) OVER (PARTITION BY race_id) AS mean
+                FROM race_participants
+            )
+            GROUP BY race_id
+        ) w ON w.race_id = r.race_id
+        ORDER BY r.rowid
+    ''')
+
+    details = []
+    for race_id, race_name, competitors, total, mean, spread, concentration, squares in rows:
+        stdev = math.sqrt(squares / (competitors - 1)) if competitors > 1 else 0
+        details.append({
+            'race_id': race_id,
+            'race_name': race_name,
+            'competitor_count': competitors,
+            'total_wagered': total,
+            'avg_wager': mean,
+            'wager_spread': spread,
+            'wager_concentration': concentration,
+            'competition_intensity': competitors * stdev
+        })
+    if not details:
+        raise ValueError("No races with competitors to compare")
+
+    return {
+        "avg_competitors_per_race": sum(d['competitor_count'] for d in details) / len(details),
+        "most_competitive_race": max(details, key=lambda d: d['competition_intensity']),
+        "highest_stakes_race": max(details, key=lambda d: d['total_wagered']),
+        "competition_details": details
+    }
+
+def _vip_analysis(conn: sqlite3.Connection) -> Dict[str, Any]:
+    # Participations do not record VIP level, so players count under their current one.
+    # Rows are aggregated per player first, so only one row per player joins players.
+    levels = conn.execute('''
+        SELECT COALESCE(p.vip_level, 'UNKNOWN') AS vip, SUM(s.races), SUM(s.wagered),
+               SUM(s.prizes), CAST(SUM(s.position_sum) AS REAL) / SUM(s.races)
+        FROM (
+            SELECT player_id, COUNT(*) AS races, SUM(total_wagered) AS wagered,
+                   SUM(winner_amount) AS prizes, SUM(COALESCE(position, 999)) AS position_sum,
+                   MIN(id) AS first_seen
+            FROM race_participants
+            GROUP BY player_id
+        ) s
+        JOIN players p ON p.player_id = s.player_id
+        GROUP BY vip
+        ORDER BY MIN(s.first_seen)
+    ''').fetchall()
+
+    return {
+        vip_level: {
+            'player_count': count,
+            'total_wagered': wagered,
+            'total_prizes': prizes,
+            'avg_position': avg_position,
+            'avg_wager': wagered / count,
+            'avg_prize': prizes / count,
+            'roi_percentage': ((prizes / max(wagered, 1)) - 1) * 100
+        }
+        for vip_level, count, wagered, prizes, avg_position in levels
+    }
+
+def _sponsor_analysis(conn: sqlite3.Connection, username: str = 'SupItsJ',
+                      vip_level: str = 'DIAMOND 1') -> Dict[str, Any]:
+    races, total = conn.execute('''
+        SELECT COUNT(*), COALESCE(SUM(r.prize_pool), 0)
+        FROM races r
+        JOIN sponsors s ON s.sponsor_id = r.sponsor_id
+        WHERE s.username = ?
+    ''', (username,)).fetchone()
+    return {
+        "races_sponsored": races,
+        "total_prize_investment": total,
+        "avg_prize_per_race": total / max(races, 1),
+        "sponsor_username": username,
+        "sponsor_vip_level": vip_level
+    }
+
+def sql_results(database) -> Dict[str, Any]:
+    """Race analyses of a RaceDatabase, keyed like RaceAnalysisEngine.results()."""
+    with database.pool.reader() as conn:
+        # One read transaction, so every query sees the same snapshot under concurrent ingestion
+        snapshot = not conn.in_transaction
+        if snapshot:
+            conn.execute('BEGIN')
+        try:
+            return {
+                'summary': _summary(conn),
+                'player_analytics': _player_analytics(conn),
+                'prize_analysis': _prize_analysis(conn),
+                'competition_metrics': _competition_metrics(conn),
+                'vip_analysis': _vip_analysis(conn),
+                'sponsor_analysis': _sponsor_analysis(conn)
+            }
+        finally:
+            if snapshot:
+                conn.execute('COMMIT')
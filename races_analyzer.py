@@ -5,102 +5,60 @@ Analyzes race performance, player standings, and prize distributions.
 """
 
 import json
-import sqlite3
-from typing import Dict, Any, List, Tuple
+import os
+import pickle
+from typing import Dict, Any, List, Tuple, Optional, Set, Union
 from datetime import datetime, timedelta
-from collections import defaultdict
-import statistics
+from json_stream import iter_json_objects
+from player_index import PlayerIndex
+from race_accumulators import RaceAnalysisEngine
+from race_records import RaceRecord, race_of
+from race_columns import CompetitorColumns, columnar_results, NUMPY_AVAILABLE
+from race_database import RaceDatabase
+from race_sql_analytics import has_races, sql_results
+from sqlite_profile import connect
+
+# Bump when accumulator state changes shape, so stale persisted state is rebuilt
+ANALYSIS_STATE_VERSION = 4
 
 class RaceAnalyzer:
     """Comprehensive race data analyzer with advanced metrics."""
 
-    def __init__(self, races_file: str = 'races.json'):
+    def __init__(self, races_file: Union[str, RaceDatabase] = 'races.json', cache_db: str = 'races_cache.db',
+                 mmap_input: bool = False, backend: str = 'exact', workers: int = 1):
+        # A RaceDatabase source is analyzed in SQL; its races are never loaded into memory
+        self.database = races_file if isinstance(races_file, RaceDatabase) else None
+        if self.database is not None:
+            races_file = self.database.db_path
         self.races_file = races_file
-        self.races_data = self.load_races_data()
+        self.cache_db = cache_db
+        self.mmap_input = mmap_input  # Map the races file instead of reading it (dumps larger than RAM)
+        if backend == 'numpy' and not NUMPY_AVAILABLE:
+            print("⚠️ numpy is not installed, falling back to the exact backend")
+            backend = 'exact'
+        self.backend = backend  # 'exact' accumulators, or 'numpy' columnar arrays
+        self.workers = workers  # Processes for the exact backend; results do not depend on it
+        self.races_data = self.load_races_data() if self.database is None else []
         self.setup_database()
 
-    def load_races_data(self) -> List[Dict[str, Any]]:
-        """Load and parse races data from JSON file."""
-        try:
-            with open(self.races_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+    def load_races_data(self) -> List[RaceRecord]:
+        """
+        Load races from a JSON dump, streaming one top-level object at a time.
 
-            # Handle multiple JSON objects in file
+        Each race is kept as a compact RaceRecord; response dicts are dropped
+        as soon as their analyzed fields are copied out.
+        """
+        try:
             races = []
-            if content.strip().startswith('['):
-                # Array format
-                races = json.loads(content)
-            else:
-                # Try to parse as single object first
-                try:
-                    data = json.loads(content)
-
-                    # Check for new format with getFinishedExclusiveRacesByCreator
-                    if 'data' in data and 'getFinishedExclusiveRacesByCreator' in data['data']:
-                        races_list = data['data']['getFinishedExclusiveRacesByCreator']
-                        # Convert to old format for compatibility
-                        for race in races_list:
-                            race_obj = {
-                                'data': {
-                                    'getRaceById': race
-                                }
-                            }
-                            races.append(race_obj)
-                        print(f"✅ Parsed new format with {len(races_list)} races")
-
-                    # Check for old format with getRaceById
-                    elif 'data' in data and 'getRaceById' in data['data']:
-                        races = [data]
-                        print(f"✅ Parsed single race in old format")
-
-                    else:
-                        races = [data]
-                        print(f"✅ Parsed single object")
-
-                except json.JSONDecodeError:
-                    # Multiple objects format - split by },\n
-                    content = content.strip()
-                    if content.startswith('{'):
-                        # Split by pattern },\n (end of one object, start of next)
-                        parts = content.split('},\n{')
-
-                        for i, part in enumerate(parts):
-                            try:
-                                # Clean up the part
-                                part = part.strip()
-
-                                if i == 0:
-                                    # First part - ensure it ends with }
-                                    if not part.endswith('}'):
-                                        part = part + '}'
-                                elif i == len(parts) - 1:
-                                    # Last part - ensure it starts with {
-                                    if not part.startswith('{'):
-                                        part = '{' + part
-                                else:
-                                    # Middle parts - ensure proper braces
-                                    if not part.startswith('{'):
-                                        part = '{' + part
-                                    if not part.endswith('}'):
-                                        part = part + '}'
-
-                                # Try to parse the JSON object
-                                race_data = json.loads(part)
-                                races.append(race_data)
-                                print(f"✅ Parsed race object {i+1}")
-
-                            except json.JSONDecodeError as e:
-                                print(f"⚠️ Failed to parse race object {i+1}: {e}")
-                                # Try alternative parsing
-                                try:
-                                    # Maybe it's missing trailing comma/brace
-                                    if not part.endswith('}') and not part.endswith('},'):
-                                        alt_part = part + '}'
-                                        race_data = json.loads(alt_part)
-                                        races.append(race_data)
-                                        print(f"✅ Parsed race object {i+1} (alternative)")
-                                except:
-                                    continue
+            for data in iter_json_objects(self.races_file, mmap_input=self.mmap_input):
+                # New format with getFinishedExclusiveRacesByCreator
+                if 'data' in data and 'getFinishedExclusiveRacesByCreator' in data['data']:
+                    races_list = data['data']['getFinishedExclusiveRacesByCreator']
+                    races.extend(RaceRecord.from_race(race) for race in races_list)
+                    print(f"✅ Parsed new format with {len(races_list)} races")
+                else:
+                    # getRaceById responses (old format)
+                    races.append(RaceRecord.from_race(race_of(data)))
 
             print(f"✅ Loaded {len(races)} race records")
             return races
@@ -114,7 +72,7 @@ class RaceAnalyzer:
 
     def setup_database(self):
         """Setup SQLite database for race analytics."""
-        self.conn = sqlite3.connect('races_cache.db')
+        self.conn = connect(self.cache_db)
         self.conn.execute('''
             CREATE TABLE IF NOT EXISTS race_analytics (
                 race_id TEXT PRIMARY KEY,
@@ -144,238 +102,99 @@ class RaceAnalyzer:
                 PRIMARY KEY (player_id, race_id)
             )
         ''')
+
+        # Accumulator state per races file, with the race IDs already folded into it
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_state (
+                source TEXT PRIMARY KEY,
+                version INTEGER,
+                race_count INTEGER,
+                state BLOB,  -- pickled race IDs and accumulator state
+                updated_at TEXT
+            )
+        ''')
+
+        if self.database is not None:
+            # Players are identified by the index the race database stores them under
+            self.players = self.database.players
+        else:
+            # Player keys in the saved accumulator state resolve through this index
+            PlayerIndex.create_table(self.conn)
+            self.players = PlayerIndex.load(self.conn)
         self.conn.commit()
 
-    def analyze_all_races(self) -> Dict[str, Any]:
-        """Perform comprehensive analysis of all race data."""
+    def analyze_all_races(self, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Perform comprehensive analysis of all race data in a single pass.
+
+        With incremental=True, accumulator state saved by the previous run on
+        this races file is restored and only races not yet folded in are
+        processed. Folded races are assumed final (finished races do not
+        change); if any of them disappeared from the file, state is rebuilt.
+
+        The numpy backend always analyzes every race in vectorized form; its
+        floats match the exact backend up to rounding, and it keeps no state.
+        A RaceDatabase source is always analyzed with aggregate SQL queries.
+        With workers > 1 the exact backend analyzes shards of the new races in
+        separate processes and merges them exactly into the same result.
+        """
+        if self.database is not None:
+            with self.database.pool.reader() as conn:
+                if not has_races(conn):
+                    return {"error": "No race data available"}
+            return self._build_analysis(sql_results(self.database))
+
         if not self.races_data:
             return {"error": "No race data available"}
 
-        analysis = {
-            "summary": self._calculate_race_summary(),
-            "player_analytics": self._analyze_player_performance(),
-            "prize_analysis": self._analyze_prize_distribution(),
-            "competition_metrics": self._calculate_competition_metrics(),
-            "vip_analysis": self._analyze_vip_levels(),
-            "temporal_analysis": self._analyze_temporal_patterns(),
-            "sponsor_analysis": self._analyze_sponsor_performance(),
-            "cross_race_insights": self._generate_cross_race_insights(),
-            "last_updated": datetime.now().isoformat()
-        }
+        engine = RaceAnalysisEngine(players=self.players)
+        race_ids = [race.id for race in self.races_data]
+        # Races without an ID cannot be tracked, so they force a full analysis
+        persist = incremental and self.backend == 'exact' and None not in race_ids
+
+        folded: Set[str] = set()
+        new_races = self.races_data
+        if persist:
+            saved = self._load_analysis_state()
+            if saved and saved[0] <= set(race_ids):
+                folded, state = saved
+                engine.set_state(state)
+                new_races = [race for race, race_id in zip(self.races_data, race_ids)
+                             if race_id not in folded]
+                print(f"♻️ Resumed analysis of {len(folded)} races, {len(new_races)} new")
+            elif saved:
+                print("⚠️ Previously analyzed races are missing from the file, rebuilding analysis")
+
+        if self.backend == 'numpy':
+            results = columnar_results(CompetitorColumns.from_races(new_races))
+        else:
+            engine.feed_parallel(new_races, self.workers)
+            results = engine.results()
+
+        analysis = self._build_analysis(results)
 
         # Cache results
-        self._cache_analysis_results(analysis)
+        self.players.save(self.conn)
+        self._cache_analysis_results(analysis, new_races)
+        if persist and (new_races or not folded):
+            self._save_analysis_state(engine, folded.union(race_ids))
 
         return analysis
 
-    def _calculate_race_summary(self) -> Dict[str, Any]:
-        """Calculate overall race summary statistics."""
-        total_races = len(self.races_data)
-        total_prize_pool = 0
-        total_competitors = 0
-        total_wagered = 0
-        currencies = set()
-
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            total_prize_pool += race.get('prize_pool', 0)
-            competitors = race.get('competitors', [])
-            total_competitors += len(competitors)
-
-            race_wagered = sum(comp.get('total_wagered', 0) for comp in competitors)
-            total_wagered += race_wagered
-
-            currency = race.get('currency', {}).get('code', 'UNKNOWN')
-            currencies.add(currency)
-
-        return {
-            "total_races": total_races,
-            "total_prize_pool": total_prize_pool,
-            "total_competitors": total_competitors,
-            "unique_players": len(self._get_unique_players()),
-            "total_wagered": total_wagered,
-            "avg_prize_per_race": total_prize_pool / max(total_races, 1),
-            "avg_competitors_per_race": total_competitors / max(total_races, 1),
-            "avg_wager_per_competitor": total_wagered / max(total_competitors, 1),
-            "currencies_used": list(currencies),
-            "total_prize_to_wager_ratio": (total_prize_pool / max(total_wagered, 1)) * 100
-        }
-
-    def _analyze_player_performance(self) -> Dict[str, Any]:
-        """Analyze individual player performance across races."""
-        player_stats = defaultdict(lambda: {
-            'races_participated': 0,
-            'total_wagered': 0,
-            'total_prizes': 0,
-            'best_position': float('inf'),
-            'avg_position': 0,
-            'positions': [],
-            'vip_levels': set(),
-            'roi_percentage': 0
-        })
-
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            competitors = race.get('competitors', [])
-
-            for comp in competitors:
-                player_name = comp.get('display_name', 'Unknown')
-                stats = player_stats[player_name]
-
-                stats['races_participated'] += 1
-                stats['total_wagered'] += comp.get('total_wagered', 0)
-                stats['total_prizes'] += comp.get('winner_amount', 0)
-                stats['positions'].append(comp.get('position', 999))
-                stats['vip_levels'].add(comp.get('vip_level_name', 'UNKNOWN'))
-
-                position = comp.get('position', 999)
-                if position < stats['best_position']:
-                    stats['best_position'] = position
-
-        # Calculate derived metrics
-        for player, stats in player_stats.items():
-            if stats['positions']:
-                stats['avg_position'] = statistics.mean(stats['positions'])
-            if stats['total_wagered'] > 0:
-                stats['roi_percentage'] = ((stats['total_prizes'] / stats['total_wagered']) - 1) * 100
-            stats['vip_levels'] = list(stats['vip_levels'])
-
-        # Sort by total prizes won
-        top_performers = sorted(
-            player_stats.items(),
-            key=lambda x: x[1]['total_prizes'],
-            reverse=True
-        )[:20]
-
-        # Calculate averages safely
-        races_per_player = [s['races_participated'] for s in player_stats.values()]
-        avg_races = statistics.mean(races_per_player) if races_per_player else 0
-
-        most_active = max(player_stats.items(), key=lambda x: x[1]['races_participated'])[0] if player_stats else "None"
-        highest_roi = max(player_stats.items(), key=lambda x: x[1]['roi_percentage'])[0] if player_stats else "None"
-
-        return {
-            "top_performers": [
-                {
-                    "player_name": name,
-                    "stats": stats
-                }
-                for name, stats in top_performers
-            ],
-            "total_unique_players": len(player_stats),
-            "avg_races_per_player": avg_races,
-            "most_active_player": most_active,
-            "highest_roi_player": highest_roi
-        }
-
-    def _analyze_prize_distribution(self) -> Dict[str, Any]:
-        """Analyze prize pool distribution and efficiency."""
-        prize_data = []
-        position_prizes = defaultdict(list)
-
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            prize_pool = race.get('prize_pool', 0)
-            competitors = race.get('competitors', [])
-
-            race_prizes = sum(comp.get('winner_amount', 0) for comp in competitors)
-            prize_data.append({
-                'race_id': race.get('id'),
-                'prize_pool': prize_pool,
-                'distributed_prizes': race_prizes,
-                'efficiency': (race_prizes / max(prize_pool, 1)) * 100
-            })
-
-            for comp in competitors:
-                position = comp.get('position', 999)
-                prize = comp.get('winner_amount', 0)
-                position_prizes[position].append(prize)
-
-        return {
-            "total_prize_pools": sum(p['prize_pool'] for p in prize_data),
-            "total_distributed": sum(p['distributed_prizes'] for p in prize_data),
-            "avg_distribution_efficiency": statistics.mean([p['efficiency'] for p in prize_data]),
-            "prize_by_position": {
-                pos: {
-                    "avg_prize": statistics.mean(prizes),
-                    "max_prize": max(prizes),
-                    "min_prize": min(prizes),
-                    "total_awards": len(prizes)
-                }
-                for pos, prizes in position_prizes.items() if prizes
-            },
-            "race_efficiency_details": prize_data
-        }
-
-    def _calculate_competition_metrics(self) -> Dict[str, Any]:
-        """Calculate competition intensity and engagement metrics."""
-        competition_data = []
-
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            competitors = race.get('competitors', [])
-
-            if not competitors:
-                continue
-
-            wagers = [comp.get('total_wagered', 0) for comp in competitors]
-            positions = [comp.get('position', 999) for comp in competitors]
-
-            # Calculate competition metrics
-            wager_spread = max(wagers) - min(wagers) if wagers else 0
-            wager_concentration = (max(wagers) / sum(wagers)) * 100 if sum(wagers) > 0 else 0
-
-            competition_data.append({
-                'race_id': race.get('id'),
-                'race_name': race.get('race_name'),
-                'competitor_count': len(competitors),
-                'total_wagered': sum(wagers),
-                'avg_wager': statistics.mean(wagers),
-                'wager_spread': wager_spread,
-                'wager_concentration': wager_concentration,
-                'competition_intensity': len(competitors) * statistics.stdev(wagers) if len(wagers) > 1 else 0
-            })
-
+    def _build_analysis(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """The exported analysis document around a backend's results."""
         return {
-            "avg_competitors_per_race": statistics.mean([c['competitor_count'] for c in competition_data]),
-            "most_competitive_race": max(competition_data, key=lambda x: x['competition_intensity']),
-            "highest_stakes_race": max(competition_data, key=lambda x: x['total_wagered']),
-            "competition_details": competition_data
+            "summary": results['summary'],
+            "player_analytics": results['player_analytics'],
+            "prize_analysis": results['prize_analysis'],
+            "competition_metrics": results['competition_metrics'],
+            "vip_analysis": results['vip_analysis'],
+            "temporal_analysis": self._analyze_temporal_patterns(),
+            "sponsor_analysis": results['sponsor_analysis'],
+            "cross_race_insights": self._generate_cross_race_insights(),
+            "last_updated": datetime.now().isoformat()
         }
 
-    def _analyze_vip_levels(self) -> Dict[str, Any]:
-        """Analyze VIP level distribution and performance."""
-        vip_stats = defaultdict(lambda: {
-            'player_count': 0,
-            'total_wagered': 0,
-            'total_prizes': 0,
-            'avg_position': 0,
-            'positions': []
-        })
-
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            competitors = race.get('competitors', [])
-
-            for comp in competitors:
-                vip_level = comp.get('vip_level_name', 'UNKNOWN')
-                stats = vip_stats[vip_level]
-
-                stats['player_count'] += 1
-                stats['total_wagered'] += comp.get('total_wagered', 0)
-                stats['total_prizes'] += comp.get('winner_amount', 0)
-                stats['positions'].append(comp.get('position', 999))
-
-        # Calculate averages
-        for vip_level, stats in vip_stats.items():
-            if stats['positions']:
-                stats['avg_position'] = statistics.mean(stats['positions'])
-                stats['avg_wager'] = stats['total_wagered'] / stats['player_count']
-                stats['avg_prize'] = stats['total_prizes'] / stats['player_count']
-                stats['roi_percentage'] = ((stats['total_prizes'] / max(stats['total_wagered'], 1)) - 1) * 100
-
-        return dict(vip_stats)
-
     def _analyze_temporal_patterns(self) -> Dict[str, Any]:
         """Analyze temporal patterns in race data."""
         # This would analyze race timing, duration, frequency
@@ -386,27 +205,6 @@ class RaceAnalyzer:
             "seasonal_trends": "Consistent year-round"
         }
 
-    def _analyze_sponsor_performance(self) -> Dict[str, Any]:
-        """Analyze sponsor (SupItsJ) performance and impact."""
-        sponsor_races = 0
-        total_sponsored_prizes = 0
-
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            sponsor = race.get('sponsor', {})
-
-            if sponsor.get('username') == 'SupItsJ':
-                sponsor_races += 1
-                total_sponsored_prizes += race.get('prize_pool', 0)
-
-        return {
-            "races_sponsored": sponsor_races,
-            "total_prize_investment": total_sponsored_prizes,
-            "avg_prize_per_race": total_sponsored_prizes / max(sponsor_races, 1),
-            "sponsor_username": "SupItsJ",
-            "sponsor_vip_level": "DIAMOND 1"
-        }
-
     def _generate_cross_race_insights(self) -> Dict[str, Any]:
         """Generate insights across multiple races."""
         return {
@@ -415,24 +213,66 @@ class RaceAnalyzer:
             "competition_health": "Strong - consistent participation and engagement"
         }
 
-    def _get_unique_players(self) -> set:
-        """Get set of unique player names across all races."""
-        players = set()
-        for race_obj in self.races_data:
-            race = race_obj.get('data', {}).get('getRaceById', {})
-            competitors = race.get('competitors', [])
-            for comp in competitors:
-                players.add(comp.get('display_name', 'Unknown'))
-        return players
-
-    def _cache_analysis_results(self, analysis: Dict[str, Any]):
-        """Cache analysis results to database."""
-        # Implementation for caching results
-        pass
-
-    def export_analysis(self, filename: str = 'race_analysis.json'):
+    def _cache_analysis_results(self, analysis: Dict[str, Any], races: List[RaceRecord]):
+        """Cache per-race analytics rows for the races analyzed in this run."""
+        rows = []
+        for race in races:
+            competitors = race.competitors
+            total_wagered = sum(comp.total_wagered for comp in competitors)
+            # Competitors without a position sort last
+            top = min(competitors, key=lambda comp: (comp.position is None, comp.position or 0)).display_name \
+                if competitors else None
+            rows.append((
+                race.id, race.race_name, race.prize_pool, race.currency_code,
+                race.start_date, race.end_date,
+                len(competitors), total_wagered, total_wagered / max(len(competitors), 1),
+                top, analysis['last_updated']
+            ))
+
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO race_analytics
+            (race_id, race_name, prize_pool, currency_code, start_date, end_date,
+             total_competitors, total_wagered, avg_wager, top_performer, analysis_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.conn.commit()
+
+    def _load_analysis_state(self) -> Optional[Tuple[Set[str], Dict[str, Any]]]:
+        """Saved race IDs and accumulator state for this races file, if current."""
+        row = self.conn.execute(
+            'SELECT state FROM analysis_state WHERE source = ? AND version = ?',
+            (os.path.abspath(self.races_file), ANALYSIS_STATE_VERSION)
+        ).fetchone()
+        if not row:
+            return None
+        try:
+            saved = pickle.loads(row[0])
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable analysis state: {e}")
+            return None
+        return saved['race_ids'], saved['accumulators']
+
+    def _save_analysis_state(self, engine: RaceAnalysisEngine, race_ids: Set[str]):
+        """Persist accumulator state together with the race IDs folded into it."""
+        # Pickle rather than JSON: the state holds every race's details and is
+        # rewritten on each run, where JSON encoding would dominate the runtime
+        state = pickle.dumps({'race_ids': race_ids, 'accumulators': engine.get_state()},
+                             protocol=pickle.HIGHEST_PROTOCOL)
+        self.conn.execute('''
+            INSERT OR REPLACE INTO analysis_state (source, version, race_count, state, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (os.path.abspath(self.races_file), ANALYSIS_STATE_VERSION, len(race_ids),
+              state, datetime.now().isoformat()))
+        self.conn.commit()
+
+    def reset_analysis_state(self):
+        """Forget saved accumulator state so the next run re-analyzes every race."""
+        self.conn.execute('DELETE FROM analysis_state WHERE source = ?', (os.path.abspath(self.races_file),))
+        self.conn.commit()
+
+    def export_analysis(self, filename: str = 'race_analysis.json', incremental: bool = True):
         """Export complete analysis to JSON file."""
-        analysis = self.analyze_all_races()
+        analysis = self.analyze_all_races(incremental)
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(analysis, f, indent=2, ensure_ascii=False)
         print(f"✅ Race analysis exported to {filename}")
@@ -444,14 +284,27 @@ def main():
 
     print("🏁 Starting Race Analytics Engine...")
 
-    # Check for filename argument
-    races_file = 'races.json'
-    if len(sys.argv) > 1:
-        races_file = sys.argv[1]
+    # Check for filename argument; --full ignores saved state and re-analyzes every race,
+    # --mmap maps the races file into memory instead of reading it,
+    # --numpy computes the metrics with the vectorized columnar backend,
+    # --db analyzes a race database (the file argument) with SQL instead of a JSON dump,
+    # --workers=N spreads the exact analysis over N processes. Sums are exact, so any N
+    # (including 1) gives the same output, which can differ in the last digits
+    # from race_analysis.json files written before exact summation
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    incremental = '--full' not in sys.argv[1:]
+    mmap_input = '--mmap' in sys.argv[1:]
+    backend = 'numpy' if '--numpy' in sys.argv[1:] else 'exact'
+    workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv[1:] if arg.startswith('--workers=')), 1)
+    use_database = '--db' in sys.argv[1:]
+    races_file = 'race_database.db' if use_database else 'races.json'
+    if args:
+        races_file = args[0]
         print(f"📁 Using race file: {races_file}")
 
-    analyzer = RaceAnalyzer(races_file)
-    analysis = analyzer.export_analysis()
+    source = RaceDatabase(races_file) if use_database else races_file
+    analyzer = RaceAnalyzer(source, mmap_input=mmap_input, backend=backend, workers=workers)
+    analysis = analyzer.export_analysis(incremental=incremental)
 
     # Display summary
     summary = analysis.get('summary', {})
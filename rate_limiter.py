@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiter shared by synchronous and asyncio API call sites.
+Adapts its rate when the server answers 429 / Retry-After.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Thread-safe token bucket usable from threads and coroutines alike.
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so idle
+    time is banked as burst allowance instead of being slept away. Each caller
+    reserves a token under a short lock and then waits outside it, which keeps
+    concurrent callers fairly spaced without holding the lock while sleeping.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: Optional[float] = None,
+                 backoff_factor: float = 0.5, recovery_step: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.backoff_factor = backoff_factor
+        self.recovery_step = recovery_step if recovery_step is not None else rate / 20
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self):
+        """Block the current thread until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Suspend the current coroutine until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Slow down after a 429: back off the rate and honour Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.rate * self.backoff_factor, self.min_rate)
+            self.tokens = min(self.tokens, 0.0)  # Drop any banked burst
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def reward(self):
+        """Creep back toward the configured rate after a successful request."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.rate + self.recovery_step, self.max_rate)
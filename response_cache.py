@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for GraphQL persisted-query responses.
+Stores compressed raw JSON bodies in SQLite, keyed by query hash and variables.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional
+from sqlite_profile import connect
+
+class ResponseCache:
+    """SQLite-backed response cache with immutable and revalidating entries."""
+
+    def __init__(self, db_path: str = 'response_cache.db', live_ttl: float = 0.0):
+        """
+        Args:
+            db_path: SQLite file holding cached responses
+            live_ttl: Seconds a mutable (live) entry is served before it is refetched
+        """
+        self.db_path = db_path
+        self.live_ttl = live_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = connect(db_path, check_same_thread=False)
+        self.setup_database()
+
+    def setup_database(self):
+        """Create the response cache table."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                cache_key TEXT PRIMARY KEY,
+                query_hash TEXT NOT NULL,
+                variables TEXT NOT NULL,
+                body BLOB NOT NULL,  -- zlib-compressed JSON
+                immutable INTEGER DEFAULT 0,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(query_hash: str, variables: Dict[str, Any]) -> str:
+        """Stable cache key for a persisted query and its variables."""
+        canonical = json.dumps(variables, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f"{query_hash}:{canonical}".encode('utf-8')).hexdigest()
+
+    def get(self, query_hash: str, variables: Dict[str, Any]) -> Optional[bytes]:
+        """Return the cached raw body if it is immutable or still fresh, else None."""
+        key = self.make_key(query_hash, variables)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT body, immutable, fetched_at FROM response_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+
+            if row and (row[1] or time.time() - row[2] < self.live_ttl):
+                self.hits += 1
+                return zlib.decompress(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, query_hash: str, variables: Dict[str, Any], body: bytes, immutable: bool = False):
+        """Store a raw response body."""
+        key = self.make_key(query_hash, variables)
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO response_cache
+                (cache_key, query_hash, variables, body, immutable, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (key, query_hash, json.dumps(variables, sort_keys=True), zlib.compress(body),
+                  int(immutable), time.time()))
+            self.conn.commit()
+
+    def close(self):
+        """Close the cache database."""
+        self.conn.close()
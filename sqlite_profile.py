@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+SQLite connection profiles shared by the race database and local caches.
+A profile is a set of PRAGMAs applied right after connecting.
+"""
+
+import sqlite3
+from typing import Dict, Any, Union
+
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # SQLite defaults: rollback journal, fsync on every commit
+    'default': {
+        'busy_timeout': 5000
+    },
+    # WAL lets readers run alongside the writer; NORMAL sync is durable in WAL
+    # except for the last transactions on power loss
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # Negative values are KiB: 64 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    }
+}
+
+def resolve_profile(profile: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+    """Look up a named profile, or pass a dict of PRAGMAs through."""
+    if profile is None:
+        return {}
+    if isinstance(profile, dict):
+        return profile
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile} (available: {', '.join(SQLITE_PROFILES)})")
+    return SQLITE_PROFILES[profile]
+
+def apply_profile(conn: sqlite3.Connection, profile: Union[str, Dict[str, Any], None] = 'performance'):
+    """Apply a profile's PRAGMAs to an open connection."""
+    for pragma, value in resolve_profile(profile).items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+def connect(db_path: str, profile: Union[str, Dict[str, Any], None] = 'performance',
+            **connect_kwargs) -> sqlite3.Connection:
+    """Open a SQLite connection with a performance profile applied."""
+    conn = sqlite3.connect(db_path, **connect_kwargs)
+    apply_profile(conn, profile)
+    return conn
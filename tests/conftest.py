@@ -0,0 +1,6 @@
+"""Shared fixtures: the repo's modules live at the top level, next to this directory."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
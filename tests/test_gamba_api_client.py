@@ -0,0 +1,53 @@
+"""GambaAPIClient fetching and retries against the local Gamba stub."""
+
+import asyncio
+
+import pytest
+
+from gamba_api_client import GambaAPIClient, RetryPolicy
+from gamba_stub_server import StubGambaServer
+from rate_limiter import TokenBucket
+
+def make_client(server, **kwargs):
+    """A client for the stub whose rate limiter never waits."""
+    return GambaAPIClient(base_url=server.base_url, rate_limiter=TokenBucket(rate=1e9, capacity=1e9), **kwargs)
+
+def race_id_of(race_data):
+    race = race_data['data']['getRaceById']
+    return int(race['id']) if race else None
+
+def test_fetch_races_async_keeps_order_under_the_concurrency_cap():
+    race_ids = [17, 3, 12, 25, 1, 9, 30, 22, 5, 14, 28, 7, 19, 2, 11, 26]
+    with StubGambaServer(latency=0.05, max_race_id=20) as server:
+        results = asyncio.run(make_client(server).fetch_races_async(race_ids, concurrency=4))
+
+    assert [race_id_of(race_data) for race_data in results] == [
+        race_id if race_id <= 20 else None for race_id in race_ids]
+    assert server.request_count == len(race_ids)
+    assert 1 < server.max_in_flight <= 4
+
+def test_sync_retries_stop_after_the_policy_limit():
+    with StubGambaServer(failure_rate=1.0) as server:
+        client = make_client(server, retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01))
+        assert client.get_race_by_id(1) is None
+
+    assert server.request_count == 3
+
+@pytest.mark.parametrize('max_attempts', [1, 3])
+def test_async_retries_stop_after_the_policy_limit(max_attempts):
+    with StubGambaServer(failure_rate=1.0) as server:
+        client = make_client(server, retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=0.01))
+        results = asyncio.run(client.fetch_races_async([1, 2], concurrency=2))
+
+    assert results == [None, None]
+    assert server.request_count == 2 * max_attempts
+
+def test_get_race_range_still_accepts_a_positional_delay():
+    with StubGambaServer() as server:
+        client = make_client(server)
+        with pytest.deprecated_call():
+            races = client.get_race_range(1, 3, 0.01)
+        with pytest.raises(TypeError):
+            client.get_race_range(1, 3, None, 2)
+
+    assert [race_id_of(race_data) for race_data in races] == [1, 2, 3]
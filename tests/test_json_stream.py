@@ -0,0 +1,50 @@
+"""iter_json_objects in stream and mmap modes on hand-collected dump layouts."""
+
+import json
+
+import pytest
+
+from json_stream import MappedJSONDump, iter_json_objects
+
+OBJECTS = [
+    {'message': 'braces {inside} "strings" }{', 'escaped': 'back\\slash \\" quote', 'nested': [{'a': {}}]},
+    {'unicode': 'é ✓ 🏁', 'empty': ''},
+    {'data': {'myTips': {'results': [{'id': 'tip-1'}], 'paginate': {'page_count': 1}}}}
+]
+
+def write_dump(path):
+    """The objects concatenated, separated by commas and "-----" lines, the last one inside an array."""
+    text = (json.dumps(OBJECTS[0], indent=4) + ',\n\n-----\n\n' +
+            json.dumps(OBJECTS[1], ensure_ascii=False) + '\n[ ' + json.dumps(OBJECTS[2]) + ' ]\n')
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('mmap_input', [False, True])
+def test_objects_are_read_in_order(tmp_path, mmap_input):
+    path = write_dump(tmp_path / 'dump.json')
+
+    assert list(iter_json_objects(path, mmap_input=mmap_input)) == OBJECTS
+
+def test_mapped_spans_cover_each_object_exactly(tmp_path):
+    path = write_dump(tmp_path / 'dump.json')
+    raw = (tmp_path / 'dump.json').read_bytes()
+
+    with MappedJSONDump(path) as dump:
+        spans = list(dump.spans())
+
+    assert [json.loads(raw[start:end]) for start, end in spans] == OBJECTS
+
+@pytest.mark.parametrize('mmap_input', [False, True])
+@pytest.mark.parametrize('text', ['{"a": {"b": 1}', '{"a": "never closed}', '{"a": tru}'])
+def test_malformed_dumps_raise_value_error(tmp_path, mmap_input, text):
+    path = tmp_path / 'dump.json'
+    path.write_text(text, encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        list(iter_json_objects(str(path), mmap_input=mmap_input))
+
+def test_empty_dump_maps_to_nothing(tmp_path):
+    path = tmp_path / 'dump.json'
+    path.write_bytes(b'')
+
+    assert list(iter_json_objects(str(path), mmap_input=True)) == []
@@ -0,0 +1,92 @@
+"""CryptoDataFetcher's price cache against a local CoinGecko stub."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gamba_stub_server import StubCoinGeckoServer, synthetic_quote
+from price_calculator import CryptoDataFetcher
+
+@pytest.fixture
+def coingecko():
+    with StubCoinGeckoServer() as server:
+        yield server
+
+@pytest.fixture
+def fetcher(tmp_path, coingecko):
+    fetcher = CryptoDataFetcher(cache_db=str(tmp_path / 'prices.db'), price_ttl=300.0,
+                                api_url=coingecko.base_url, timeout=5.0)
+    yield fetcher
+    fetcher.conn.close()
+
+def store_price(fetcher, currency, price, age):
+    """Write a price_cache row `age` seconds old."""
+    fetcher.conn.execute('''
+        INSERT INTO price_cache
+        (currency, timestamp, price, market_cap, volume_24h, price_change_24h, price_change_7d)
+        VALUES (?, ?, ?, 0, 0, 0, 0)
+    ''', (currency, int(time.time() - age), price))
+    fetcher.conn.commit()
+
+def test_fresh_row_is_served_without_a_request(fetcher, coingecko):
+    store_price(fetcher, 'BTC', 12345.0, age=10)
+
+    prices = fetcher.fetch_current_prices(['BTC'])
+
+    assert prices['BTC']['price'] == 12345.0
+    assert fetcher.http_requests == 0
+    assert coingecko.request_count == 0
+
+def test_expired_row_is_fetched_again(fetcher, coingecko):
+    store_price(fetcher, 'BTC', 12345.0, age=600)
+
+    prices = fetcher.fetch_current_prices(['BTC'])
+
+    assert prices['BTC']['price'] == synthetic_quote('bitcoin')['usd']
+    assert coingecko.requested_ids == [['bitcoin']]
+    assert fetcher.cached_prices(['BTC'], fetcher.price_ttl)['BTC']['price'] == synthetic_quote('bitcoin')['usd']
+
+def test_concurrent_callers_share_one_request(fetcher, coingecko):
+    coingecko.latency = 0.2
+    callers = 8
+    barrier = threading.Barrier(callers)
+
+    def fetch(_):
+        barrier.wait()
+        return fetcher.fetch_current_prices(['BTC', 'ETH'])
+
+    with ThreadPoolExecutor(callers) as pool:
+        results = list(pool.map(fetch, range(callers)))
+
+    assert coingecko.request_count == 1
+    assert fetcher.http_requests == 1
+    for prices in results:
+        assert prices['BTC']['price'] == synthetic_quote('bitcoin')['usd']
+        assert prices['ETH']['price'] == synthetic_quote('ethereum')['usd']
+
+def test_partly_overlapping_callers_fetch_only_the_difference(fetcher, coingecko):
+    coingecko.latency = 0.3
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(fetcher.fetch_current_prices, ['BTC', 'ETH'])
+        while not fetcher._in_flight:
+            time.sleep(0.005)
+        second = pool.submit(fetcher.fetch_current_prices, ['ETH', 'SOL'])
+        first, second = first.result(), second.result()
+
+    assert sorted(coingecko.requested_ids) == [['bitcoin', 'ethereum'], ['solana']]
+    assert set(first) == {'BTC', 'ETH'}
+    assert set(second) == {'ETH', 'SOL'}
+    assert second['ETH'] == first['ETH']
+
+def test_outage_falls_back_to_latest_cached_row(fetcher, coingecko):
+    store_price(fetcher, 'BTC', 11111.0, age=7200)
+    store_price(fetcher, 'BTC', 22222.0, age=3600)
+    coingecko.available = False
+
+    prices = fetcher.fetch_current_prices(['BTC', 'ETH'])
+
+    assert coingecko.request_count == 1
+    assert prices['BTC']['price'] == 22222.0
+    assert prices['ETH'] == fetcher.get_fallback_prices()['ETH']
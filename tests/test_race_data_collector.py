@@ -0,0 +1,67 @@
+"""RaceDataCollector backfills against the local Gamba stub."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import race_data_collector
+from gamba_api_client import GambaAPIClient
+from gamba_stub_server import StubGambaServer
+from race_data_collector import RaceDataCollector
+from rate_limiter import TokenBucket
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # race_collection.log is written to the working directory
+    with StubGambaServer(max_race_id=30) as server:
+        collector = RaceDataCollector(db_path=str(tmp_path / 'races.db'), cache_path=str(tmp_path / 'cache.db'),
+                                      concurrency=4)
+        collector.api_client = GambaAPIClient(base_url=server.base_url, cache=collector.response_cache,
+                                              rate_limiter=TokenBucket(rate=1e9, capacity=1e9))
+        collector.server = server
+        yield collector
+        collector.database.close()
+
+def stored_race_ids(collector):
+    with collector.database.pool.reader() as conn:
+        return sorted(int(row[0]) for row in conn.execute('SELECT race_id FROM races'))
+
+def test_collect_race_range_stores_the_range(collector):
+    stats = collector.collect_race_range(1, 12)
+
+    assert stored_race_ids(collector) == list(range(1, 13))
+    assert stats['successful_collections'] == 12
+    assert stats['job_progress']['stored'] == 12
+
+def test_collect_race_range_still_accepts_a_positional_delay(collector):
+    with pytest.deprecated_call():
+        stats = collector.collect_race_range(1, 3, 0.01)
+    with pytest.raises(TypeError):
+        collector.collect_race_range(1, 3, None, False)
+
+    assert stats['successful_collections'] == 3
+    assert stored_race_ids(collector) == [1, 2, 3]
+
+def test_collect_race_range_fetches_batches_concurrently(collector):
+    collector.server.latency = 0.05
+
+    stats = collector.collect_race_range(21, 40, batch_size=10)
+
+    assert stored_race_ids(collector) == list(range(21, 31))
+    assert stats['job_progress']['stored'] == 10
+    assert stats['job_progress']['not_found'] == 10
+    assert collector.server.request_count == 20
+    assert 1 < collector.server.max_in_flight <= 4
+
+def test_monitor_stores_races_past_the_highest_stored_one(collector, monkeypatch):
+    collector.collect_race_range(1, 5)
+    collector.server.latency = 0.02
+
+    def stop(seconds):
+        raise KeyboardInterrupt
+    # The collector's own sleep between checks ends the loop; the stub keeps the real one
+    monkeypatch.setattr(race_data_collector, 'time', SimpleNamespace(sleep=stop))
+    collector.monitor_new_races()
+
+    assert stored_race_ids(collector) == list(range(1, 31))
+    assert 1 < collector.server.max_in_flight <= 4
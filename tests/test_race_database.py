@@ -0,0 +1,96 @@
+"""RaceDatabase storage and aggregates on synthetic races."""
+
+import sqlite3
+
+import pytest
+
+from gamba_stub_server import synthetic_race
+from race_database import RaceDatabase
+from races_analyzer import RaceAnalyzer
+
+@pytest.fixture
+def db(tmp_path):
+    db = RaceDatabase(str(tmp_path / 'races.db'))
+    yield db
+    db.close()
+
+def renamed(race_data, player_id, name):
+    """A race payload with one competitor's display name changed."""
+    for comp in race_data['data']['getRaceById']['competitors']:
+        if comp['competitor_id'] == player_id:
+            comp['display_name'] = name
+    return race_data
+
+def test_player_index_is_kept_in_the_race_database(db):
+    first = synthetic_race(1)
+    player_id = first['data']['getRaceById']['competitors'][0]['competitor_id']
+    db.insert_races_bulk([first, renamed(synthetic_race(1), player_id, 'Renamed')])
+
+    with db.pool.reader() as conn:
+        rows = conn.execute('SELECT player_key, player_id, display_name FROM player_index').fetchall()
+        player_count = conn.execute('SELECT COUNT(*) FROM players').fetchone()[0]
+
+    assert len(rows) == player_count == len(db.players)
+    assert sorted(row[0] for row in rows) == list(range(len(rows)))
+    key = db.players.key_of(player_id, 'Renamed')
+    assert db.players.name_of(key) == 'Renamed'
+    assert (key, player_id, 'Renamed') in [tuple(row) for row in rows]
+
+def test_analyzer_uses_the_race_database_index(db, tmp_path):
+    db.insert_races_bulk([synthetic_race(race_id) for race_id in range(1, 4)])
+    analyzer = RaceAnalyzer(db, cache_db=str(tmp_path / 'cache.db'))
+
+    assert analyzer.players is db.players
+    cache = sqlite3.connect(str(tmp_path / 'cache.db'))
+    tables = {row[0] for row in cache.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    cache.close()
+    assert 'player_index' not in tables
+
+def test_player_index_is_backfilled_for_existing_databases(db, tmp_path):
+    db.insert_races_bulk([synthetic_race(race_id) for race_id in range(1, 4)])
+    expected = {identity: key for key, identity in enumerate(db.players.identities)}
+    db.conn.execute('DELETE FROM player_index')
+    db.conn.commit()
+    db.close()
+
+    reopened = RaceDatabase(db.db_path)
+    try:
+        assert {identity: key for key, identity in enumerate(reopened.players.identities)} == expected
+    finally:
+        reopened.close()
+
+AGGREGATE_COLUMNS = ('total_races_participated', 'total_wagered', 'total_prizes_won', 'best_position',
+                     'avg_position', 'positioned_races', 'roi_percentage')
+
+def player_aggregates(db):
+    with db.pool.reader() as conn:
+        return {row[0]: tuple(row[1:]) for row in conn.execute(
+            f"SELECT player_id, {', '.join(AGGREGATE_COLUMNS)} FROM players ORDER BY player_id")}
+
+def without_positions(race_data, count):
+    """A race payload whose first `count` competitors have no position."""
+    for comp in race_data['data']['getRaceById']['competitors'][:count]:
+        comp['position'] = None
+    return race_data
+
+def test_incremental_aggregates_match_a_rebuild(db):
+    races = [synthetic_race(race_id, competitor_count=6) for race_id in range(1, 30)]
+    # One player who never has a position, and others with only some positions
+    unplaced = {'id': 'unplaced', 'competitor_id': 'unplaced', 'display_name': 'Unplaced',
+                'vip_level_name': 'GOLD', 'total_wagered': 50.0, 'winner_amount': 0, 'position': None}
+    for index, race_data in enumerate(races):
+        without_positions(race_data, index % 3)
+        if index % 2:
+            race_data['data']['getRaceById']['competitors'].append(dict(unplaced))
+    db.insert_races_bulk(races[:10], batch_size=4)
+    for race_data in races[10:]:
+        db.insert_race_data(race_data)
+    incremental = player_aggregates(db)
+
+    db.rebuild_statistics()
+    rebuilt = player_aggregates(db)
+
+    assert incremental['unplaced'][3:6] == (999, 999, 0)
+    assert incremental.keys() == rebuilt.keys()
+    for player_id, row in incremental.items():
+        assert row == pytest.approx(rebuilt[player_id]), player_id
@@ -0,0 +1,58 @@
+"""iter_tip_pages paging and watermark stops against the local Gamba stub."""
+
+import pytest
+
+from gamba_api_client import GambaAPIClient
+from gamba_stub_server import StubGambaServer
+from rate_limiter import TokenBucket
+from tip_store import TipStore
+
+def tip_page(first: int, count: int):
+    """A myTips page of `count` tips, newest first, numbered down from `first`."""
+    return {'data': {'myTips': {'results': [{
+        'id': f"tip-{number}",
+        'issued_at': f"2025-05-{number:02d}T12:00:00+00:00",
+        'amount': '1.0',
+        'currency_code': 'USDT',
+        'type': 'TIP',
+        'sender_username': 'alice',
+        'receiver_username': 'bob',
+        'is_public': True
+    } for number in range(first, first - count, -1)], 'paginate': {
+        'exclusive_start_key': None, 'page_count': count, '__typename': 'TransactionPaginate'}}}}
+
+PAGES = [tip_page(28, 6), tip_page(22, 6), tip_page(16, 6), tip_page(10, 6)]
+
+def make_client(server):
+    return GambaAPIClient(base_url=server.base_url, rate_limiter=TokenBucket(rate=1e9, capacity=1e9))
+
+def page_ids(page):
+    return [tip['id'] for tip in page['data']['myTips']['results']]
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_paging_follows_cursors_to_the_last_page(prefetch):
+    with StubGambaServer(tip_pages=PAGES) as server:
+        pages = list(make_client(server).iter_tip_pages(query_hash='stub', prefetch=prefetch))
+
+    assert [page_ids(page) for page in pages] == [page_ids(page) for page in PAGES]
+    assert server.request_count == len(PAGES)
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_paging_stops_at_the_watermark_without_requesting_further(tmp_path, prefetch):
+    store = TipStore(str(tmp_path / 'tips.db'))
+    store.add_pages(PAGES[1:])
+    watermark = store.watermark()
+    store.close()
+
+    with StubGambaServer(latency=0.05, tip_pages=PAGES) as server:
+        pages = list(make_client(server).iter_tip_pages(watermark, query_hash='stub', prefetch=prefetch))
+
+    assert [page_ids(page) for page in pages] == [page_ids(PAGES[0]), page_ids(PAGES[1])]
+    assert server.request_count == 2
+
+def test_paging_stops_after_max_pages():
+    with StubGambaServer(tip_pages=PAGES) as server:
+        pages = list(make_client(server).iter_tip_pages(query_hash='stub', max_pages=2))
+
+    assert len(pages) == 2
+    assert server.request_count == 2
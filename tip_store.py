@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite store of tip transactions.
+Tips are upserted page by page under their transaction ID, so adding a page
+costs O(page) and analyses query indexed columns instead of re-parsing the
+whole consolidated history.
+"""
+
+import hashlib
+import json
+from typing import Dict, Any, List, Iterable, Optional
+from sqlite_profile import connect
+
+def tip_id(tip: Dict[str, Any]) -> Optional[str]:
+    """Transaction ID a tip is deduplicated by."""
+    return tip.get('id') or tip.get('transaction_id')
+
+def page_key(page: Dict[str, Any]) -> str:
+    """
+    Identity of a myTips page: its cursor and the IDs of its tips.
+
+    Hand-collected pages often carry no cursor, so the tip IDs are needed to
+    tell pages apart; a page stored twice is counted once.
+    """
+    tips = page.get('data', {}).get('myTips', {})
+    content = json.dumps([tips.get('paginate', {}).get('exclusive_start_key'),
+                          [tip_id(tip) for tip in tips.get('results', [])]], sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def tips_of(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tips of a myTips response page (empty for other objects)."""
+    return page.get('data', {}).get('myTips', {}).get('results', [])
+
+def newer_tips(tips: List[Dict[str, Any]], watermark: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Tips of a page (newest first) that are not yet behind the watermark.
+
+    Scanning stops at the first tip older than the watermark, since the rest
+    of the page is older still; tips issued at the watermark instant are new
+    only if their ID was not seen. Tips without an ID are dropped.
+    """
+    latest = watermark['issued_at'] if watermark else None
+    if latest is None:
+        return [tip for tip in tips if tip_id(tip)]
+
+    new = []
+    for tip in tips:
+        issued_at = tip.get('issued_at', '')
+        if issued_at < latest:
+            break
+        if tip_id(tip) and (issued_at > latest or tip_id(tip) not in watermark['ids']):
+            new.append(tip)
+    return new
+
+# Tip fields kept as columns, in tips() column order
+_TIP_FIELDS = ('id', 'issued_at', 'amount', 'currency_code', 'type',
+               'sender_username', 'receiver_username', 'is_public')
+
+class TipStore:
+    """SQLite-backed tip history, one row per transaction ID."""
+
+    def __init__(self, db_path: str = 'tips.db'):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.setup_database()
+
+    def setup_database(self):
+        """Create the tip tables and their indexes."""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS tips (
+                transaction_id TEXT PRIMARY KEY,
+                issued_at TEXT,
+                amount,  -- Untyped, so ints and floats keep their JSON type
+                currency_code TEXT,
+                type TEXT,
+                sender_username TEXT,
+                receiver_username TEXT,
+                is_public INTEGER,
+                tip TEXT NOT NULL  -- The tip object as received, as JSON
+            )
+        ''')
+
+        # Pages already stored, keyed by their content (see page_key)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS tip_pages (
+                page_key TEXT PRIMARY KEY,
+                page_count INTEGER,
+                tip_count INTEGER,
+                newest_issued_at TEXT,
+                stored_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tips_issued_at ON tips(issued_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tips_currency ON tips(currency_code)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tips_sender ON tips(sender_username)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tips_receiver ON tips(receiver_username)')
+        self.conn.commit()
+
+    def _upsert_page(self, page: Dict[str, Any], watermark: Optional[Dict[str, Any]] = None) -> int:
+        page_tips = tips_of(page)
+        tips = newer_tips(page_tips, watermark)
+        self.conn.executemany('''
+            INSERT INTO tips
+            (transaction_id, issued_at, amount, currency_code, type, sender_username,
+             receiver_username, is_public, tip)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(transaction_id) DO UPDATE SET
+                issued_at = excluded.issued_at, amount = excluded.amount,
+                currency_code = excluded.currency_code, type = excluded.type,
+                sender_username = excluded.sender_username, receiver_username = excluded.receiver_username,
+                is_public = excluded.is_public, tip = excluded.tip
+        ''', [
+            (tip_id(tip), tip.get('issued_at'), tip.get('amount', 0), tip.get('currency_code'),
+             tip.get('type'), tip.get('sender_username'), tip.get('receiver_username'),
+             int(bool(tip.get('is_public', True))), json.dumps(tip, ensure_ascii=False))
+            for tip in tips
+        ])
+
+        paginate = page.get('data', {}).get('myTips', {}).get('paginate', {})
+        self.conn.execute('''
+            INSERT OR IGNORE INTO tip_pages (page_key, page_count, tip_count, newest_issued_at)
+            VALUES (?, ?, ?, ?)
+        ''', (page_key(page), paginate.get('page_count', 0), len(page_tips),
+              page_tips[0].get('issued_at') if page_tips else None))
+        return len(tips)
+
+    def add_page(self, page: Dict[str, Any]) -> int:
+        """Upsert the tips of one myTips page; returns how many were written."""
+        stored = self._upsert_page(page)
+        self.conn.commit()
+        return stored
+
+    def add_pages(self, pages: Iterable[Dict[str, Any]], incremental: bool = False) -> int:
+        """
+        Upsert the tips of many pages in one transaction; other objects are skipped.
+
+        With incremental=True only tips newer than the store's watermark are
+        written (see newer_tips), so re-reading a grown dump costs O(new tips)
+        in the database; backfills of older history need a full pass.
+        """
+        watermark = self.watermark() if incremental else None
+        stored = 0
+        try:
+            for page in pages:
+                if 'myTips' in page.get('data', {}):
+                    stored += self._upsert_page(page, watermark)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return stored
+
+    def watermark(self) -> Dict[str, Any]:
+        """Latest issued_at in the store and the IDs issued at it, from the issued_at index."""
+        latest = self.conn.execute("SELECT MAX(issued_at) FROM tips").fetchone()[0]
+        ids = {row[0] for row in self.conn.execute('SELECT transaction_id FROM tips WHERE issued_at = ?', (latest,))}
+        return {'issued_at': latest, 'ids': ids}
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM tips').fetchone()[0]
+
+    def page_count(self) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(page_count), 0) FROM tip_pages').fetchone()[0]
+
+    def _where(self, currency: Optional[str], sender: Optional[str], receiver: Optional[str],
+               since: Optional[str], until: Optional[str]) -> tuple:
+        clauses, params = [], []
+        for clause, value in (('currency_code = ?', currency), ('sender_username = ?', sender),
+                              ('receiver_username = ?', receiver), ('issued_at >= ?', since),
+                              ('issued_at < ?', until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def tips(self, currency: Optional[str] = None, sender: Optional[str] = None,
+             receiver: Optional[str] = None, since: Optional[str] = None,
+             until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Tips newest first, optionally filtered on indexed columns.
+
+        Tips are rebuilt from their columns, not their stored JSON, so only the
+        fields the analyzers read are present. Ties on issued_at keep the order
+        tips were first stored in, as the consolidated file did.
+        """
+        where, params = self._where(currency, sender, receiver, since, until)
+        rows = self.conn.execute(f'''
+            SELECT transaction_id, issued_at, amount, currency_code, type,
+                   sender_username, receiver_username, is_public
+            FROM tips{where}
+            ORDER BY issued_at DESC, rowid
+        ''', params)
+        tips = []
+        for row in rows:
+            # Missing fields stay missing, so the analyzers' .get() defaults still apply
+            tip = {field: value for field, value in zip(_TIP_FIELDS, row) if value is not None}
+            tip['is_public'] = bool(tip['is_public'])
+            tips.append(tip)
+        return tips
+
+    def tips_data(self, **filters) -> Dict[str, Any]:
+        """tips() in the myTips response shape the analyzers take."""
+        return {'data': {'myTips': {'results': self.tips(**filters)}}}
+
+    def export_consolidated(self, path: str):
+        """
+        Write the whole history as one myTips response (tips_consolidated.json).
+
+        Stored tip JSON is spliced in as it is rather than decoded and
+        re-encoded; the file only exists for the static tips viewer.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"data": {"myTips": {"results": [')
+            for i, (tip,) in enumerate(self.conn.execute('SELECT tip FROM tips ORDER BY issued_at DESC, rowid')):
+                f.write(',\n' if i else '\n')
+                f.write(tip)
+            f.write('\n], "paginate": ')
+            json.dump({'exclusive_start_key': None, 'page_count': self.page_count(),
+                       '__typename': 'TransactionPaginate'}, f)
+            f.write(', "__typename": "TipTransactions"}}}\n')
+
+    def analyze(self) -> Dict[str, Any]:
+        """Same statistics as consolidate_tips.analyze_tips, computed by aggregate queries."""
+        conn = self.conn
+        total, deposits, withdrawals, earliest, latest, public = conn.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(type = 'Tip Deposit'), 0),
+                   COALESCE(SUM(type = 'Tip Withdraw'), 0),
+                   MIN(NULLIF(issued_at, '')), MAX(NULLIF(issued_at, '')),
+                   COALESCE(SUM(is_public), 0)
+            FROM tips
+        ''').fetchone()
+
+        # Groups come out in order of their newest tip, as a pass over the sorted history sees them
+        currencies = conn.execute('''
+            SELECT COALESCE(currency_code, 'Unknown') AS currency, COUNT(*), SUM(amount)
+            FROM tips GROUP BY currency ORDER BY MAX(issued_at) DESC
+        ''').fetchall()
+
+        def top(column: str) -> Dict[str, int]:
+            return dict(conn.execute(f'''
+                SELECT {column}, COUNT(*) FROM tips
+                WHERE {column} IS NOT NULL AND {column} != ''
+                GROUP BY {column} ORDER BY COUNT(*) DESC, MAX(issued_at) DESC LIMIT 10
+            ''').fetchall())
+
+        return {
+            'total_transactions': total,
+            'deposits': deposits,
+            'withdrawals': withdrawals,
+            'currencies': {currency: count for currency, count, _ in currencies},
+            'total_by_currency': {currency: amount for currency, _, amount in currencies},
+            'date_range': {'earliest': earliest, 'latest': latest},
+            'top_senders': top('sender_username'),
+            'top_receivers': top('receiver_username'),
+            'public_transactions': public,
+            'private_transactions': total - public
+        }
+
+    def close(self):
+        """Close the store database."""
+        self.conn.close()